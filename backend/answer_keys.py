@@ -0,0 +1,109 @@
+"""
+Answer keys for auto-grading quiz submissions.
+
+A key is the minimum grading needs from a quiz — per question its type,
+points and option ids — built from one flat column query and cached per
+(quiz id, snapshot version). Every publish, edit and unpublish bumps the
+version (see quiz_snapshots.py), so a cached key is never used for a quiz
+whose questions have changed since. Quizzes that were never published have
+no version and get a fresh, uncached key.
+"""
+from sqlalchemy import select
+from cache import TTLCache
+from config import settings
+from models.quiz import QuizQuestion, QuizOption, QuestionType
+
+# (quiz id, snapshot version) -> AnswerKey
+_key_cache = TTLCache("answer_key", settings.QUIZ_SNAPSHOT_CACHE_SIZE, settings.QUIZ_SNAPSHOT_CACHE_TTL_SECONDS)
+
+_AUTO_GRADED = frozenset((QuestionType.MCQ, QuestionType.LISTENING))
+
+
+class KeyedQuestion:
+    __slots__ = ("question_text", "points", "auto_graded", "option_ids", "correct_ids")
+
+    def __init__(self, question_text: str, points: float, auto_graded: bool):
+        self.question_text = question_text
+        self.points = points
+        self.auto_graded = auto_graded
+        self.option_ids = set()
+        self.correct_ids = set()
+
+
+class AnswerKey:
+    __slots__ = ("questions", "max_score")
+
+    def __init__(self, questions: dict):
+        self.questions = questions  # question id -> KeyedQuestion
+        self.max_score = sum(q.points for q in questions.values())
+
+
+async def _build_key(db, quiz_id: str) -> AnswerKey:
+    rows = (await db.execute(select(
+        QuizQuestion.id, QuizQuestion.question_text, QuizQuestion.points, QuizQuestion.question_type,
+        QuizOption.id, QuizOption.is_correct,
+    ).outerjoin(
+        QuizOption, QuizOption.question_id == QuizQuestion.id
+    ).where(QuizQuestion.quiz_id == quiz_id))).all()
+
+    questions = {}
+    for question_id, text, points, question_type, option_id, is_correct in rows:
+        question = questions.get(question_id)
+        if question is None:
+            question = questions[question_id] = KeyedQuestion(text, points, question_type in _AUTO_GRADED)
+        if option_id is not None:
+            question.option_ids.add(option_id)
+            if is_correct:
+                question.correct_ids.add(option_id)
+    return AnswerKey(questions)
+
+
+async def get_answer_key(db, quiz_id: str, version) -> AnswerKey:
+    """Answer key for the quiz at snapshot `version` (None = never published)"""
+    if version is None:
+        return await _build_key(db, quiz_id)
+    key = _key_cache.get((quiz_id, version))
+    if key is None:
+        key = await _build_key(db, quiz_id)
+        _key_cache.set((quiz_id, version), key)
+    return key
+
+
+def grade(key: AnswerKey, answers):
+    """Grade submitted answers against `key`
+
+    Returns (score, graded) where graded holds one
+    (answer, question, is_correct, points_awarded) tuple per answer to a
+    known question; answers to unknown questions are dropped.
+    """
+    questions = key.questions
+    score = 0.0
+    graded = []
+    for answer in answers:
+        question = questions.get(answer.question_id)
+        if question is None:
+            continue  # skip unknown questions
+
+        is_correct = None
+        points_awarded = 0.0
+        option_id = answer.selected_option_id
+        if question.auto_graded and option_id and option_id in question.option_ids:
+            is_correct = option_id in question.correct_ids
+            if is_correct:
+                points_awarded = question.points
+                score += points_awarded
+
+        graded.append((answer, question, is_correct, points_awarded))
+    return score, graded
+
+
+def answer_rows(submission_id: str, graded) -> list:
+    """quiz_answers rows for the output of grade()"""
+    return [{
+        "submission_id": submission_id,
+        "question_id": answer.question_id,
+        "selected_option_id": answer.selected_option_id,
+        "short_answer_text": answer.short_answer_text,
+        "is_correct": is_correct,
+        "points_awarded": points_awarded,
+    } for answer, question, is_correct, points_awarded in graded]
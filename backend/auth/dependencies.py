@@ -1,25 +1,35 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from cache import TTLCache
+from config import settings
+from database import get_async_db
 from models.user import User, UserRole
-from auth.security import verify_token
+from auth.security import verify_token, is_revoked
 
 security = HTTPBearer()
 
+# Token subject (user id) -> detached User. Shared across requests, so handlers
+# must treat current_user as read-only and load their own row to modify it.
+# Its TTL bounds how long other workers keep accepting a deactivated user or
+# a revoked token.
+_principal_cache = TTLCache("principal", settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
+
+def invalidate_principal(user_id: str):
+    """Forget the cached user so the next request re-reads it from the database"""
+    _principal_cache.pop(str(user_id))
+
+
+async def authenticate(token: str, db: AsyncSession) -> User:
+    """Resolve a JWT to its active user, or raise 401"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token = credentials.credentials
     payload = verify_token(token)
     
     if payload is None:
@@ -29,13 +39,27 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None or not user.is_active:
+    user = _principal_cache.get(user_id)
+    if user is None:
+        user = await db.scalar(select(User).where(User.id == user_id))
+        if user is not None:
+            db.expunge(user)
+            _principal_cache.set(user_id, user)
+    
+    if user is None or not user.is_active or is_revoked(payload, user.tokens_valid_after):
         raise credentials_exception
     
     return user
 
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Get current authenticated user from JWT token"""
+    return await authenticate(credentials.credentials, db)
+
+
 async def require_admin(current_user: User = Depends(get_current_user)) -> User:
     """Require admin role"""
     if current_user.role != UserRole.ADMIN:
@@ -1,19 +1,140 @@
+import asyncio
+import base64
+import calendar
 import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
+from cache import TTLCache
 from config import settings
 
-# Temporary: Using SHA256 instead of bcrypt due to compatibility issues
-# TODO: Fix bcrypt compatibility with Python 3.12.1
+# SHA-256(token) -> verified payload; each entry expires with the token's exp
+_token_cache = TTLCache("token", settings.TOKEN_CACHE_SIZE, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
-def hash_password(password: str) -> str:
-    """Hash a password using SHA256 (temporary workaround)"""
+# ---------------------------------------------------------------------------
+# Password hashing
+# ---------------------------------------------------------------------------
+# Hashes are self-describing ("$2b$...", "$scrypt$...", "$argon2id$..."), so
+# verify_password() picks the right algorithm from the stored value. Bare
+# 64-char hex digests are the legacy unsalted SHA-256 hashes; they still
+# verify, and needs_rehash() flags them so login can upgrade them.
+
+
+class _BcryptHasher:
+    prefixes = ("$2a$", "$2b$", "$2y$")
+
+    def hash(self, password: str) -> str:
+        import bcrypt
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        import bcrypt
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return int(hashed.split("$")[2]) != settings.BCRYPT_ROUNDS
+
+
+class _ScryptHasher:
+    prefixes = ("$scrypt$",)
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(16)
+        n = 2 ** settings.SCRYPT_LOG2_N
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=8, p=1, maxmem=n * 8 * 128 * 2)
+        return f"$scrypt$ln={settings.SCRYPT_LOG2_N},r=8,p=1${_b64(salt)}${_b64(digest)}"
+
+    def verify(self, password: str, hashed: str) -> bool:
+        _, _, params, salt, digest = hashed.split("$")
+        params = dict(item.split("=") for item in params.split(","))
+        n, r, p = 2 ** int(params["ln"]), int(params["r"]), int(params["p"])
+        expected = base64.b64decode(digest)
+        actual = hashlib.scrypt(password.encode(), salt=base64.b64decode(salt), n=n, r=r, p=p,
+                                maxmem=n * r * 128 * 2, dklen=len(expected))
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return not hashed.startswith(f"$scrypt$ln={settings.SCRYPT_LOG2_N},")
+
+
+class _Argon2Hasher:
+    prefixes = ("$argon2",)
+
+    def _hasher(self):
+        # Optional dependency: only needed when PASSWORD_HASHER="argon2"
+        from argon2 import PasswordHasher
+        return PasswordHasher(time_cost=settings.ARGON2_TIME_COST, memory_cost=settings.ARGON2_MEMORY_KIB)
+
+    def hash(self, password: str) -> str:
+        return self._hasher().hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        from argon2.exceptions import VerificationError, InvalidHashError
+        try:
+            return self._hasher().verify(hashed, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return self._hasher().check_needs_rehash(hashed)
+
+
+_HASHERS = {"bcrypt": _BcryptHasher(), "scrypt": _ScryptHasher(), "argon2": _Argon2Hasher()}
+
+# KDF work runs here, never on the event loop; the pool size caps how many
+# hashes run at once so a login storm cannot take every core
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+def _b64(raw: bytes) -> str:
+    return base64.b64encode(raw).decode()
+
+
+def _hasher_for(hashed: str):
+    for hasher in _HASHERS.values():
+        if hashed.startswith(hasher.prefixes):
+            return hasher
+    return None
+
+
+def _legacy_sha256(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
 
 
+def hash_password(password: str) -> str:
+    """Hash a password with the configured KDF (blocking; see hash_password_async)"""
+    return _HASHERS[settings.PASSWORD_HASHER].hash(password)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash"""
-    return hash_password(plain_password) == hashed_password
+    """Verify a password against a hash (blocking; see verify_password_async)"""
+    hasher = _hasher_for(hashed_password)
+    if hasher is None:
+        return hmac.compare_digest(_legacy_sha256(plain_password), hashed_password)
+    return hasher.verify(plain_password, hashed_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash is legacy SHA-256, another algorithm, or an outdated cost"""
+    hasher = _hasher_for(hashed_password)
+    if hasher is not _HASHERS[settings.PASSWORD_HASHER]:
+        return True
+    return hasher.needs_rehash(hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password() on the bounded hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password() on the bounded hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, plain_password, hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
@@ -25,15 +146,37 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def revocation_time() -> datetime:
+    """Value for User.tokens_valid_after that revokes every token issued before now
+
+    iat is encoded in whole seconds, so the comparison is too: a token
+    issued in the same second as the revocation stays valid.
+    """
+    return datetime.utcnow().replace(microsecond=0)
+
+
+def is_revoked(payload: dict, tokens_valid_after: datetime) -> bool:
+    """True if the token was issued before the user's tokens_valid_after"""
+    if tokens_valid_after is None:
+        return False
+    return payload.get("iat", 0) < calendar.timegm(tokens_valid_after.utctimetuple())
+
+
 def verify_token(token: str) -> dict:
     """Verify and decode a JWT token"""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
-    except JWTError:
-        return None
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = _token_cache.get(digest)
+
+    if payload is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        _token_cache.set(digest, payload, ttl=payload.get("exp", 0) - time.time())
+
+    return payload
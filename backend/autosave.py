@@ -0,0 +1,151 @@
+"""
+Write-behind buffer for quiz answer autosave.
+
+PATCH /student/submissions/{id}/answers only records the answers here. A
+background task writes everything buffered to quiz_answers every
+AUTOSAVE_FLUSH_INTERVAL_SECONDS as one transaction of batched upserts, so a
+cohort saving every few seconds costs one write transaction per interval
+per worker instead of one per save, and repeated saves of a question
+between flushes collapse into one row. submit_quiz takes the attempt's
+buffered answers directly (take_pending) and stores them with the grades.
+
+A batch being written stays visible to pending_answers() until its
+transaction commits, so a submit or an expiry that runs during a flush
+still grades it. The flush only inserts rows for attempts still in
+progress, so answers written after an attempt was graded are dropped
+instead of leaving ungraded rows behind.
+
+The buffer lives in worker memory: answers buffered when a worker dies
+(at most one interval's worth) are lost; the client resends them with its
+next save or with the final submit.
+"""
+import asyncio
+import logging
+from sqlalchemy import String, Text, bindparam, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from config import settings
+from database import IS_SQLITE, AsyncSessionLocal
+from models.quiz import QuizAnswer, QuizSubmission, SubmissionStatus
+
+logger = logging.getLogger("uvicorn.error")
+
+# submission id -> question id -> (selected_option_id, short_answer_text)
+_pending = {}
+_in_flight = {}  # the batch flush_pending() is writing, same shape; cleared once committed
+_flush_lock = asyncio.Lock()
+_flush_requested = None  # asyncio.Event, created by start() on the serving loop
+_flusher = None
+
+
+def buffer_answers(submission_id: str, answers):
+    """Record answer deltas; later saves of a question replace earlier ones"""
+    drafts = _pending.setdefault(submission_id, {})
+    for answer in answers:
+        drafts[answer.question_id] = (answer.selected_option_id, answer.short_answer_text)
+    if _flush_requested is not None and len(_pending) >= settings.AUTOSAVE_MAX_PENDING_SUBMISSIONS:
+        _flush_requested.set()
+
+
+def pending_answers(submission_id: str) -> dict:
+    """Buffered answers of one attempt not yet committed to quiz_answers"""
+    return {**_in_flight.get(submission_id, {}), **_pending.get(submission_id, {})}
+
+
+def take_pending(submission_id: str) -> dict:
+    """Remove and return one attempt's buffered answers (used by submit)"""
+    return {**_in_flight.pop(submission_id, {}), **_pending.pop(submission_id, {})}
+
+
+def _upsert():
+    """Upsert of one answer draft, inserting only while its attempt is in progress
+
+    The attempt row is read FOR SHARE (PostgreSQL; SQLite serializes writers
+    anyway), so the insert waits for a submit that claimed the attempt and
+    then finds it submitted.
+    """
+    insert_ = sqlite_insert if IS_SQLITE else pg_insert
+    stmt = insert_(QuizAnswer.__table__).from_select(
+        ["submission_id", "question_id", "selected_option_id", "short_answer_text"],
+        select(
+            QuizSubmission.id,
+            bindparam("question_id", type_=String),
+            bindparam("selected_option_id", type_=String),
+            bindparam("short_answer_text", type_=Text),
+        ).where(
+            QuizSubmission.id == bindparam("submission_id", type_=String),
+            QuizSubmission.status == SubmissionStatus.IN_PROGRESS
+        ).with_for_update(read=True)
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[QuizAnswer.submission_id, QuizAnswer.question_id],
+        set_={
+            "selected_option_id": stmt.excluded.selected_option_id,
+            "short_answer_text": stmt.excluded.short_answer_text,
+        },
+        # Never overwrite a graded row, even if the attempt was submitted mid-flush
+        where=QuizAnswer.submission_id.in_(select(QuizSubmission.id).where(
+            QuizSubmission.status == SubmissionStatus.IN_PROGRESS
+        )),
+    )
+
+
+async def flush_pending() -> int:
+    """Write every buffered answer in one transaction; returns drafts sent"""
+    global _pending, _in_flight
+    async with _flush_lock:
+        _in_flight, _pending = _pending, {}
+        rows = [
+            {"submission_id": submission_id, "question_id": question_id,
+             "selected_option_id": option_id, "short_answer_text": text}
+            for submission_id, drafts in _in_flight.items()
+            for question_id, (option_id, text) in drafts.items()
+        ]
+        try:
+            if rows:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(_upsert(), rows)
+                    await db.commit()
+        except SQLAlchemyError:
+            # Put the batch back under anything saved since, and retry next interval
+            for submission_id, drafts in _in_flight.items():
+                _pending[submission_id] = {**drafts, **_pending.get(submission_id, {})}
+            raise
+        finally:
+            _in_flight = {}
+        return len(rows)
+
+
+async def _run_flusher():
+    while True:
+        try:
+            await asyncio.wait_for(_flush_requested.wait(), settings.AUTOSAVE_FLUSH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _flush_requested.clear()
+        try:
+            await flush_pending()
+        except SQLAlchemyError:
+            logger.exception("Autosave flush failed; will retry")
+
+
+def start():
+    """Start this worker's periodic flush task"""
+    global _flusher, _flush_requested
+    if _flusher is None:
+        _flush_requested = asyncio.Event()
+        _flusher = asyncio.create_task(_run_flusher())
+
+
+async def stop():
+    """Stop the flush task and write whatever is still buffered"""
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        try:
+            await _flusher
+        except asyncio.CancelledError:
+            pass
+        _flusher = None
+    await flush_pending()
@@ -0,0 +1,153 @@
+"""
+Enrollment billing: what a student owes and what they have paid.
+
+The amount owed is derived from the enrollment date and the course's
+monthly price. The amount paid is materialized in enrollment_balances
+(models.balance.EnrollmentBalance) so validating a payment does not have
+to SUM the enrollment's payment history.
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import Integer, case, cast, exists, extract, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database import IS_SQLITE
+from models.balance import EnrollmentBalance
+from models.course import Course
+from models.enrollment import Enrollment, EnrollmentStatus
+from models.notification import NotificationEvent
+from models.payment import Payment, PaymentStatus
+from notification_events import payment_event
+from etags import PAYMENTS, bump
+
+
+def months_enrolled(enrollment_date: datetime, now: datetime = None) -> int:
+    """Billable months, counting the enrollment month as month 1
+    
+    A new month only starts on the enrollment anniversary day,
+    e.g. enrolled Feb 16 → month 2 starts March 16, not March 1.
+    """
+    now = now or datetime.utcnow()
+    months = (now.year - enrollment_date.year) * 12 + (now.month - enrollment_date.month)
+    if now.day < enrollment_date.day:
+        months -= 1  # anniversary day not yet reached this month
+    return max(months + 1, 1)
+
+
+def months_enrolled_sql(enrollment_date, now: datetime = None):
+    """months_enrolled() as a SQL expression over an enrollment_date column"""
+    now = now or datetime.utcnow()
+    def part(field):
+        return cast(extract(field, enrollment_date), Integer)
+    months = (now.year - part("year")) * 12 + (now.month - part("month")) + 1
+    months = months - case((part("day") > now.day, 1), else_=0)
+    return case((months < 1, 1), else_=months)
+
+
+def paid_amount(payment: Payment) -> Decimal:
+    """What this payment contributes to its enrollment's total_paid"""
+    if payment.payment_status != PaymentStatus.PAID:
+        return Decimal(0)
+    return Decimal(str(payment.amount))
+
+
+async def get_balance(db, enrollment_id: str) -> EnrollmentBalance:
+    """Load an enrollment's balance row, materializing it on first use"""
+    balance = await db.get(EnrollmentBalance, enrollment_id)
+    if balance is None:
+        total_paid = await db.scalar(select(func.coalesce(func.sum(Payment.amount), 0)).where(
+            Payment.enrollment_id == enrollment_id,
+            Payment.payment_status == PaymentStatus.PAID
+        ))
+        balance = EnrollmentBalance(enrollment_id=enrollment_id, total_paid=Decimal(str(total_paid)))
+        db.add(balance)
+    return balance
+
+
+def add_paid(balance: EnrollmentBalance, delta: Decimal):
+    """Adjust total_paid; the version check runs when the session flushes"""
+    if delta:
+        balance.total_paid = Decimal(str(balance.total_paid)) + delta
+
+
+def _due_charges_query(now: datetime):
+    """Active enrollments whose current month has no generated charge yet"""
+    month = months_enrolled_sql(Enrollment.enrollment_date, now)
+    billed = exists().where(
+        Payment.enrollment_id == Enrollment.id,
+        Payment.billing_month == month
+    )
+    return select(
+        Enrollment.id,
+        month.label("billing_month"),
+        Course.price,
+        Enrollment.student_id,
+        Course.name.label("course_name")
+    ).join(
+        Course, Course.id == Enrollment.course_id
+    ).where(
+        Enrollment.status == EnrollmentStatus.ACTIVE,
+        Course.is_active == True,
+        Course.price > 0,
+        ~billed
+    )
+
+
+def run_monthly_billing(engine, now: datetime = None, chunk_size: int = 1000,
+                        dry_run: bool = False, start_after: str = None, progress=None) -> dict:
+    """Create a PENDING charge for the current month of every active enrollment
+
+    Enrollments are walked in id order, `chunk_size` at a time, each chunk
+    in its own short transaction so SQLite's write lock is never held for
+    long. The unique (enrollment_id, billing_month) index plus ON CONFLICT
+    DO NOTHING make re-runs and crashed runs safe: just run again, or pass
+    the last reported enrollment id as `start_after` to skip ahead.
+    """
+    now = now or datetime.utcnow()
+    insert_ = sqlite_insert if IS_SQLITE else pg_insert
+    due = _due_charges_query(now)
+    last_id = start_after or ""
+    stats = {"due": 0, "created": 0, "amount": Decimal(0), "last_enrollment_id": None}
+
+    while True:
+        with engine.connect() as conn:
+            rows = conn.execute(
+                due.where(Enrollment.id > last_id).order_by(Enrollment.id).limit(chunk_size)
+            ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        stats["due"] += len(rows)
+        stats["amount"] += sum(Decimal(str(row.price)) for row in rows)
+
+        if not dry_run:
+            charges = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "enrollment_id": row.id,
+                    "amount": row.price,
+                    "payment_status": PaymentStatus.PENDING,
+                    "billing_month": row.billing_month,
+                    "notes": f"Monthly charge for month {row.billing_month}",
+                    "created_at": now,
+                }
+                for row in rows
+            ]
+            with engine.begin() as conn:
+                created = set(conn.execute(insert_(Payment).on_conflict_do_nothing(
+                    index_elements=[Payment.enrollment_id, Payment.billing_month]
+                ).returning(Payment.enrollment_id), charges).scalars())
+                # Only charges this run created are announced to their students
+                events = [payment_event(row.student_id, row.course_name, row.price, PaymentStatus.PENDING, now)
+                          for row in rows if row.id in created]
+                if events:
+                    conn.execute(insert(NotificationEvent.__table__), events)
+                if created:
+                    conn.execute(bump(PAYMENTS))
+            stats["created"] += len(created)
+
+        stats["last_enrollment_id"] = last_id
+        if progress:
+            progress(stats)
+    return stats
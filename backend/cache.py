@@ -0,0 +1,95 @@
+"""
+In-process caches shared by the request handlers of one worker.
+
+Every cache registers itself by name so hit/miss counters can be reported
+from a single place (see cache_stats()).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_registry = {}
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after `ttl` seconds
+
+    By default `maxsize` counts entries; with `weigh` (value -> cost, e.g.
+    its size in bytes) it bounds the total cost of the cached values.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float, weigh=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigh = weigh
+        self.hits = 0
+        self.misses = 0
+        self.weight = 0
+        self._data = OrderedDict()  # key -> (expires_at, value, cost)
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def _drop(self, key):
+        self.weight -= self._data.pop(key)[2]
+
+    def get(self, key, default=None):
+        """Return the cached value, or `default` if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self._drop(key)
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float = None):
+        """Store a value; `ttl` overrides the cache-wide lifetime for this entry"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else min(ttl, self.ttl))
+        cost = 1 if self.weigh is None else self.weigh(value)
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            if cost > self.maxsize:
+                return
+            self._data[key] = (expires_at, value, cost)
+            self.weight += cost
+            while self.weight > self.maxsize:
+                self._drop(next(iter(self._data)))
+
+    def pop(self, key):
+        """Drop one entry (no-op if absent)"""
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "weight": self.weight,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+def cache_stats() -> dict:
+    """Counters for every registered cache, keyed by cache name"""
+    return {name: cache.stats() for name, cache in _registry.items()}
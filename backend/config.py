@@ -7,12 +7,73 @@ class Settings(BaseSettings):
     
     # Database - Using SQLite for demo (easier setup, no PostgreSQL required)
     DATABASE_URL: str = "sqlite:///./academic_system.db"
+    DB_ECHO: bool = False  # Log every SQL statement (debugging only)
+    
+    # Connection pool (PostgreSQL)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    DB_POOL_PRE_PING: bool = True
+    
+    # SQLite pragmas, applied on every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # bytes
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
     
     # JWT Security
     SECRET_KEY: str = "your-secret-key-change-in-production-cosmic-academy-2026"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24 hours
     
+    TOKEN_CACHE_SIZE: int = 20000  # verified JWT payloads kept per worker
+    
+    # Password hashing: "bcrypt", "scrypt" or "argon2" (needs argon2-cffi)
+    PASSWORD_HASHER: str = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    SCRYPT_LOG2_N: int = 15
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_KIB: int = 64 * 1024
+    PASSWORD_HASH_WORKERS: int = 4  # max hashes computed concurrently per worker
+    
+    # Admin dashboard snapshot (per worker)
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    
+    # Authenticated-user cache (per worker)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 5  # also the delay before other workers see a revocation
+    
+    # Compiled published-quiz snapshots (per worker; entries are version-checked on every read)
+    QUIZ_SNAPSHOT_CACHE_SIZE: int = 512
+    QUIZ_SNAPSHOT_CACHE_TTL_SECONDS: int = 3600
+    
+    # Quiz answer autosave (per-worker write-behind buffer)
+    AUTOSAVE_FLUSH_INTERVAL_SECONDS: float = 5.0
+    AUTOSAVE_MAX_PENDING_SUBMISSIONS: int = 2000  # flush early once this many attempts have unsaved answers
+    
+    # Quiz time limits
+    QUIZ_SUBMIT_GRACE_SECONDS: int = 30  # late submits/autosaves accepted within this margin
+    QUIZ_SWEEP_INTERVAL_SECONDS: float = 30.0  # longest wait between expiry sweeps
+    QUIZ_SWEEP_BATCH_SIZE: int = 200
+    
+    # Notification feed
+    NOTIFICATION_FEED_LIMIT: int = 20  # newest events returned per poll
+    NOTIFICATION_UNREAD_CAP: int = 100  # unread counting stops here
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: float = 25.0  # comment line sent on idle streams
+    NOTIFICATION_HUB_POLL_SECONDS: float = 2.0  # how often each worker looks for events written elsewhere
+    NOTIFICATION_HUB_GAP_SECONDS: float = 60.0  # how long the poller re-checks ids skipped by later commits
+    
+    # Quiz media uploads
+    UPLOAD_IO_WORKERS: int = 4  # threads writing upload chunks to disk, per worker
+    MEDIA_CACHE_MAX_BYTES: int = 128 * 1024 * 1024  # hot media files kept in memory, per worker
+    MEDIA_CACHE_MAX_FILE_BYTES: int = 20 * 1024 * 1024  # larger files are always read from disk
+    MEDIA_CACHE_TTL_SECONDS: int = 600
+    
+    # Per-request SQL statistics (X-DB-Queries / Server-Timing headers)
+    QUERY_STATS_HEADERS: bool = True
+    N_PLUS_ONE_MODE: str = "off"  # "off", "warn" (log) or "raise" (fail the request); use warn/raise in dev and tests
+    N_PLUS_ONE_THRESHOLD: int = 10  # max executions of one statement shape per request
+    
     # CORS
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:3000"]
     
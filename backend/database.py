@@ -1,21 +1,90 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
+from query_stats import instrument
+
+IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+
+
+def _engine_options() -> dict:
+    """Engine keyword arguments for the configured backend"""
+    if IS_SQLITE:
+        return {"echo": settings.DB_ECHO}
+    return {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the SQLite pragmas from settings to a new connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+
+def engine_profile() -> str:
+    """One-line description of the active engine profile (logged at startup)"""
+    echo = "on" if settings.DB_ECHO else "off"
+    if IS_SQLITE:
+        return (
+            f"sqlite journal_mode={settings.SQLITE_JOURNAL_MODE} synchronous={settings.SQLITE_SYNCHRONOUS} "
+            f"mmap_size={settings.SQLITE_MMAP_SIZE} busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}ms echo={echo}"
+        )
+    return (
+        f"{engine.dialect.name} pool_size={settings.DB_POOL_SIZE} max_overflow={settings.DB_MAX_OVERFLOW} "
+        f"pool_recycle={settings.DB_POOL_RECYCLE}s pre_ping={settings.DB_POOL_PRE_PING} echo={echo}"
+    )
+
 
 # Create database engine
 # For SQLite, we need connect_args with check_same_thread=False
-connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+connect_args = {"check_same_thread": False} if IS_SQLITE else {}
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args=connect_args,
-    pool_pre_ping=True if not settings.DATABASE_URL.startswith("sqlite") else False,
-    echo=True  # Set to False in production
+    **_engine_options()
 )
 
 # Create SessionLocal class for database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:") or url.startswith("postgresql+psycopg2:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+
+# Async engine used by the API routers so queries never block the event loop.
+# The sync engine above is kept for create_all() and the maintenance scripts.
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    **_engine_options()
+)
+
+instrument(engine)
+instrument(async_engine.sync_engine)
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+# expire_on_commit=False so objects stay readable after commit without a
+# lazy reload (lazy IO is not allowed on an AsyncSession)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # Base class for all models
 Base = declarative_base()
 
@@ -27,3 +96,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,15 +1,29 @@
 import os
+import logging
+import time
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
+from starlette.datastructures import MutableHeaders
 from config import settings
-from database import Base, engine
+from database import Base, engine, async_engine, engine_profile
+from query_stats import capture_queries
+import metrics
+import autosave
+import quiz_expiry
+import notification_hub
+from media import MediaFiles
 from routers import auth
 from routers.admin import users, courses, enrollments, payments, statistics
 from routers import teacher, student
 from routers.notifications import router as notifications_router
 from routers.uploads import router as uploads_router
 
+logger = logging.getLogger("uvicorn.error")
+
+# Time pool checkouts of the engine the routers use
+metrics.instrument_pool(async_engine.sync_engine)
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
@@ -20,6 +34,28 @@ app = FastAPI(
     description="Academic English Institute Management System API"
 )
 
+@app.on_event("startup")
+async def log_engine_profile():
+    """Report which database engine profile this worker is running with"""
+    logger.info("Database engine profile: %s", engine_profile())
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Quiz answer autosave flushes, the quiz time-limit sweeper and the notification poller"""
+    autosave.start()
+    quiz_expiry.start()
+    notification_hub.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """Stop the sweeper and write buffered quiz answers before the worker exits"""
+    await notification_hub.stop()
+    await quiz_expiry.stop()
+    await autosave.stop()
+
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -27,13 +63,68 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Unread-Count", "X-DB-Queries", "Server-Timing"],
 )
 
-# Ensure upload directory exists and mount it for static serving
+
+class InstrumentRequests:
+    """Per-request SQL statistics, N+1 warnings and route metrics
+
+    Plain ASGI rather than @app.middleware("http"), which runs every request
+    in an extra task and relays its body through a queue: notification
+    streams and media responses pass through this one untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+        observed = False
+        metrics.IN_FLIGHT.inc()
+
+        def observe():
+            nonlocal observed
+            if not observed:
+                observed = True
+                metrics.IN_FLIGHT.dec()
+                metrics.observe_request(scope["method"], metrics.route_label(scope), status_code,
+                                        time.perf_counter() - started, stats.count)
+
+        async def send_instrumented(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                observe()
+                if settings.QUERY_STATS_HEADERS:
+                    message.setdefault("headers", [])
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Queries"] = str(stats.count)
+                    headers["Server-Timing"] = stats.server_timing()
+                if settings.N_PLUS_ONE_MODE == "warn":
+                    for statement, times in stats.repeated(settings.N_PLUS_ONE_THRESHOLD).items():
+                        logger.warning("Possible N+1 on %s %s: statement executed %d times: %s",
+                                       scope["method"], scope["path"], times, " ".join(statement.split()))
+            await send(message)
+
+        with capture_queries() as stats:
+            try:
+                await self.app(scope, receive, send_instrumented)
+            finally:
+                observe()
+
+
+app.add_middleware(InstrumentRequests)
+
+# Ensure upload directory exists and mount it for media serving
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), "uploads")
 os.makedirs(os.path.join(UPLOAD_DIR, "audio"), exist_ok=True)
 os.makedirs(os.path.join(UPLOAD_DIR, "images"), exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+app.mount("/uploads", MediaFiles(UPLOAD_DIR), name="uploads")
 
 # Include routers
 app.include_router(auth.router)
@@ -62,3 +153,9 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """Request, database pool, cache and upload metrics for this worker (Prometheus text format)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,378 @@
+"""
+Content-addressed storage for uploaded quiz media (listening clips, option
+images), and the app that serves it at /uploads.
+
+Uploads are parsed straight off the request stream, one chunk at a time:
+each chunk of the file part is hashed and appended to a temporary file on
+a small thread pool, so a worker holds one chunk per upload whatever the
+file size, and the event loop never blocks on disk. The upload is aborted
+with 413 as soon as it passes its size cap (or before reading anything if
+Content-Length already says it will).
+
+A finished file is stored as <sha256><ext> under its kind's directory, the
+extension following from the validated content type. Uploading the same
+clip again, for another quiz, returns the existing file instead of a copy.
+
+Stored files never change (older uploads have uuid names, newer ones their
+hash), so MediaFiles serves them with a strong ETag and an immutable
+Cache-Control, and answers single byte ranges for audio seeking. Files the
+class is listening to right now are served from a per-worker in-memory
+cache bounded by MEDIA_CACHE_MAX_BYTES; a cold file is read from disk once
+however many requests for it arrive together. Whole files outside the
+cache go out through the server's zero-copy path (the ASGI pathsend
+extension) where the server offers one, and are streamed from the thread
+pool otherwise.
+"""
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+import uuid
+from email.utils import formatdate
+from concurrent.futures import ThreadPoolExecutor
+import multipart
+from multipart.multipart import parse_options_header
+from fastapi import HTTPException, Request, status
+from cache import TTLCache
+from config import settings
+from metrics import UPLOAD_BYTES
+
+UPLOAD_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
+INCOMING_DIR = os.path.join(UPLOAD_BASE, ".incoming")  # partial uploads, renamed into place when complete
+
+FILE_FIELD = "file"
+MULTIPART_OVERHEAD = 16 * 1024  # boundaries and part headers allowed on top of the size cap
+
+# Blocking file IO of the upload handlers runs here
+_io_executor = ThreadPoolExecutor(max_workers=settings.UPLOAD_IO_WORKERS, thread_name_prefix="upload-io")
+
+
+class MediaKind:
+    """One kind of upload: where it is stored, what it may be and how big"""
+
+    def __init__(self, name: str, directory: str, extensions: dict, max_mb: int):
+        self.name = name
+        self.directory = directory
+        self.extensions = extensions  # allowed content type -> stored extension
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_mb = max_mb
+
+    @property
+    def allowed(self) -> str:
+        return ", ".join(dict.fromkeys(ext.lstrip(".") for ext in self.extensions.values()))
+
+    def url(self, filename: str) -> str:
+        return f"/uploads/{self.directory}/{filename}"
+
+
+class _FilePart:
+    """multipart callbacks that collect the headers and data of the `file` field"""
+
+    def __init__(self):
+        self.headers = {}
+        self.chunks = []       # data received since the last drain
+        self.found = False     # the file field's headers have been parsed
+        self.complete = False  # ... and its data has ended
+        self._part_headers = {}
+        self._field = b""
+        self._value = b""
+        self._current = False
+
+    @property
+    def content_type(self) -> str:
+        return parse_options_header(self.headers.get("content-type", ""))[0].decode("latin-1")
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._part_begin,
+            "on_header_field": self._header_field,
+            "on_header_value": self._header_value,
+            "on_header_end": self._header_end,
+            "on_headers_finished": self._headers_finished,
+            "on_part_data": self._part_data,
+            "on_part_end": self._part_end,
+        }
+
+    def _part_begin(self):
+        self._part_headers = {}
+
+    def _header_field(self, data, start, end):
+        self._field += data[start:end]
+
+    def _header_value(self, data, start, end):
+        self._value += data[start:end]
+
+    def _header_end(self):
+        self._part_headers[self._field.decode("latin-1").lower()] = self._value.decode("latin-1")
+        self._field, self._value = b"", b""
+
+    def _headers_finished(self):
+        _, options = parse_options_header(self._part_headers.get("content-disposition", ""))
+        self._current = not self.found and options.get(b"name") == FILE_FIELD.encode()
+        if self._current:
+            self.found = True
+            self.headers = self._part_headers
+
+    def _part_data(self, data, start, end):
+        if self._current:
+            self.chunks.append(data[start:end])
+
+    def _part_end(self):
+        if self._current:
+            self.complete = True
+            self._current = False
+
+    def drain(self) -> list:
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+def _write(handle, digest, chunks):
+    for chunk in chunks:
+        digest.update(chunk)
+        handle.write(chunk)
+
+
+def _store(handle, temp_path: str, final_path: str) -> bool:
+    """Move a finished upload into place; False if the same content was already stored"""
+    handle.close()
+    if os.path.exists(final_path):
+        os.remove(temp_path)
+        return False
+    os.replace(temp_path, final_path)
+    return True
+
+
+def _discard(handle, temp_path: str):
+    handle.close()
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+async def _run(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_io_executor, func, *args)
+
+
+async def save_upload(request: Request, kind: MediaKind) -> dict:
+    """Stream the `file` field of a multipart request into content-addressed storage
+
+    Returns the stored file's url, filename, size and whether an identical
+    file was already there.
+    """
+    too_large = HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                              detail=f"File too large (max {kind.max_mb} MB)")
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > kind.max_bytes + MULTIPART_OVERHEAD:
+        raise too_large
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a multipart/form-data upload")
+
+    part = _FilePart()
+    parser = multipart.MultipartParser(options[b"boundary"], part.callbacks())
+    os.makedirs(INCOMING_DIR, exist_ok=True)
+    temp_path = os.path.join(INCOMING_DIR, str(uuid.uuid4()))
+    handle = await _run(open, temp_path, "wb")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if part.found and part.content_type not in kind.extensions:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unsupported file type: {part.content_type}. Allowed: {kind.allowed}"
+                )
+            chunks = part.drain()
+            if chunks:
+                size += sum(len(c) for c in chunks)
+                if size > kind.max_bytes:
+                    raise too_large
+                await _run(_write, handle, digest, chunks)
+            if part.complete:
+                break
+        if not part.complete:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No file uploaded")
+    except BaseException:
+        await _run(_discard, handle, temp_path)
+        raise
+    finally:
+        UPLOAD_BYTES.inc(kind.name, amount=size)
+
+    filename = digest.hexdigest() + kind.extensions[part.content_type]
+    directory = os.path.join(UPLOAD_BASE, kind.directory)
+    os.makedirs(directory, exist_ok=True)
+    created = await _run(_store, handle, temp_path, os.path.join(directory, filename))
+    return {"url": kind.url(filename), "filename": filename, "size": size, "deduplicated": not created}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Serving
+# ─────────────────────────────────────────────────────────────────────────────
+
+SERVED_DIRECTORIES = ("audio", "images")
+IMMUTABLE = "public, max-age=31536000, immutable"
+STREAM_CHUNK = 256 * 1024
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]*(\.[A-Za-z0-9]+)?$")
+_HASH_NAME = re.compile(r"^([0-9a-f]{64})\.")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _MediaFile:
+    """What serving one stored file needs; `body` is set if it fits the hot cache"""
+    __slots__ = ("path", "size", "etag", "last_modified", "content_type", "body")
+
+    def __init__(self, path: str, stat: os.stat_result, body: bytes = None):
+        self.path = path
+        self.size = stat.st_size
+        name = os.path.basename(path)
+        content_hash = _HASH_NAME.match(name)
+        # Hash-named files are identified by their content; older uuid-named ones by size and mtime
+        self.etag = f'"{content_hash.group(1) if content_hash else "%x-%x" % (stat.st_size, stat.st_mtime_ns)}"'
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.body = body
+
+
+# path -> _MediaFile, bounded by the bytes of the cached bodies
+_hot_files = TTLCache("media_hot", settings.MEDIA_CACHE_MAX_BYTES, settings.MEDIA_CACHE_TTL_SECONDS,
+                      weigh=lambda media: len(media.body) if media.body is not None else 512)
+_loading = {}  # path -> Task reading it, shared by the requests that arrive meanwhile
+
+
+def _read_media(path: str):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if not os.path.isfile(path):
+        return None
+    body = None
+    if stat.st_size <= settings.MEDIA_CACHE_MAX_FILE_BYTES:
+        with open(path, "rb") as f:
+            body = f.read()
+    return _MediaFile(path, stat, body)
+
+
+async def _load_media(path: str):
+    try:
+        media = await _run(_read_media, path)
+        if media is not None:
+            _hot_files.set(path, media)
+        return media
+    finally:
+        _loading.pop(path, None)
+
+
+async def _get_media(path: str):
+    media = _hot_files.get(path)
+    if media is not None:
+        return media
+    task = _loading.get(path)
+    if task is None:
+        task = _loading[path] = asyncio.ensure_future(_load_media(path))
+    return await asyncio.shield(task)
+
+
+def _read_range(fd: int, offset: int, length: int) -> bytes:
+    return os.pread(fd, length, offset)
+
+
+def _byte_range(header: str, size: int):
+    """(start, end) inclusive for a single-range Range header; None to send the whole
+    file (absent, malformed or multi-range); False if it cannot be satisfied"""
+    match = _RANGE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last `last` bytes
+        length = int(last)
+        return (max(0, size - length), size - 1) if length and size else False
+    start, end = int(first), int(last) if last else size - 1
+    if start > end or start >= size:
+        return False
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    return header.strip() == "*" or any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class MediaFiles:
+    """ASGI app serving the stored uploads (mounted at /uploads in main.py)"""
+
+    def __init__(self, directory: str = UPLOAD_BASE):
+        self.directory = directory
+
+    async def __call__(self, scope, receive, send):
+        if scope["method"] not in ("GET", "HEAD"):
+            await self._empty(send, 405, [(b"allow", b"GET, HEAD")])
+            return
+        parts = scope["path"][len(scope.get("root_path", "")):].strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in SERVED_DIRECTORIES or not _SAFE_NAME.match(parts[1]):
+            await self._empty(send, 404)
+            return
+        media = await _get_media(os.path.join(self.directory, *parts))
+        if media is None:
+            await self._empty(send, 404)
+            return
+
+        request_headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        headers = [
+            (b"etag", media.etag.encode()),
+            (b"last-modified", media.last_modified.encode()),
+            (b"cache-control", IMMUTABLE.encode()),
+            (b"accept-ranges", b"bytes"),
+        ]
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, media.etag):
+            await self._empty(send, 304, headers)
+            return
+
+        status_code, start, end = 200, 0, media.size - 1
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() == media.etag):
+            byte_range = _byte_range(range_header, media.size)
+            if byte_range is False:
+                await self._empty(send, 416, headers + [(b"content-range", f"bytes */{media.size}".encode())])
+                return
+            if byte_range is not None:
+                status_code, (start, end) = 206, byte_range
+                headers.append((b"content-range", f"bytes {start}-{end}/{media.size}".encode()))
+        length = end - start + 1
+        headers += [(b"content-type", media.content_type.encode()), (b"content-length", str(length).encode())]
+
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        if scope["method"] == "HEAD" or length <= 0:
+            await send({"type": "http.response.body", "body": b""})
+        elif media.body is not None:
+            await send({"type": "http.response.body", "body": media.body[start:end + 1]})
+        elif status_code == 200 and "http.response.pathsend" in scope.get("extensions", {}):
+            await send({"type": "http.response.pathsend", "path": media.path})
+        else:
+            await self._stream(send, media.path, start, length)
+
+    async def _stream(self, send, path: str, start: int, length: int):
+        fd = await _run(os.open, path, os.O_RDONLY)
+        try:
+            while length > 0:
+                chunk = await _run(_read_range, fd, start, min(STREAM_CHUNK, length))
+                if not chunk:
+                    break  # truncated under us; the client sees a short body
+                start += len(chunk)
+                length -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": length > 0})
+            if length > 0:
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            await _run(os.close, fd)
+
+    @staticmethod
+    async def _empty(send, status_code: int, headers=()):
+        await send({"type": "http.response.start", "status": status_code,
+                    "headers": list(headers) + [(b"content-length", b"0")]})
+        await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,164 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Collected by the request middleware in main.py and served at /metrics, so
+a local `curl localhost:8000/metrics` (or any Prometheus scraper) works
+without extra services.
+
+Every update happens on the worker's event-loop thread (the middleware,
+the upload handlers and the async engine's pool all run there), so the
+counters are plain dict/int updates with no locking. Each worker process
+keeps its own numbers; scrape every worker or aggregate downstream.
+"""
+import time
+from bisect import bisect_left
+from cache import cache_stats
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """Monotonic counter, one series per label combination"""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        _registry.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        for label_values, value in self.values.items():
+            yield f"{self.name}{_labels(self.labels, label_values)} {value}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    """Bucketed distribution of observed values (cumulative on render)"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # label values -> [bucket counts..., sum, count]
+        _registry.append(self)
+
+    def observe(self, value: float, *label_values):
+        series = self.values.get(label_values)
+        if series is None:
+            series = self.values[label_values] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        names = self.labels + ("le",)
+        for label_values, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(names, label_values + (bound,))} {cumulative}"
+            yield f"{self.name}_bucket{_labels(names, label_values + ('+Inf',))} {series[-1]}"
+            yield f"{self.name}_sum{_labels(self.labels, label_values)} {series[-2]}"
+            yield f"{self.name}_count{_labels(self.labels, label_values)} {series[-1]}"
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+DB_STATEMENTS = Counter("http_request_db_statements_total", "SQL statements executed by requests",
+                        ("method", "route"))
+POOL_CHECKOUT_SECONDS = Histogram("db_pool_checkout_seconds",
+                                  "Time to get a database connection from the pool (waiting or connecting)",
+                                  buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+UPLOAD_BYTES = Counter("upload_bytes_total", "Bytes received by the upload endpoints", ("kind",))
+NOTIFICATION_STREAMS = Gauge("notification_streams_open", "Open GET /notifications/stream connections")
+
+
+def route_label(scope) -> str:
+    """Route template for a handled request, so /users/{user_id} is one series"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        return scope.get("root_path") or "/"  # mounted app, e.g. /uploads static files
+    return "unmatched"
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, statements: int):
+    REQUESTS.inc(method, route, status)
+    REQUEST_SECONDS.observe(seconds, method, route)
+    DB_STATEMENTS.inc(method, route, amount=statements)
+
+
+def instrument_pool(engine):
+    """Time every connection checkout from this engine's pool"""
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+    # Engine.raw_connection() calls self.pool.connect(), so an instance
+    # attribute is enough; no pool subclass needed
+    pool.connect = timed_connect
+
+
+def _cache_lines():
+    stats = cache_stats()
+    for name, help, field in (
+        ("cache_hits_total", "Cache lookups that hit", "hits"),
+        ("cache_misses_total", "Cache lookups that missed or expired", "misses"),
+        ("cache_entries", "Entries currently cached", "size"),
+        ("cache_weight", "Total cost of cached entries (entries, or bytes for size-bounded caches)", "weight"),
+        ("cache_hit_ratio", "Hits / lookups since start", "hit_ratio"),
+    ):
+        kind = "counter" if name.endswith("_total") else "gauge"
+        yield f"# HELP {name} {help}"
+        yield f"# TYPE {name} {kind}"
+        for cache, values in stats.items():
+            yield f'{name}{{cache="{cache}"}} {values[field]}'
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    lines.extend(_cache_lines())
+    return "\n".join(lines) + "\n"
@@ -4,10 +4,16 @@ from .user import User
 from .course import Course
 from .enrollment import Enrollment
 from .payment import Payment
-from .quiz import Quiz, QuizQuestion, QuizOption, QuizSubmission, QuizAnswer
+from .quiz import Quiz, QuizQuestion, QuizOption, QuizSubmission, QuizAnswer, QuizSnapshot
 from .attendance import Attendance
+from .revenue import RevenueDaily
+from .balance import EnrollmentBalance
+from .notification import NotificationEvent, NotificationCursor
+from .resource_version import ResourceVersion
 
 __all__ = [
     "User", "Course", "Enrollment", "Payment", "Attendance",
-    "Quiz", "QuizQuestion", "QuizOption", "QuizSubmission", "QuizAnswer"
+    "RevenueDaily", "EnrollmentBalance", "NotificationEvent", "NotificationCursor",
+    "ResourceVersion",
+    "Quiz", "QuizQuestion", "QuizOption", "QuizSubmission", "QuizAnswer", "QuizSnapshot"
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, String, Date, ForeignKey, Enum as SQLEnum, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import date
 import uuid
@@ -14,6 +14,11 @@ class AttendanceStatus(str, enum.Enum):
 class Attendance(Base):
     """Attendance model for tracking student presence"""
     __tablename__ = "attendance"
+    __table_args__ = (
+        # One record per student per course per day (take_attendance upserts on it)
+        Index("uq_attendance_course_student_date", "course_id", "student_id", "date", unique=True),
+        Index("ix_attendance_student_date", "student_id", "date"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     course_id = Column(String(36), ForeignKey("courses.id"), nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, Numeric
+from datetime import datetime
+from database import Base
+
+
+class EnrollmentBalance(Base):
+    """Running total of PAID payments for one enrollment
+
+    Updated in the same transaction as every payment write (see billing.py).
+    `version` is an optimistic lock: a concurrent writer that read an older
+    version fails its UPDATE instead of overwriting the total.
+    """
+    __tablename__ = "enrollment_balances"
+    
+    enrollment_id = Column(String(36), ForeignKey("enrollments.id"), primary_key=True)
+    total_paid = Column(Numeric(12, 2), default=0, nullable=False)
+    version = Column(Integer, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    __mapper_args__ = {"version_id_col": version}
+    
+    def __repr__(self):
+        return f"<EnrollmentBalance(enrollment_id={self.enrollment_id}, total_paid={self.total_paid}, version={self.version})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, Date, Boolean, ForeignKey, Numeric
+from sqlalchemy import Column, String, Text, Integer, Date, Boolean, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -8,6 +8,10 @@ from database import Base
 class Course(Base):
     """Course model"""
     __tablename__ = "courses"
+    __table_args__ = (
+        Index("ix_courses_teacher_active", "teacher_id", "is_active"),
+        Index("ix_courses_name_id", "name", "id"),  # list keyset order
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(255), nullable=False)
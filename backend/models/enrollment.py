@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Enum as SQLEnum, Numeric
+from sqlalchemy import Column, String, ForeignKey, DateTime, Enum as SQLEnum, Numeric, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -16,6 +16,13 @@ class EnrollmentStatus(str, enum.Enum):
 class Enrollment(Base):
     """Enrollment model linking students to courses"""
     __tablename__ = "enrollments"
+    __table_args__ = (
+        # One enrollment per student per course; also serves student_id lookups
+        Index("uq_enrollments_student_course", "student_id", "course_id", unique=True),
+        Index("ix_enrollments_course_status", "course_id", "status"),
+        # List keyset order; also serves the newest-first dashboard list
+        Index("ix_enrollments_date_id", "enrollment_date", "id"),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     student_id = Column(String(36), ForeignKey("users.id"), nullable=False)
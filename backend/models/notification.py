@@ -0,0 +1,37 @@
+from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, Text, Index
+from datetime import datetime
+from database import Base
+
+
+class NotificationEvent(Base):
+    """One entry in a user's notification feed
+
+    Written by the payment, attendance, enrollment and quiz-publish code
+    paths in the same transaction as the change it reports (see
+    notification_events.py); the feed reads the newest rows per recipient.
+    """
+    __tablename__ = "notification_events"
+    __table_args__ = (
+        Index("ix_notification_events_recipient_created", "recipient_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    recipient_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    type = Column(String(20), nullable=False)  # payment, attendance, enrollment, quiz
+    title = Column(String(200), nullable=False)
+    message = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<NotificationEvent(id={self.id}, recipient_id={self.recipient_id}, type={self.type})>"
+
+
+class NotificationCursor(Base):
+    """How far a user has read their feed: events created after last_read_at are unread"""
+    __tablename__ = "notification_cursors"
+
+    user_id = Column(String(36), ForeignKey("users.id"), primary_key=True)
+    last_read_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<NotificationCursor(user_id={self.user_id}, last_read_at={self.last_read_at})>"
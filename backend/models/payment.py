@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Enum as SQLEnum, Numeric, Text
+from sqlalchemy import Column, String, ForeignKey, DateTime, Enum as SQLEnum, Numeric, Text, Integer, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -16,6 +16,13 @@ class PaymentStatus(str, enum.Enum):
 class Payment(Base):
     """Payment model for tracking student course payments"""
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_enrollment_status", "enrollment_id", "payment_status"),
+        Index("ix_payments_status", "payment_status"),
+        Index("ix_payments_created_at_id", "created_at", "id"),  # list keyset order
+        # One generated charge per enrollment month; manual payments leave it NULL
+        Index("uq_payments_enrollment_billing_month", "enrollment_id", "billing_month", unique=True),
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     enrollment_id = Column(String(36), ForeignKey("enrollments.id"), nullable=False)
@@ -23,6 +30,7 @@ class Payment(Base):
     payment_status = Column(SQLEnum(PaymentStatus), default=PaymentStatus.PENDING, nullable=False)
     payment_date = Column(DateTime, nullable=True)
     notes = Column(Text, nullable=True)
+    billing_month = Column(Integer, nullable=True)  # Enrollment month billed by the billing run (1 = first month)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
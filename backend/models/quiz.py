@@ -1,6 +1,6 @@
 from sqlalchemy import (
     Column, String, Text, DateTime, ForeignKey, Integer, Boolean, Float,
-    Enum as SQLEnum
+    LargeBinary, Enum as SQLEnum, Index
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -42,10 +42,13 @@ class SubmissionStatus(str, enum.Enum):
 class Quiz(Base):
     """Quiz created by a teacher for a course"""
     __tablename__ = "quizzes"
+    __table_args__ = (
+        Index("ix_quizzes_course_status", "course_id", "status"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     course_id = Column(String(36), ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
-    created_by = Column(String(36), ForeignKey("users.id"), nullable=False)
+    created_by = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
 
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
@@ -85,7 +88,7 @@ class QuizQuestion(Base):
     __tablename__ = "quiz_questions"
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    quiz_id = Column(String(36), ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False)
+    quiz_id = Column(String(36), ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
 
     order_index = Column(Integer, nullable=False, default=0)
     question_type = Column(SQLEnum(QuestionType), nullable=False, default=QuestionType.MCQ)
@@ -116,7 +119,7 @@ class QuizOption(Base):
     __tablename__ = "quiz_options"
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    question_id = Column(String(36), ForeignKey("quiz_questions.id", ondelete="CASCADE"), nullable=False)
+    question_id = Column(String(36), ForeignKey("quiz_questions.id", ondelete="CASCADE"), nullable=False, index=True)
 
     order_index = Column(Integer, nullable=False, default=0)
     option_text = Column(String(500), nullable=True)
@@ -137,6 +140,11 @@ class QuizOption(Base):
 class QuizSubmission(Base):
     """Records a single student attempt at a quiz"""
     __tablename__ = "quiz_submissions"
+    __table_args__ = (
+        Index("ix_quiz_submissions_quiz_student_status", "quiz_id", "student_id", "status"),
+        # Expiry sweep: IN_PROGRESS attempts in deadline order (see quiz_expiry.py)
+        Index("ix_quiz_submissions_status_deadline", "status", "deadline_at"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     quiz_id = Column(String(36), ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False)
@@ -146,6 +154,7 @@ class QuizSubmission(Base):
     status = Column(SQLEnum(SubmissionStatus), nullable=False, default=SubmissionStatus.IN_PROGRESS)
 
     started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    deadline_at = Column(DateTime, nullable=True)  # started_at + time limit; None = untimed
     submitted_at = Column(DateTime, nullable=True)
 
     score = Column(Float, nullable=True)          # null until submitted
@@ -167,9 +176,13 @@ class QuizSubmission(Base):
 class QuizAnswer(Base):
     """Student's answer to a single question"""
     __tablename__ = "quiz_answers"
+    __table_args__ = (
+        # One row per question per attempt: autosave upserts on it
+        Index("uq_quiz_answers_submission_question", "submission_id", "question_id", unique=True),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    submission_id = Column(String(36), ForeignKey("quiz_submissions.id", ondelete="CASCADE"), nullable=False)
+    submission_id = Column(String(36), ForeignKey("quiz_submissions.id", ondelete="CASCADE"), nullable=False, index=True)
     question_id = Column(String(36), ForeignKey("quiz_questions.id", ondelete="CASCADE"), nullable=False)
 
     selected_option_id = Column(String(36), ForeignKey("quiz_options.id"), nullable=True)
@@ -185,3 +198,25 @@ class QuizAnswer(Base):
 
     def __repr__(self):
         return f"<QuizAnswer(id={self.id}, correct={self.is_correct})>"
+
+
+# ---------------------------------------------------------------------------
+# QuizSnapshot (compiled student view of a published quiz)
+# ---------------------------------------------------------------------------
+
+class QuizSnapshot(Base):
+    """Answer-stripped QuizResponse JSON of a published quiz (see quiz_snapshots.py)
+
+    `version` only ever grows: every compile and every invalidation bumps it,
+    so a worker holding an older copy in memory can tell it is stale.
+    `payload` is NULL after an invalidation until the next compile.
+    """
+    __tablename__ = "quiz_snapshots"
+
+    quiz_id = Column(String(36), ForeignKey("quizzes.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    payload = Column(LargeBinary, nullable=True)
+    compiled_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<QuizSnapshot(quiz_id={self.quiz_id}, version={self.version})>"
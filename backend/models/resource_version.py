@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Integer
+from database import Base
+
+
+class ResourceVersion(Base):
+    """Change counter for one scope of cached API responses
+
+    A scope is a table ("courses") or one owner's rows of a table
+    ("submissions:<student id>"). Writers bump it in the same transaction
+    as the change; list endpoints derive their ETags from it (see etags.py).
+    """
+    __tablename__ = "resource_versions"
+
+    scope = Column(String(80), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+
+    def __repr__(self):
+        return f"<ResourceVersion(scope={self.scope}, version={self.version})>"
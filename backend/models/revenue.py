@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Date, Integer, Numeric
+from database import Base
+
+
+class RevenueDaily(Base):
+    """Daily rollup of PAID payments, keyed by the payment's effective date
+
+    The effective date is COALESCE(payment_date, created_at). Rows are kept
+    up to date by the payment routers (see revenue.py) and can be rebuilt
+    from the payments table with scripts/rebuild_revenue_daily.py.
+    """
+    __tablename__ = "revenue_daily"
+    
+    day = Column(Date, primary_key=True)
+    amount = Column(Numeric(14, 2), default=0, nullable=False)
+    payment_count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<RevenueDaily(day={self.day}, amount={self.amount}, count={self.payment_count})>"
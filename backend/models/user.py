@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, String, DateTime, Boolean, Enum as SQLEnum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -16,6 +16,10 @@ class UserRole(str, enum.Enum):
 class User(Base):
     """User model for authentication and authorization"""
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_role_active", "role", "is_active"),
+        Index("ix_users_created_at_id", "created_at", "id"),  # list keyset order
+    )
     
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String(255), unique=True, nullable=False, index=True)
@@ -24,6 +28,7 @@ class User(Base):
     full_name = Column(String(255), nullable=False)
     phone_number = Column(String(50), nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
+    tokens_valid_after = Column(DateTime, nullable=True)  # tokens issued earlier are revoked
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
@@ -0,0 +1,98 @@
+"""
+Notification feed events (models.notification.NotificationEvent).
+
+The payment, attendance, enrollment and quiz-publish code paths add an
+event for every user a change concerns, in the same transaction as the
+change, with the message already rendered. Reading a feed is then one
+range scan over the (recipient_id, created_at) index for the newest rows,
+whatever the size of the user's history or of the tables the events
+describe. Once committed, writers hand the inserted events to
+notification_hub.publish so their recipients' open streams push them at once.
+"""
+from datetime import datetime
+from sqlalchemy import insert, literal, select
+from models.enrollment import Enrollment, EnrollmentStatus
+from models.notification import NotificationEvent
+from models.payment import PaymentStatus
+from notification_hub import Notification
+
+_ATTENDANCE_EMOJI = {"PRESENT": "✅", "ABSENT": "❌", "LATE": "⚠️", "EXCUSED": "📋"}
+_QUIZ_TITLE = "New Quiz Available 🎯"
+
+
+def event(recipient_id: str, type_: str, title: str, message: str, now: datetime = None) -> dict:
+    """A notification_events row"""
+    return {
+        "recipient_id": recipient_id,
+        "type": type_,
+        "title": title,
+        "message": message,
+        "created_at": now or datetime.utcnow(),
+    }
+
+
+async def notify(db, events) -> list:
+    """Add events to their recipients' feeds (caller commits)
+
+    Returns them as notification_hub.Notification, to publish once the
+    transaction has committed.
+    """
+    if not events:
+        return []
+    table = NotificationEvent.__table__
+    ids = (await db.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), events)).scalars()
+    return [Notification(id_, **e) for id_, e in zip(ids, events)]
+
+
+def payment_event(student_id: str, course_name: str, amount, payment_status, now: datetime = None) -> dict:
+    label = "confirmed" if payment_status == PaymentStatus.PAID else "pending"
+    return event(student_id, "payment", "Payment Update",
+                 f"Payment of ${float(amount):.2f} for {course_name or 'a course'} is {label}.", now)
+
+
+def attendance_event(student_id: str, course_name: str, day, attendance_status, now: datetime = None) -> dict:
+    raw = attendance_status.value if hasattr(attendance_status, "value") else str(attendance_status)
+    return event(student_id, "attendance", "Attendance Recorded",
+                 f"{course_name or 'a course'} on {day.strftime('%b %d')}: {raw.capitalize()} {_ATTENDANCE_EMOJI.get(raw, '')}",
+                 now)
+
+
+def enrollment_events(student_id: str, student_name: str, teacher_id, course_name: str,
+                      now: datetime = None) -> list:
+    """The student's confirmation and, if the course has a teacher, the teacher's notice"""
+    events = [event(student_id, "enrollment", "Enrollment Confirmed",
+                    f"You have been enrolled in {course_name or 'a course'}.", now)]
+    if teacher_id:
+        events.append(event(teacher_id, "enrollment", "New Student Enrolled",
+                            f"{student_name or 'A student'} enrolled in {course_name or 'your course'}.", now))
+    return events
+
+
+def quiz_published_message(title: str, quiz_type, course_name: str) -> str:
+    raw = quiz_type.value if hasattr(quiz_type, "value") else str(quiz_type)
+    return f"\"{title}\" ({raw.capitalize()}) is now available in {course_name or 'your course'}."
+
+
+async def notify_quiz_published(db, course_id: str, title: str, quiz_type, course_name: str,
+                                now: datetime = None) -> list:
+    """Tell every active student of the course about a published quiz, in one INSERT ... SELECT
+
+    Returns the inserted events, like notify().
+    """
+    now = now or datetime.utcnow()
+    message = quiz_published_message(title, quiz_type, course_name)
+    students = select(
+        Enrollment.student_id,
+        literal("quiz"),
+        literal(_QUIZ_TITLE),
+        literal(message),
+        literal(now),
+    ).where(
+        Enrollment.course_id == course_id,
+        Enrollment.status == EnrollmentStatus.ACTIVE
+    )
+    table = NotificationEvent.__table__
+    rows = await db.execute(insert(table).from_select(
+        [table.c.recipient_id, table.c.type, table.c.title, table.c.message, table.c.created_at], students
+    ).returning(table.c.id, table.c.recipient_id))
+    return [Notification(id_, recipient_id, "quiz", _QUIZ_TITLE, message, now) for id_, recipient_id in rows]
@@ -0,0 +1,143 @@
+"""
+In-process fan-out for the notification stream (GET /notifications/stream).
+
+Every open stream registers a Subscription under its user. Publishing
+appends the new events to the recipients' subscriptions and wakes their
+streams, which write them out without touching the database; an idle
+stream holds no database connection and costs this hub one Subscription.
+
+Writers publish what they inserted right after committing (see
+notification_events.notify). Events written by other workers or by scripts
+(the monthly billing run) are picked up by a poller that reads the
+notification_events rows past the highest id it has seen, every
+NOTIFICATION_HUB_POLL_SECONDS: one primary-key range scan per worker,
+whatever the number of open streams. A stream may therefore see an event
+twice (published here and polled); it skips ids it has already sent.
+
+On PostgreSQL ids are drawn before commit, so a transaction can commit a
+lower id after the poller has moved past it. Ids missing below the highest
+one seen are kept as gaps and looked up again on every poll, for
+NOTIFICATION_HUB_GAP_SECONDS; a gap that never fills was rolled back.
+"""
+import asyncio
+import logging
+import time
+from collections import namedtuple
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from config import settings
+from database import AsyncSessionLocal
+from models.notification import NotificationEvent
+
+logger = logging.getLogger("uvicorn.error")
+
+# A committed notification_events row
+Notification = namedtuple("Notification", "id recipient_id type title message created_at")
+
+# user id -> set of Subscription, one per open stream
+_subscribers = {}
+_last_seen_id = None  # highest notification_events id the poller has handled
+_gaps = {}  # ids below it not seen yet -> time.monotonic() when noticed
+_MAX_GAPS = 1000
+_poller = None
+
+
+class Subscription:
+    __slots__ = ("wake", "pending", "overflowed")
+
+    def __init__(self):
+        self.wake = asyncio.Event()
+        self.pending = []        # Notifications not yet written to the stream
+        self.overflowed = False  # the stream fell too far behind; it should end and be resumed
+
+    def take(self) -> list:
+        pending, self.pending = self.pending, []
+        self.wake.clear()
+        return pending
+
+
+def subscribe(user_id: str) -> Subscription:
+    subscription = Subscription()
+    _subscribers.setdefault(user_id, set()).add(subscription)
+    return subscription
+
+
+def unsubscribe(user_id: str, subscription: Subscription):
+    subscriptions = _subscribers.get(user_id)
+    if subscriptions is not None:
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del _subscribers[user_id]
+
+
+def publish(notifications):
+    """Hand committed notifications to their recipients' open streams"""
+    for notification in notifications:
+        for subscription in _subscribers.get(notification.recipient_id, ()):
+            if len(subscription.pending) >= settings.NOTIFICATION_FEED_LIMIT:
+                subscription.overflowed = True
+            else:
+                subscription.pending.append(notification)
+            subscription.wake.set()
+
+
+def _track_gaps(rows, now: float):
+    """Forget the gaps `rows` fill or that expired, and record the ones they open"""
+    for gap in [gap for gap, noticed in _gaps.items() if now - noticed > settings.NOTIFICATION_HUB_GAP_SECONDS]:
+        del _gaps[gap]
+    expected = _last_seen_id + 1
+    for row in rows:
+        if row.id < expected:
+            _gaps.pop(row.id, None)
+        else:
+            _gaps.update(dict.fromkeys(range(max(expected, row.id - _MAX_GAPS), row.id), now))
+            expected = row.id + 1
+    for gap in sorted(_gaps)[:len(_gaps) - _MAX_GAPS]:
+        del _gaps[gap]
+
+
+async def poll_new_events():
+    """Publish the events other processes committed since the last poll"""
+    global _last_seen_id
+    async with AsyncSessionLocal() as db:
+        if _last_seen_id is None:
+            _last_seen_id = await db.scalar(select(func.coalesce(func.max(NotificationEvent.id), 0)))
+            return
+        condition = NotificationEvent.id > _last_seen_id
+        if _gaps:
+            condition = or_(condition, NotificationEvent.id.in_(list(_gaps)))
+        rows = (await db.execute(select(*(getattr(NotificationEvent, field) for field in Notification._fields)).where(
+            condition
+        ).order_by(NotificationEvent.id))).all()
+    _track_gaps(rows, time.monotonic())
+    if rows:
+        _last_seen_id = max(_last_seen_id, rows[-1].id)
+        if _subscribers:
+            publish(Notification(*row) for row in rows)
+
+
+async def _run_poller():
+    while True:
+        try:
+            await poll_new_events()
+        except SQLAlchemyError:
+            logger.exception("Notification poll failed; will retry")
+        await asyncio.sleep(settings.NOTIFICATION_HUB_POLL_SECONDS)
+
+
+def start():
+    """Start this worker's poller for events written elsewhere"""
+    global _poller
+    if _poller is None:
+        _poller = asyncio.create_task(_run_poller())
+
+
+async def stop():
+    global _poller
+    if _poller is not None:
+        _poller.cancel()
+        try:
+            await _poller
+        except asyncio.CancelledError:
+            pass
+        _poller = None
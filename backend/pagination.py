@@ -0,0 +1,78 @@
+"""
+Keyset (cursor) pagination for the admin list endpoints.
+
+List endpoints keep returning a plain JSON array so existing clients are
+unaffected. Paging metadata travels in response headers:
+
+- X-Next-Cursor: opaque token for the next page (absent on the last page);
+  pass it back as `?cursor=...` to continue after the last row returned.
+- X-Total-Count: number of matching rows, only when `with_total=true`
+  (it costs a COUNT over the filtered rows).
+
+A cursor encodes the sort key of the last row, so the next page is an
+index range scan whatever its depth, unlike OFFSET which reads and
+discards every skipped row. `skip` still works when no cursor is given.
+"""
+import base64
+import json
+from datetime import date, datetime
+from fastapi import HTTPException, Response, status
+from sqlalchemy import func, select, tuple_
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _decode(column, value):
+    python_type = column.type.python_type
+    if value is not None and python_type in (date, datetime):
+        return python_type.fromisoformat(value)
+    return value
+
+
+class Keyset:
+    """A stable sort order for cursor pagination
+
+    `columns` must end with a unique column (the primary key) so every row
+    has a distinct position; back it with an index on the same columns.
+    """
+
+    def __init__(self, *columns):
+        self.columns = columns
+
+    def encode(self, row) -> str:
+        values = [_encode(getattr(row, column.key)) for column in self.columns]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> list:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError(cursor)
+            return [_decode(column, value) for column, value in zip(self.columns, values)]
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    def after(self, query, cursor: str):
+        return query.where(tuple_(*self.columns) > tuple_(*self.decode(cursor)))
+
+
+async def paginate(db, query, keyset: Keyset, response: Response,
+                   cursor: str = None, skip: int = 0, limit: int = 100, with_total: bool = False) -> list:
+    """Run `query` for one page in keyset order and set the paging headers"""
+    if with_total:
+        total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+        response.headers["X-Total-Count"] = str(total)
+    
+    query = query.order_by(*keyset.columns)
+    query = keyset.after(query, cursor) if cursor else query.offset(skip)
+    # One extra row tells us whether there is a next page
+    rows = (await db.scalars(query.limit(limit + 1))).all()
+    
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if rows:
+            response.headers["X-Next-Cursor"] = keyset.encode(rows[-1])
+    return rows
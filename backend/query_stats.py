@@ -0,0 +1,94 @@
+"""
+Per-request SQL statement accounting, built on SQLAlchemy engine events.
+
+Every statement executed while a QueryStats is active (see capture_queries)
+is counted and timed, and grouped by its SQL text. Parameters are bound
+separately, so the same text executed many times in one request is the
+signature of an N+1 lookup.
+
+main.py wraps each request in capture_queries() and reports the totals in
+the X-DB-Queries and Server-Timing headers. Scripts and tests can use the
+same context manager to assert a query budget:
+
+    with capture_queries() as stats:
+        client.get("/teacher/students", headers=auth)
+    assert stats.count <= 2
+"""
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from config import settings
+
+
+class NPlusOneError(RuntimeError):
+    """A request executed the same statement more than N_PLUS_ONE_THRESHOLD times"""
+
+
+class QueryStats:
+    """Statement count, total DB time and per-shape counts for one unit of work"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0  # seconds
+        self.shapes = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold: int) -> dict:
+        """Statement shapes executed more than `threshold` times"""
+        return {shape: n for shape, n in self.shapes.items() if n > threshold}
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+
+# The async engine runs its events in the greenlet of the awaiting task, so
+# the request's context (and this variable) is visible from the listeners
+_current = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def capture_queries():
+    """Count the statements executed inside the block (nested blocks count separately)"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.record(statement, time.perf_counter() - started)
+    if settings.N_PLUS_ONE_MODE == "raise" and stats.shapes[statement] > settings.N_PLUS_ONE_THRESHOLD:
+        raise NPlusOneError(
+            f"Statement executed {stats.shapes[statement]} times in one request "
+            f"(N_PLUS_ONE_THRESHOLD={settings.N_PLUS_ONE_THRESHOLD}): {statement}"
+        )
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument(engine):
+    """Attach the statement counters to a (sync) Engine"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,205 @@
+"""
+Server-side quiz time limits.
+
+start_quiz stamps every timed attempt with deadline_at (started_at plus the
+quiz's time limit). Submit and autosave refuse an attempt more than
+QUIZ_SUBMIT_GRACE_SECONDS past it, and a background sweeper submits and
+grades expired attempts with whatever answers were saved.
+
+The sweeper reads expired attempts through the (status, deadline_at) index,
+oldest first and QUIZ_SWEEP_BATCH_SIZE at a time, so a sweep costs in
+proportion to the attempts that expired, not to the size of the table.
+Between sweeps it sleeps until the earliest deadline this worker handed out
+(a heap fed by start_quiz) or QUIZ_SWEEP_INTERVAL_SECONDS, whichever comes
+first; the interval picks up attempts started by other workers.
+"""
+import asyncio
+import heapq
+import logging
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from config import settings
+from database import AsyncSessionLocal
+from models.quiz import QuizAnswer, QuizSnapshot, QuizSubmission, SubmissionStatus
+from schemas.models import AnswerSubmit
+from answer_keys import get_answer_key, grade, answer_rows
+from etags import bump, submissions
+from autosave import pending_answers, take_pending
+
+logger = logging.getLogger("uvicorn.error")
+
+# An attempt to finalize; `version` is its quiz's snapshot version (may be None)
+Attempt = namedtuple("Attempt", "id quiz_id version student_id")
+
+_deadlines = []  # heap of deadlines handed out by this worker
+_wake = None     # asyncio.Event, created by start() on the serving loop
+_sweeper = None
+
+
+def attempt_deadline(started_at: datetime, time_limit_minutes):
+    """When an attempt started at `started_at` runs out of time (None = untimed)"""
+    if not time_limit_minutes:
+        return None
+    return started_at + timedelta(minutes=time_limit_minutes)
+
+
+def _grace() -> timedelta:
+    return timedelta(seconds=settings.QUIZ_SUBMIT_GRACE_SECONDS)
+
+
+def is_expired(deadline_at, now: datetime = None) -> bool:
+    """True once an attempt is past its deadline and the grace period"""
+    return deadline_at is not None and (now or datetime.utcnow()) > deadline_at + _grace()
+
+
+def seconds_remaining(deadline_at, now: datetime = None):
+    if deadline_at is None:
+        return None
+    return max(0, int((deadline_at - (now or datetime.utcnow())).total_seconds()))
+
+
+def schedule(deadline_at):
+    """Tell this worker's sweeper about a new deadline"""
+    if deadline_at is None:
+        return
+    heapq.heappush(_deadlines, deadline_at)
+    if _wake is not None and _deadlines[0] == deadline_at:
+        _wake.set()
+
+
+def _expired_query(cutoff: datetime, limit: int):
+    return select(
+        QuizSubmission.id, QuizSubmission.quiz_id, QuizSnapshot.version, QuizSubmission.student_id
+    ).outerjoin(
+        QuizSnapshot, QuizSnapshot.quiz_id == QuizSubmission.quiz_id
+    ).where(
+        QuizSubmission.status == SubmissionStatus.IN_PROGRESS,
+        QuizSubmission.deadline_at <= cutoff
+    ).order_by(
+        QuizSubmission.deadline_at
+    ).limit(limit).with_for_update(of=QuizSubmission, skip_locked=True)
+
+
+async def claim_attempts(db, ids, now: datetime) -> set:
+    """Mark the attempts of `ids` still in progress as submitted; returns the ids this call claimed
+
+    Run it before touching an attempt's answers: of two concurrent
+    submitters only one claims the attempt, and the other must leave it alone.
+    """
+    table = QuizSubmission.__table__
+    return set((await db.scalars(update(table).where(
+        table.c.id.in_(ids),
+        table.c.status == SubmissionStatus.IN_PROGRESS
+    ).values(
+        status=SubmissionStatus.SUBMITTED,
+        submitted_at=now,
+    ).returning(table.c.id))).all())
+
+
+async def finalize_attempts(db, attempts, now: datetime = None):
+    """Submit and grade attempts with their saved answers (caller commits)
+
+    `attempts` are rows of (id, quiz_id, version, student_id), version
+    being the quiz snapshot version. Attempts already submitted by someone
+    else are skipped. Returns the ids finalized here, whose buffered answers
+    were used, to drop from the autosave buffer once committed.
+    """
+    now = now or datetime.utcnow()
+    claimed = await claim_attempts(db, [attempt.id for attempt in attempts], now)
+    attempts = [attempt for attempt in attempts if attempt.id in claimed]
+    if not attempts:
+        return []
+    ids = [attempt.id for attempt in attempts]
+    # Read the buffer first (it includes a batch being flushed): a flush
+    # committing during the query below leaves the buffer
+    buffered = {submission_id: pending_answers(submission_id) for submission_id in ids}
+    saved = {}
+    for submission_id, question_id, option_id, text in (await db.execute(select(
+        QuizAnswer.submission_id, QuizAnswer.question_id, QuizAnswer.selected_option_id, QuizAnswer.short_answer_text
+    ).where(QuizAnswer.submission_id.in_(ids)))).all():
+        saved.setdefault(submission_id, {})[question_id] = (option_id, text)
+
+    rows, results = [], []
+    for attempt in attempts:
+        drafts = saved.get(attempt.id, {})
+        drafts.update(buffered[attempt.id])
+        key = await get_answer_key(db, attempt.quiz_id, attempt.version)
+        score, graded = grade(key, [
+            AnswerSubmit(question_id=question_id, selected_option_id=option_id, short_answer_text=text)
+            for question_id, (option_id, text) in drafts.items()
+        ])
+        rows += answer_rows(attempt.id, graded)
+        results.append({"b_id": attempt.id, "b_score": score, "b_max_score": key.max_score})
+
+    await db.execute(delete(QuizAnswer).where(QuizAnswer.submission_id.in_(ids)))
+    if rows:
+        await db.execute(insert(QuizAnswer.__table__), rows)
+    table = QuizSubmission.__table__
+    await db.execute(update(table).where(table.c.id == bindparam("b_id")).values(
+        score=bindparam("b_score"),
+        max_score=bindparam("b_max_score"),
+    ), results)
+    await db.execute(bump(*(submissions(attempt.student_id) for attempt in attempts)))
+    return ids
+
+
+async def expire_attempts(now: datetime = None, batch_size: int = None) -> int:
+    """Submit and grade every attempt past its deadline and grace; returns how many"""
+    now = now or datetime.utcnow()
+    batch_size = batch_size or settings.QUIZ_SWEEP_BATCH_SIZE
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            attempts = (await db.execute(_expired_query(now - _grace(), batch_size))).all()
+            if not attempts:
+                return total
+            ids = await finalize_attempts(db, attempts, now)
+            await db.commit()
+        for submission_id in ids:
+            take_pending(submission_id)
+        total += len(ids)
+
+
+async def _run_sweeper():
+    while True:
+        timeout = settings.QUIZ_SWEEP_INTERVAL_SECONDS
+        if _deadlines:
+            due = _deadlines[0] + _grace() - datetime.utcnow()
+            timeout = max(0.0, min(timeout, due.total_seconds()))
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+
+        now = datetime.utcnow()
+        while _deadlines and _deadlines[0] + _grace() <= now:
+            heapq.heappop(_deadlines)
+        try:
+            expired = await expire_attempts(now)
+        except SQLAlchemyError:
+            logger.exception("Quiz expiry sweep failed; will retry")
+            continue
+        if expired:
+            logger.info("Auto-submitted %d expired quiz attempt(s)", expired)
+
+
+def start():
+    """Start this worker's expiry sweeper"""
+    global _sweeper, _wake
+    if _sweeper is None:
+        _wake = asyncio.Event()
+        _sweeper = asyncio.create_task(_run_sweeper())
+
+
+async def stop():
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.cancel()
+        try:
+            await _sweeper
+        except asyncio.CancelledError:
+            pass
+        _sweeper = None
@@ -0,0 +1,116 @@
+"""
+Compiled student view of published quizzes (models.quiz.QuizSnapshot).
+
+publish_quiz compiles the answer-stripped QuizResponse JSON once and stores
+it, so the student endpoints serve ready-made bytes instead of loading and
+serializing the question graph on every request. Quiz and question edits
+and unpublish invalidate the snapshot; a published quiz without one is
+recompiled on its next read.
+
+Each worker keeps recently served payloads in an LRU keyed by quiz id. The
+header query every read makes anyway also returns the snapshot version, so
+an invalidation in one worker is seen by all of them on their next request.
+"""
+from datetime import datetime
+from sqlalchemy import and_, delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import selectinload, joinedload
+from cache import TTLCache
+from config import settings
+from database import IS_SQLITE
+from models.quiz import Quiz, QuizQuestion, QuizSnapshot
+from schemas.models import QuizResponse
+
+# quiz id -> (version, payload)
+_snapshot_cache = TTLCache("quiz_snapshot", settings.QUIZ_SNAPSHOT_CACHE_SIZE, settings.QUIZ_SNAPSHOT_CACHE_TTL_SECONDS)
+
+# Eager-load everything student_view touches (no lazy IO on an AsyncSession)
+QUIZ_GRAPH = (
+    selectinload(Quiz.questions).selectinload(QuizQuestion.options),
+    joinedload(Quiz.course),
+)
+
+
+def student_view(quiz: Quiz) -> QuizResponse:
+    """Build a QuizResponse but hide is_correct from options."""
+    resp = QuizResponse.from_orm(quiz)
+    for q in resp.questions:
+        for o in q.options:
+            o.is_correct = None   # don't expose the answer
+    resp.total_points = sum(q.points for q in quiz.questions)
+    resp.course_name = quiz.course.name if quiz.course else None
+    return resp
+
+
+def compile_snapshot(quiz: Quiz) -> bytes:
+    """Serialized student view of a quiz loaded with QUIZ_GRAPH"""
+    return student_view(quiz).model_dump_json().encode()
+
+
+async def store_snapshot(db, quiz: Quiz):
+    """Compile and upsert the snapshot (caller commits); returns (version, payload)"""
+    payload = compile_snapshot(quiz)
+    insert_ = sqlite_insert if IS_SQLITE else pg_insert
+    stmt = insert_(QuizSnapshot).values(quiz_id=quiz.id, version=1, payload=payload, compiled_at=datetime.utcnow())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QuizSnapshot.quiz_id],
+        set_={
+            "version": QuizSnapshot.version + 1,
+            "payload": stmt.excluded.payload,
+            "compiled_at": stmt.excluded.compiled_at,
+        },
+    ).returning(QuizSnapshot.version)
+    return await db.scalar(stmt), payload
+
+
+async def invalidate_snapshot(db, quiz_id: str):
+    """Drop the compiled payload (caller commits); the next read recompiles it"""
+    await db.execute(update(QuizSnapshot).where(QuizSnapshot.quiz_id == quiz_id).values(
+        version=QuizSnapshot.version + 1, payload=None, compiled_at=None
+    ))
+    _snapshot_cache.pop(quiz_id)
+
+
+async def delete_snapshot(db, quiz_id: str):
+    """Remove the snapshot row before its quiz is deleted (caller commits)"""
+    await db.execute(delete(QuizSnapshot).where(QuizSnapshot.quiz_id == quiz_id))
+    _snapshot_cache.pop(quiz_id)
+
+
+async def load_header(db, quiz_id: str):
+    """Quiz fields the student endpoints check, plus the compiled snapshot version
+
+    Returns None if the quiz does not exist; `snapshot_version` is None if
+    there is no compiled payload.
+    """
+    return (await db.execute(select(
+        Quiz.id, Quiz.course_id, Quiz.status, Quiz.open_date, Quiz.close_date, Quiz.max_attempts,
+        Quiz.time_limit_minutes, QuizSnapshot.version.label("snapshot_version"),
+    ).outerjoin(
+        QuizSnapshot, and_(QuizSnapshot.quiz_id == Quiz.id, QuizSnapshot.payload.isnot(None))
+    ).where(Quiz.id == quiz_id))).one_or_none()
+
+
+async def snapshot_payload(db, header) -> bytes:
+    """Compiled JSON for a quiz the caller has already checked is available
+
+    May compile and commit the snapshot if the quiz has none yet.
+    """
+    cached = _snapshot_cache.get(header.id)
+    if cached is not None and cached[0] == header.snapshot_version:
+        return cached[1]
+
+    entry = None
+    if header.snapshot_version is not None:
+        entry = (await db.execute(select(QuizSnapshot.version, QuizSnapshot.payload).where(
+            QuizSnapshot.quiz_id == header.id, QuizSnapshot.payload.isnot(None)
+        ))).one_or_none()
+    if entry is None:
+        quiz = await db.scalar(select(Quiz).options(*QUIZ_GRAPH).where(Quiz.id == header.id))
+        entry = await store_snapshot(db, quiz)
+        await db.commit()
+
+    version, payload = entry
+    _snapshot_cache.set(header.id, (version, payload))
+    return payload
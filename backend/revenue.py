@@ -0,0 +1,73 @@
+"""
+Maintenance of the revenue_daily rollup (models.revenue.RevenueDaily).
+
+Every write path that changes a PAID payment's amount, status or date
+applies the difference to the rollup in the same transaction, so the
+chart endpoint never has to scan the payments table.
+"""
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database import IS_SQLITE
+from models.payment import Payment, PaymentStatus
+from models.revenue import RevenueDaily
+
+
+def payment_contribution(payment: Payment):
+    """(day, amount) this payment adds to the rollup, or None if it is not PAID"""
+    if payment.payment_status != PaymentStatus.PAID:
+        return None
+    effective = payment.payment_date or payment.created_at
+    return effective.date(), Decimal(str(payment.amount))
+
+
+def _upsert(day: date, amount: Decimal, count: int):
+    insert_ = sqlite_insert if IS_SQLITE else pg_insert
+    stmt = insert_(RevenueDaily).values(day=day, amount=amount, payment_count=count)
+    return stmt.on_conflict_do_update(
+        index_elements=[RevenueDaily.day],
+        set_={
+            "amount": RevenueDaily.amount + stmt.excluded.amount,
+            "payment_count": RevenueDaily.payment_count + stmt.excluded.payment_count,
+        },
+    )
+
+
+async def apply_payment_change(db, before, after):
+    """Move a payment's contribution from `before` to `after` (either may be None)"""
+    if before == after:
+        return
+    if before is not None:
+        await db.execute(_upsert(before[0], -before[1], -1))
+    if after is not None:
+        await db.execute(_upsert(after[0], after[1], 1))
+
+
+async def remove_payments(db, *criteria):
+    """Subtract the PAID payments matching `criteria` before they are bulk-deleted"""
+    rows = (await db.execute(select(Payment.payment_date, Payment.created_at, Payment.amount).where(
+        Payment.payment_status == PaymentStatus.PAID, *criteria
+    ))).all()
+    totals = {}
+    for payment_date, created_at, amount in rows:
+        day = (payment_date or created_at).date()
+        total, count = totals.get(day, (Decimal(0), 0))
+        totals[day] = (total + Decimal(str(amount)), count + 1)
+    for day, (total, count) in totals.items():
+        await db.execute(_upsert(day, -total, -count))
+
+
+def rebuild_revenue_daily(conn):
+    """Recompute the whole rollup from payments (sync connection, one transaction)"""
+    # date() truncates a timestamp to its day on both SQLite and PostgreSQL
+    day = func.date(func.coalesce(Payment.payment_date, Payment.created_at))
+    conn.execute(delete(RevenueDaily))
+    conn.execute(insert(RevenueDaily).from_select(
+        ["day", "amount", "payment_count"],
+        select(day, func.sum(Payment.amount), func.count(Payment.id)).where(
+            Payment.payment_status == PaymentStatus.PAID
+        ).group_by(day),
+    ))
+    return conn.scalar(select(func.count()).select_from(RevenueDaily))
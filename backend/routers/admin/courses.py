@@ -1,46 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database import get_db
+from database import get_async_db
 from models.course import Course
 from schemas.models import CourseCreate, CourseUpdate, CourseResponse
 from auth.dependencies import require_admin
+from routers.admin.statistics import invalidate_dashboard
+from pagination import Keyset, paginate
+from etags import COURSES, bump, check_versions
 
 router = APIRouter(prefix="/admin/courses", tags=["Admin - Courses"])
 
+# Stable, indexed order for list pagination
+_LIST_ORDER = Keyset(Course.name, Course.id)
+
 
 @router.post("", response_model=CourseResponse, dependencies=[Depends(require_admin)])
-async def create_course(course_data: CourseCreate, db: Session = Depends(get_db)):
+async def create_course(course_data: CourseCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new course"""
     new_course = Course(**course_data.dict())
     db.add(new_course)
-    db.commit()
-    db.refresh(new_course)
+    await db.execute(bump(COURSES))
+    await db.commit()
+    invalidate_dashboard()
+    await db.refresh(new_course)
     
     return CourseResponse.from_orm(new_course)
 
 
 @router.get("", response_model=List[CourseResponse], dependencies=[Depends(require_admin)])
 async def list_courses(
+    request: Request,
+    response: Response,
     is_active: bool = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all courses with optional filtering"""
-    query = db.query(Course)
+    unchanged = await check_versions(db, request, response, "", COURSES)
+    if unchanged is not None:
+        return unchanged
+    
+    query = select(Course)
     
     if is_active is not None:
-        query = query.filter(Course.is_active == is_active)
+        query = query.where(Course.is_active == is_active)
     
-    courses = query.offset(skip).limit(limit).all()
+    courses = await paginate(db, query, _LIST_ORDER, response, cursor, skip, limit, with_total)
     return [CourseResponse.from_orm(course) for course in courses]
 
 
 @router.get("/{course_id}", response_model=CourseResponse, dependencies=[Depends(require_admin)])
-async def get_course(course_id: str, db: Session = Depends(get_db)):
+async def get_course(course_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get course details by ID"""
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = await db.scalar(select(Course).where(Course.id == course_id))
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -50,9 +67,9 @@ async def get_course(course_id: str, db: Session = Depends(get_db)):
 
 
 @router.put("/{course_id}", response_model=CourseResponse, dependencies=[Depends(require_admin)])
-async def update_course(course_id: str, course_data: CourseUpdate, db: Session = Depends(get_db)):
+async def update_course(course_id: str, course_data: CourseUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update course information"""
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = await db.scalar(select(Course).where(Course.id == course_id))
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -64,23 +81,27 @@ async def update_course(course_id: str, course_data: CourseUpdate, db: Session =
     for field, value in update_data.items():
         setattr(course, field, value)
     
-    db.commit()
-    db.refresh(course)
+    await db.execute(bump(COURSES))
+    await db.commit()
+    invalidate_dashboard()
+    await db.refresh(course)
     
     return CourseResponse.from_orm(course)
 
 
 @router.delete("/{course_id}", dependencies=[Depends(require_admin)])
-async def delete_course(course_id: str, db: Session = Depends(get_db)):
+async def delete_course(course_id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete a course"""
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = await db.scalar(select(Course).where(Course.id == course_id))
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
-    db.delete(course)
-    db.commit()
+    await db.delete(course)
+    await db.execute(bump(COURSES))
+    await db.commit()
+    invalidate_dashboard()
     
     return {"message": "Course deleted successfully"}
@@ -1,22 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import delete, select
+from sqlalchemy.orm import contains_eager, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database import get_db
+from database import get_async_db
 from models.enrollment import Enrollment
+from models.balance import EnrollmentBalance
+from models.user import User
 from schemas.models import EnrollmentCreate, EnrollmentUpdate, EnrollmentResponse
 from auth.dependencies import require_admin
+from routers.admin.statistics import invalidate_dashboard
+from billing import months_enrolled, get_balance
+from notification_events import notify, enrollment_events
+from notification_hub import publish
+from pagination import Keyset, paginate
+from etags import ENROLLMENTS, bump
 
 router = APIRouter(prefix="/admin/enrollments", tags=["Admin - Enrollments"])
 
+# Stable, indexed order for list pagination
+_LIST_ORDER = Keyset(Enrollment.enrollment_date, Enrollment.id)
+
+
+def enrollment_listing_query():
+    """Enrollments with their student and course loaded by the same SELECT"""
+    return select(Enrollment).join(Enrollment.student).join(Enrollment.course).options(
+        contains_eager(Enrollment.student),
+        contains_eager(Enrollment.course)
+    )
+
+
+def enrollment_listing(enrollment: Enrollment) -> dict:
+    """Enrollment with student and course details denormalized for list views"""
+    return {
+        "id": str(enrollment.id),
+        "student_id": enrollment.student_id,
+        "course_id": enrollment.course_id,
+        "enrollment_date": enrollment.enrollment_date.isoformat(),
+        "status": enrollment.status.value,
+        "current_progress": float(enrollment.current_progress),
+        "course_name": enrollment.course.name,
+        "course_price": float(enrollment.course.price) if enrollment.course.price else 0.0,
+        "student_name": enrollment.student.full_name,
+        "student_email": enrollment.student.email,
+    }
+
 
 @router.post("", response_model=EnrollmentResponse, dependencies=[Depends(require_admin)])
-async def create_enrollment(enrollment_data: EnrollmentCreate, db: Session = Depends(get_db)):
+async def create_enrollment(enrollment_data: EnrollmentCreate, db: AsyncSession = Depends(get_async_db)):
     """Enroll a student in a course"""
     # Check if enrollment already exists
-    existing_enrollment = db.query(Enrollment).filter(
+    existing_enrollment = await db.scalar(select(Enrollment).where(
         Enrollment.student_id == enrollment_data.student_id,
         Enrollment.course_id == enrollment_data.course_id
-    ).first()
+    ))
     
     if existing_enrollment:
         raise HTTPException(
@@ -26,7 +63,7 @@ async def create_enrollment(enrollment_data: EnrollmentCreate, db: Session = Dep
 
     # Check if course is active
     from models.course import Course
-    course = db.query(Course).filter(Course.id == enrollment_data.course_id).first()
+    course = await db.scalar(select(Course).where(Course.id == enrollment_data.course_id))
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -41,8 +78,13 @@ async def create_enrollment(enrollment_data: EnrollmentCreate, db: Session = Dep
 
     new_enrollment = Enrollment(**enrollment_data.model_dump())
     db.add(new_enrollment)
-    db.commit()
-    db.refresh(new_enrollment)
+    student_name = await db.scalar(select(User.full_name).where(User.id == enrollment_data.student_id))
+    notifications = await notify(db, enrollment_events(enrollment_data.student_id, student_name, course.teacher_id, course.name))
+    await db.execute(bump(ENROLLMENTS))
+    await db.commit()
+    invalidate_dashboard()
+    publish(notifications)
+    await db.refresh(new_enrollment)
     
     # Convert to dict and serialize datetime
     return {
@@ -57,41 +99,34 @@ async def create_enrollment(enrollment_data: EnrollmentCreate, db: Session = Dep
 
 @router.get("", response_model=List[EnrollmentResponse], dependencies=[Depends(require_admin)])
 async def list_enrollments(
+    response: Response,
     student_id: str = None,
     course_id: str = None,
     status: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all enrollments with optional filtering"""
-    query = db.query(Enrollment)
+    query = enrollment_listing_query()
     
     if student_id:
-        query = query.filter(Enrollment.student_id == student_id)
+        query = query.where(Enrollment.student_id == student_id)
     if course_id:
-        query = query.filter(Enrollment.course_id == course_id)
+        query = query.where(Enrollment.course_id == course_id)
     if status:
-        query = query.filter(Enrollment.status == status)
+        query = query.where(Enrollment.status == status)
     
-    enrollments = query.offset(skip).limit(limit).all()
-    return [
-        {
-            "id": str(e.id),
-            "student_id": e.student_id,
-            "course_id": e.course_id,
-            "enrollment_date": e.enrollment_date.isoformat(),
-            "status": e.status.value,
-            "current_progress": float(e.current_progress)
-        }
-        for e in enrollments
-    ]
+    enrollments = await paginate(db, query, _LIST_ORDER, response, cursor, skip, limit, with_total)
+    return [enrollment_listing(e) for e in enrollments]
 
 
 @router.get("/{enrollment_id}", response_model=EnrollmentResponse, dependencies=[Depends(require_admin)])
-async def get_enrollment(enrollment_id: str, db: Session = Depends(get_db)):
+async def get_enrollment(enrollment_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get enrollment details by ID"""
-    enrollment = db.query(Enrollment).filter(Enrollment.id == enrollment_id).first()
+    enrollment = await db.scalar(select(Enrollment).where(Enrollment.id == enrollment_id))
     if not enrollment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -100,10 +135,38 @@ async def get_enrollment(enrollment_id: str, db: Session = Depends(get_db)):
     return EnrollmentResponse.from_orm(enrollment)
 
 
+@router.get("/{enrollment_id}/balance", dependencies=[Depends(require_admin)])
+async def get_enrollment_balance(enrollment_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get what the student owes for this enrollment, from the materialized balance"""
+    enrollment = await db.scalar(select(Enrollment).options(
+        joinedload(Enrollment.course)
+    ).where(Enrollment.id == enrollment_id))
+    if not enrollment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Enrollment not found"
+        )
+    
+    # Enrollments without a payment yet get a transient row (never committed here)
+    balance = await get_balance(db, enrollment.id)
+    
+    months = months_enrolled(enrollment.enrollment_date)
+    total_expected = months * float(enrollment.course.price)
+    total_paid = float(balance.total_paid)
+    return {
+        "enrollment_id": str(enrollment.id),
+        "months_enrolled": months,
+        "monthly_price": float(enrollment.course.price),
+        "total_expected": total_expected,
+        "total_paid": total_paid,
+        "balance_due": total_expected - total_paid,
+    }
+
+
 @router.put("/{enrollment_id}", response_model=EnrollmentResponse, dependencies=[Depends(require_admin)])
-async def update_enrollment(enrollment_id: str, enrollment_data: EnrollmentUpdate, db: Session = Depends(get_db)):
+async def update_enrollment(enrollment_id: str, enrollment_data: EnrollmentUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update enrollment status or progress"""
-    enrollment = db.query(Enrollment).filter(Enrollment.id == enrollment_id).first()
+    enrollment = await db.scalar(select(Enrollment).where(Enrollment.id == enrollment_id))
     if not enrollment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -115,8 +178,10 @@ async def update_enrollment(enrollment_id: str, enrollment_data: EnrollmentUpdat
     for field, value in update_data.items():
         setattr(enrollment, field, value)
     
-    db.commit()
-    db.refresh(enrollment)
+    await db.execute(bump(ENROLLMENTS))
+    await db.commit()
+    invalidate_dashboard()
+    await db.refresh(enrollment)
     
     return {
         "id": str(enrollment.id),
@@ -129,16 +194,19 @@ async def update_enrollment(enrollment_id: str, enrollment_data: EnrollmentUpdat
 
 
 @router.delete("/{enrollment_id}", dependencies=[Depends(require_admin)])
-async def delete_enrollment(enrollment_id: str, db: Session = Depends(get_db)):
+async def delete_enrollment(enrollment_id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete an enrollment"""
-    enrollment = db.query(Enrollment).filter(Enrollment.id == enrollment_id).first()
+    enrollment = await db.scalar(select(Enrollment).where(Enrollment.id == enrollment_id))
     if not enrollment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Enrollment not found"
         )
     
-    db.delete(enrollment)
-    db.commit()
+    await db.execute(delete(EnrollmentBalance).where(EnrollmentBalance.enrollment_id == enrollment.id))
+    await db.delete(enrollment)
+    await db.execute(bump(ENROLLMENTS))
+    await db.commit()
+    invalidate_dashboard()
     
     return {"message": "Enrollment deleted successfully"}
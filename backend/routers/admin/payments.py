@@ -1,52 +1,66 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import csv
+import io
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database import get_db
-from models.payment import Payment
-from models.enrollment import Enrollment
+from database import get_async_db, AsyncSessionLocal
+from models.payment import Payment, PaymentStatus
+from models.enrollment import Enrollment, EnrollmentStatus
 from models.course import Course
+from models.user import User
+from models.balance import EnrollmentBalance
 from schemas.models import PaymentCreate, PaymentUpdate, PaymentResponse
 from auth.dependencies import require_admin
+from routers.admin.statistics import invalidate_dashboard
+from revenue import payment_contribution, apply_payment_change
+from billing import months_enrolled, months_enrolled_sql, get_balance, paid_amount, add_paid
+from notification_events import notify, payment_event
+from notification_hub import publish
+from pagination import Keyset, paginate
+from etags import PAYMENTS, bump
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import Float, func, select, type_coerce
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 
 router = APIRouter(prefix="/admin/payments", tags=["Admin - Payments"])
 
+# Stable, indexed order for list pagination
+_LIST_ORDER = Keyset(Payment.created_at, Payment.id)
+
+
+async def _commit_payment(db: AsyncSession):
+    """Commit a payment write, turning a lost balance race into a 409"""
+    try:
+        await db.commit()
+    except (StaleDataError, IntegrityError):
+        # Another payment for the same enrollment committed first
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The enrollment balance changed while this payment was processed. Please retry."
+        )
+
 
 @router.post("", response_model=PaymentResponse, dependencies=[Depends(require_admin)])
-async def create_payment(payment_data: PaymentCreate, db: Session = Depends(get_db)):
+async def create_payment(payment_data: PaymentCreate, db: AsyncSession = Depends(get_async_db)):
     """Record a new payment"""
     # 1. Fetch Enrollment and Course
-    enrollment = db.query(Enrollment).filter(Enrollment.id == payment_data.enrollment_id).first()
+    enrollment = await db.scalar(select(Enrollment).where(Enrollment.id == payment_data.enrollment_id))
     if not enrollment:
         raise HTTPException(status_code=404, detail="Enrollment not found")
 
-    course = db.query(Course).filter(Course.id == enrollment.course_id).first()
+    course = await db.scalar(select(Course).where(Course.id == enrollment.course_id))
     if not course:
         raise HTTPException(status_code=404, detail="Course associated with enrollment not found")
 
     # 2. Calculate Total Expected: (Months Enrolled) * Monthly Price
-    enrollment_date = enrollment.enrollment_date
-    now = datetime.utcnow()
-    
-    # Months = calendar month difference, but only count a new month after
-    # the enrollment anniversary day has been reached.
-    # e.g. enrolled Feb 16 → month 2 starts March 16, not March 1.
-    months_enrolled = (now.year - enrollment_date.year) * 12 + (now.month - enrollment_date.month)
-    if now.day < enrollment_date.day:
-        months_enrolled -= 1  # anniversary day not yet reached this month
-    months_enrolled += 1  # enrollment month itself (month 1)
-    if months_enrolled < 1:
-        months_enrolled = 1
-        
-    total_expected = months_enrolled * float(course.price)
-
-    # 3. Calculate Total Paid
-    total_paid_result = db.query(func.sum(Payment.amount)).filter(
-        Payment.enrollment_id == enrollment.id,
-        Payment.payment_status == 'PAID'
-    ).scalar()
-    total_paid = float(total_paid_result) if total_paid_result else 0.0
+    total_expected = months_enrolled(enrollment.enrollment_date) * float(course.price)
+
+    # 3. Total Paid comes from the materialized balance row
+    balance = await get_balance(db, enrollment.id)
+    total_paid = float(balance.total_paid)
 
     # 4. Calculate Balance Due
     current_balance = total_expected - total_paid
@@ -64,36 +78,167 @@ async def create_payment(payment_data: PaymentCreate, db: Session = Depends(get_
         new_payment.payment_date = datetime.utcnow()
     
     db.add(new_payment)
-    db.commit()
-    db.refresh(new_payment)
+    add_paid(balance, paid_amount(new_payment))
+    await apply_payment_change(db, None, payment_contribution(new_payment))
+    notifications = await notify(db, [payment_event(enrollment.student_id, course.name, new_payment.amount, new_payment.payment_status)])
+    await db.execute(bump(PAYMENTS))
+    await _commit_payment(db)
+    invalidate_dashboard()
+    publish(notifications)
+    await db.refresh(new_payment)
     
     return PaymentResponse.from_orm(new_payment)
 
 
 @router.get("", response_model=List[PaymentResponse], dependencies=[Depends(require_admin)])
 async def list_payments(
+    response: Response,
     enrollment_id: str = None,
     payment_status: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all payments with optional filtering"""
-    query = db.query(Payment)
+    query = select(Payment)
     
     if enrollment_id:
-        query = query.filter(Payment.enrollment_id == enrollment_id)
+        query = query.where(Payment.enrollment_id == enrollment_id)
     if payment_status:
-        query = query.filter(Payment.payment_status == payment_status)
+        query = query.where(Payment.payment_status == payment_status)
     
-    payments = query.offset(skip).limit(limit).all()
+    payments = await paginate(db, query, _LIST_ORDER, response, cursor, skip, limit, with_total)
     return [PaymentResponse.from_orm(payment) for payment in payments]
 
 
+_OUTSTANDING_COLUMNS = (
+    "enrollment_id", "student_id", "student_name", "student_email", "course_id", "course_name",
+    "monthly_price", "months_enrolled", "total_expected", "total_paid", "balance_due",
+)
+
+
+def _outstanding_query(sort: str, include_settled: bool):
+    """Expected vs. paid vs. due for every active enrollment, in one statement"""
+    # Correlated fallback for enrollments whose balance row is not materialized
+    # yet; COALESCE only evaluates it when the balance row is missing
+    paid = select(func.sum(Payment.amount)).where(
+        Payment.enrollment_id == Enrollment.id,
+        Payment.payment_status == PaymentStatus.PAID
+    ).scalar_subquery()
+    
+    # Same anniversary-month rule create_payment validates against
+    months = months_enrolled_sql(Enrollment.enrollment_date)
+    expected = months * Course.price
+    total_paid = func.coalesce(EnrollmentBalance.total_paid, paid, 0)
+    due = expected - total_paid
+    
+    query = select(
+        Enrollment.id.label("enrollment_id"),
+        User.id.label("student_id"),
+        User.full_name.label("student_name"),
+        User.email.label("student_email"),
+        Course.id.label("course_id"),
+        Course.name.label("course_name"),
+        # Report values are floats; skip the per-row Decimal conversion
+        type_coerce(Course.price, Float).label("monthly_price"),
+        months.label("months_enrolled"),
+        type_coerce(expected, Float).label("total_expected"),
+        type_coerce(total_paid, Float).label("total_paid"),
+        type_coerce(due, Float).label("balance_due"),
+    ).join(
+        User, User.id == Enrollment.student_id
+    ).join(
+        Course, Course.id == Enrollment.course_id
+    ).outerjoin(
+        EnrollmentBalance, EnrollmentBalance.enrollment_id == Enrollment.id
+    ).where(
+        Enrollment.status == EnrollmentStatus.ACTIVE
+    )
+    if not include_settled:
+        query = query.where(due > 0.005)
+    
+    order = {
+        "due": due.desc(),
+        "student": User.full_name,
+        "course": Course.name,
+        "months": months.desc(),
+    }[sort]
+    return query.order_by(order, Enrollment.id)
+
+
+def _outstanding_row(row) -> dict:
+    return {
+        "enrollment_id": row.enrollment_id,
+        "student_id": row.student_id,
+        "student_name": row.student_name,
+        "student_email": row.student_email,
+        "course_id": row.course_id,
+        "course_name": row.course_name,
+        "monthly_price": float(row.monthly_price),
+        "months_enrolled": row.months_enrolled,
+        "total_expected": round(float(row.total_expected), 2),
+        "total_paid": round(float(row.total_paid), 2),
+        "balance_due": round(float(row.balance_due), 2),
+    }
+
+
+async def _outstanding_csv(query):
+    """Stream the report as CSV without holding it in memory"""
+    # The request's session is closed once the response starts, so the
+    # stream runs on a session of its own
+    async with AsyncSessionLocal() as db:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=_OUTSTANDING_COLUMNS)
+        writer.writeheader()
+        result = await db.stream(query.execution_options(yield_per=1000))
+        async for partition in result.partitions():
+            for row in partition:
+                writer.writerow(_outstanding_row(row))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+
+@router.get("/outstanding", dependencies=[Depends(require_admin)])
+async def list_outstanding_balances(
+    sort: str = "due",
+    include_settled: bool = False,
+    format: str = "json",
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Balance due for every active enrollment
+
+    sort: due (largest first), student, course or months.
+    format=csv streams the whole report (skip/limit do not apply).
+    """
+    if sort not in ("due", "student", "course", "months"):
+        raise HTTPException(status_code=400, detail="sort must be one of: due, student, course, months")
+    if format not in ("json", "csv"):
+        raise HTTPException(status_code=400, detail="format must be json or csv")
+    
+    query = _outstanding_query(sort, include_settled)
+    
+    if format == "csv":
+        return StreamingResponse(
+            _outstanding_csv(query),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=outstanding_balances.csv"}
+        )
+    
+    rows = (await db.execute(query.offset(skip).limit(limit))).all()
+    return [_outstanding_row(row) for row in rows]
+
+
 @router.get("/{payment_id}", response_model=PaymentResponse, dependencies=[Depends(require_admin)])
-async def get_payment(payment_id: str, db: Session = Depends(get_db)):
+async def get_payment(payment_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get payment details by ID"""
-    payment = db.query(Payment).filter(Payment.id == payment_id).first()
+    payment = await db.scalar(select(Payment).where(Payment.id == payment_id))
     if not payment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -103,15 +248,20 @@ async def get_payment(payment_id: str, db: Session = Depends(get_db)):
 
 
 @router.put("/{payment_id}", response_model=PaymentResponse, dependencies=[Depends(require_admin)])
-async def update_payment(payment_id: str, payment_data: PaymentUpdate, db: Session = Depends(get_db)):
+async def update_payment(payment_id: str, payment_data: PaymentUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update payment status or amount"""
-    payment = db.query(Payment).filter(Payment.id == payment_id).first()
+    payment = await db.scalar(select(Payment).where(Payment.id == payment_id))
     if not payment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Payment not found"
         )
     
+    before = payment_contribution(payment)
+    paid_before = paid_amount(payment)
+    status_before = payment.payment_status
+    balance = await get_balance(db, payment.enrollment_id)
+    
     # Update fields
     update_data = payment_data.dict(exclude_unset=True)
     for field, value in update_data.items():
@@ -121,7 +271,18 @@ async def update_payment(payment_id: str, payment_data: PaymentUpdate, db: Sessi
     if payment_data.payment_status == "PAID" and not payment.payment_date:
         payment.payment_date = datetime.utcnow()
     
-    db.commit()
-    db.refresh(payment)
+    add_paid(balance, paid_amount(payment) - paid_before)
+    await apply_payment_change(db, before, payment_contribution(payment))
+    notifications = []
+    if payment.payment_status != status_before:
+        student_id, course_name = (await db.execute(select(Enrollment.student_id, Course.name).join(
+            Course, Course.id == Enrollment.course_id
+        ).where(Enrollment.id == payment.enrollment_id))).one()
+        notifications = await notify(db, [payment_event(student_id, course_name, payment.amount, payment.payment_status)])
+    await db.execute(bump(PAYMENTS))
+    await _commit_payment(db)
+    invalidate_dashboard()
+    publish(notifications)
+    await db.refresh(payment)
     
     return PaymentResponse.from_orm(payment)
@@ -1,59 +1,75 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
-from database import get_db
+from datetime import date, datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import extract, func, select
+from cache import TTLCache
+from config import settings
+from database import get_async_db
 from models.user import User, UserRole
 from models.course import Course
 from models.enrollment import Enrollment
 from models.payment import Payment, PaymentStatus
+from models.revenue import RevenueDaily
 from auth.dependencies import require_admin
 
 router = APIRouter(prefix="/admin/statistics", tags=["Admin - Statistics"])
 
+# Last dashboard response. Writes to users, courses, enrollments and payments
+# call invalidate_dashboard(); the TTL bounds staleness from other workers.
+_dashboard_cache = TTLCache("dashboard", 1, settings.DASHBOARD_CACHE_TTL_SECONDS)
+_dashboard_generation = 0
+
+
+def invalidate_dashboard():
+    """Drop the cached dashboard snapshot after a write it summarises"""
+    global _dashboard_generation
+    _dashboard_generation += 1
+    _dashboard_cache.clear()
+
+
+def _dashboard_counts_query():
+    """All dashboard counters as scalar subqueries of a single SELECT"""
+    def count(column, *criteria):
+        return select(func.count(column)).where(*criteria).scalar_subquery()
+
+    return select(
+        count(User.id, User.role == UserRole.STUDENT, User.is_active == True).label("total_students"),
+        count(User.id, User.role == UserRole.TEACHER, User.is_active == True).label("total_teachers"),
+        count(Course.id, Course.is_active == True).label("active_courses"),
+        select(func.sum(Payment.amount)).where(
+            Payment.payment_status == PaymentStatus.PAID
+        ).scalar_subquery().label("total_revenue"),
+        count(Payment.id, Payment.payment_status == PaymentStatus.PENDING).label("pending_payments"),
+    )
+
 
 @router.get("/dashboard", dependencies=[Depends(require_admin)])
-async def get_dashboard_statistics(db: Session = Depends(get_db)):
+async def get_dashboard_statistics(db: AsyncSession = Depends(get_async_db)):
     """Get dashboard overview statistics"""
+    snapshot = _dashboard_cache.get("dashboard")
+    if snapshot is not None:
+        return snapshot
+    generation = _dashboard_generation
     
-    # Count total students
-    total_students = db.query(User).filter(
-        User.role == UserRole.STUDENT,
-        User.is_active == True
-    ).count()
-    
-    # Count total teachers
-    total_teachers = db.query(User).filter(
-        User.role == UserRole.TEACHER,
-        User.is_active == True
-    ).count()
-    
-    # Count active courses
-    active_courses = db.query(Course).filter(Course.is_active == True).count()
-    
-    # Calculate total revenue (only PAID payments)
-    total_revenue = db.query(func.sum(Payment.amount)).filter(
-        Payment.payment_status == PaymentStatus.PAID
-    ).scalar() or 0
-    
-    # Get pending payments count
-    pending_payments = db.query(Payment).filter(
-        Payment.payment_status == PaymentStatus.PENDING
-    ).count()
+    # Students, teachers, active courses, revenue and pending payments in one round trip
+    counts = (await db.execute(_dashboard_counts_query())).one()
     
     # Get recent enrollments (last 5)
-    recent_enrollments = db.query(Enrollment).options(
+    recent_enrollments = (await db.scalars(select(Enrollment).options(
         joinedload(Enrollment.student),
         joinedload(Enrollment.course)
     ).order_by(
         Enrollment.enrollment_date.desc()
-    ).limit(5).all()
+    ).limit(5))).all()
     
-    return {
-        "total_students": total_students,
-        "total_teachers": total_teachers,
-        "active_courses": active_courses,
-        "total_revenue": float(total_revenue),
-        "pending_payments": pending_payments,
+    snapshot = {
+        "total_students": counts.total_students,
+        "total_teachers": counts.total_teachers,
+        "active_courses": counts.active_courses,
+        "total_revenue": float(counts.total_revenue or 0),
+        "pending_payments": counts.pending_payments,
         "recent_enrollments": [
             {
                 "id": str(enrollment.id),
@@ -65,17 +81,22 @@ async def get_dashboard_statistics(db: Session = Depends(get_db)):
             for enrollment in recent_enrollments
         ]
     }
+    
+    # Skip caching if a write landed while we were reading
+    if generation == _dashboard_generation:
+        _dashboard_cache.set("dashboard", snapshot)
+    return snapshot
 
 
 @router.get("/revenue", dependencies=[Depends(require_admin)])
-async def get_revenue_statistics(db: Session = Depends(get_db)):
+async def get_revenue_statistics(db: AsyncSession = Depends(get_async_db)):
     """Get revenue breakdown by status"""
     
     # Revenue by payment status
-    revenue_by_status = db.query(
+    revenue_by_status = (await db.execute(select(
         Payment.payment_status,
         func.sum(Payment.amount).label("total")
-    ).group_by(Payment.payment_status).all()
+    ).group_by(Payment.payment_status))).all()
     
     return {
         "by_status": [
@@ -86,17 +107,17 @@ async def get_revenue_statistics(db: Session = Depends(get_db)):
 
 
 @router.get("/students", dependencies=[Depends(require_admin)])
-async def get_student_statistics(db: Session = Depends(get_db)):
+async def get_student_statistics(db: AsyncSession = Depends(get_async_db)):
     """Get student progress overview"""
     
     # Get average progress across all enrollments
-    avg_progress = db.query(func.avg(Enrollment.current_progress)).scalar() or 0
+    avg_progress = await db.scalar(select(func.avg(Enrollment.current_progress))) or 0
     
     # Count enrollments by status
-    enrollments_by_status = db.query(
+    enrollments_by_status = (await db.execute(select(
         Enrollment.status,
         func.count(Enrollment.id).label("count")
-    ).group_by(Enrollment.status).all()
+    ).group_by(Enrollment.status))).all()
     
     return {
         "average_progress": float(avg_progress),
@@ -107,46 +128,78 @@ async def get_student_statistics(db: Session = Depends(get_db)):
     }
 
 
+_CHART_GRANULARITIES = ("day", "month", "year")
+
+
+def _chart_label(granularity: str, bucket) -> str:
+    """YYYY-MM-DD / YYYY-MM / YYYY, the labels the chart has always used"""
+    if granularity == "day":
+        day = bucket[0]
+        return day.isoformat() if isinstance(day, date) else str(day)
+    if granularity == "month":
+        return f"{int(bucket[0]):04d}-{int(bucket[1]):02d}"
+    return f"{int(bucket[0]):04d}"
+
+
 @router.get("/revenue-chart", dependencies=[Depends(require_admin)])
-async def get_revenue_chart_data(period: str = "6m", db: Session = Depends(get_db)):
-    """Get revenue chart data aggregated by time"""
-    from datetime import datetime, timedelta
-    from sqlalchemy import case
-    
+async def get_revenue_chart_data(
+    period: str = "6m",
+    granularity: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get revenue chart data aggregated by day, month or year
+
+    Reads the revenue_daily rollup, so the cost depends on the number of days
+    in the range rather than the number of payments. `start_date`/`end_date`
+    (inclusive) override the range implied by `period`.
+    """
     # Calculate start date based on period
-    now = datetime.utcnow()
+    today = datetime.utcnow().date()
     if period == "1y":
-        start_date = now - timedelta(days=365)
+        period_start = today - timedelta(days=365)
     elif period == "30d":
-        start_date = now - timedelta(days=30)
+        period_start = today - timedelta(days=30)
     elif period == "all":
-        start_date = None  # No date filter for all time
+        period_start = None  # No date filter for all time
     else:  # Default to 6m
-        start_date = now - timedelta(days=180)
-
-    # Use COALESCE so payments where payment_date is NULL fall back to created_at
-    effective_date = func.coalesce(Payment.payment_date, Payment.created_at)
+        period_start = today - timedelta(days=180)
+    if start_date is None:
+        start_date = period_start
 
     # For 30-day view use daily granularity; all others use monthly
-    if period == "30d":
-        date_label = func.strftime('%Y-%m-%d', effective_date).label("date_label")
+    if granularity is None:
+        granularity = "day" if period == "30d" else "month"
+    if granularity not in _CHART_GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"granularity must be one of: {', '.join(_CHART_GRANULARITIES)}"
+        )
+
+    if granularity == "day":
+        buckets = (RevenueDaily.day,)
+    elif granularity == "month":
+        buckets = (extract("year", RevenueDaily.day), extract("month", RevenueDaily.day))
     else:
-        date_label = func.strftime('%Y-%m', effective_date).label("date_label")
+        buckets = (extract("year", RevenueDaily.day),)
 
-    query = db.query(
-        date_label,
-        func.sum(Payment.amount).label("total")
-    ).filter(
-        Payment.payment_status == PaymentStatus.PAID
+    query = select(
+        *buckets,
+        func.sum(RevenueDaily.amount).label("total")
+    ).where(
+        RevenueDaily.payment_count > 0
     )
-
     if start_date is not None:
-        query = query.filter(effective_date >= start_date)
+        query = query.where(RevenueDaily.day >= start_date)
+    if end_date is not None:
+        query = query.where(RevenueDaily.day <= end_date)
 
-    revenue_data = query.group_by(date_label).order_by(date_label).all()
+    revenue_data = (await db.execute(query.group_by(*buckets).order_by(*buckets))).all()
 
     # Format for frontend
     return [
-        {"date": date_str, "amount": float(total or 0)}
-        for date_str, total in revenue_data
+        {"date": _chart_label(granularity, row[:-1]), "amount": float(row[-1] or 0)}
+        for row in revenue_data
     ]
+
@@ -1,20 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database import get_db
+from database import get_async_db
 from models.user import User, UserRole
+from models.notification import NotificationEvent, NotificationCursor
 from schemas.user import UserCreate, UserUpdate, UserResponse
-from auth.security import hash_password
-from auth.dependencies import require_admin
+from auth.security import hash_password_async, revocation_time
+from auth.dependencies import require_admin, invalidate_principal
+from routers.admin.statistics import invalidate_dashboard
+from pagination import Keyset, paginate
+from etags import ENROLLMENTS, PAYMENTS, bump
 
 router = APIRouter(prefix="/admin/users", tags=["Admin - Users"])
 
+# Stable, indexed order for list pagination
+_LIST_ORDER = Keyset(User.created_at, User.id)
+
 
 @router.post("", response_model=UserResponse, dependencies=[Depends(require_admin)])
-async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new teacher or student account (Admin only)"""
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -24,43 +32,47 @@ async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
     # Create new user
     new_user = User(
         email=user_data.email,
-        hashed_password=hash_password(user_data.password),
+        hashed_password=await hash_password_async(user_data.password),
         role=user_data.role,
         full_name=user_data.full_name,
         phone_number=user_data.phone_number
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    invalidate_dashboard()
+    await db.refresh(new_user)
     
     return UserResponse.from_orm(new_user)
 
 
 @router.get("", response_model=List[UserResponse], dependencies=[Depends(require_admin)])
 async def list_users(
+    response: Response,
     role: UserRole = None,
     is_active: bool = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List all users with optional filtering"""
-    query = db.query(User)
+    query = select(User)
     
     if role:
-        query = query.filter(User.role == role)
+        query = query.where(User.role == role)
     if is_active is not None:
-        query = query.filter(User.is_active == is_active)
+        query = query.where(User.is_active == is_active)
     
-    users = query.offset(skip).limit(limit).all()
+    users = await paginate(db, query, _LIST_ORDER, response, cursor, skip, limit, with_total)
     return [UserResponse.from_orm(user) for user in users]
 
 
 @router.get("/{user_id}", response_model=UserResponse, dependencies=[Depends(require_admin)])
-async def get_user(user_id: str, db: Session = Depends(get_db)):
+async def get_user(user_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get user details by ID"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -70,9 +82,9 @@ async def get_user(user_id: str, db: Session = Depends(get_db)):
 
 
 @router.put("/{user_id}", response_model=UserResponse, dependencies=[Depends(require_admin)])
-async def update_user(user_id: str, user_data: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(user_id: str, user_data: UserUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update user information"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -85,21 +97,25 @@ async def update_user(user_id: str, user_data: UserUpdate, db: Session = Depends
     # Handle password update separately to ensure hashing
     if 'password' in update_data:
         password = update_data.pop('password')
-        user.hashed_password = hash_password(password)
+        user.hashed_password = await hash_password_async(password)
     
     for field, value in update_data.items():
         setattr(user, field, value)
+    if not user.is_active:
+        user.tokens_valid_after = revocation_time()
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    invalidate_dashboard()
+    await db.refresh(user)
+    invalidate_principal(user.id)
     
     return UserResponse.from_orm(user)
 
 
 @router.delete("/{user_id}", dependencies=[Depends(require_admin)])
-async def delete_user(user_id: str, db: Session = Depends(get_db)):
+async def delete_user(user_id: str, db: AsyncSession = Depends(get_async_db)):
     """Soft delete user (set is_active to False)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -111,16 +127,43 @@ async def delete_user(user_id: str, db: Session = Depends(get_db)):
         # Import models locally to avoid circular imports if any, or just to keep scope clean
         from models.enrollment import Enrollment
         from models.payment import Payment
+        from models.balance import EnrollmentBalance
+        from revenue import remove_payments
         
         # Find all enrollments
-        enrollments = db.query(Enrollment).filter(Enrollment.student_id == user_id).all()
+        enrollments = (await db.scalars(select(Enrollment).where(Enrollment.student_id == user_id))).all()
         for enrollment in enrollments:
             # Delete payments for this enrollment
-            db.query(Payment).filter(Payment.enrollment_id == enrollment.id).delete()
+            await remove_payments(db, Payment.enrollment_id == enrollment.id)
+            await db.execute(delete(Payment).where(Payment.enrollment_id == enrollment.id))
+            await db.execute(delete(EnrollmentBalance).where(EnrollmentBalance.enrollment_id == enrollment.id))
             # Delete enrollment
-            db.delete(enrollment)
-            
-    db.delete(user)
-    db.commit()
+            await db.delete(enrollment)
+        if enrollments:
+            await db.execute(bump(ENROLLMENTS, PAYMENTS))
+    
+    await db.execute(delete(NotificationEvent).where(NotificationEvent.recipient_id == user_id))
+    await db.execute(delete(NotificationCursor).where(NotificationCursor.user_id == user_id))
+    await db.delete(user)
+    await db.commit()
+    invalidate_dashboard()
+    invalidate_principal(user_id)
     
     return {"message": "User and associated data deleted successfully"}
+
+
+@router.post("/{user_id}/revoke-tokens", dependencies=[Depends(require_admin)])
+async def revoke_tokens(user_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Sign the user out everywhere by revoking every token issued so far"""
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    
+    user.tokens_valid_after = revocation_time()
+    await db.commit()
+    invalidate_principal(user_id)
+    
+    return {"message": "User tokens revoked successfully"}
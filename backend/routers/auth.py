@@ -1,18 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from models.user import User
 from schemas.auth import LoginRequest, LoginResponse, UserResponse, ProfileUpdate
-from auth.security import verify_password, create_access_token, hash_password
-from auth.dependencies import get_current_user
+from auth.security import verify_password_async, hash_password_async, needs_rehash, create_access_token
+from auth.dependencies import get_current_user, invalidate_principal
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/login", response_model=LoginResponse)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Login with email, password, and role selection"""
-    user = db.query(User).filter(User.email == login_data.email).first()
+    user = await db.scalar(select(User).where(User.email == login_data.email))
     
     if not user or not user.is_active:
         raise HTTPException(
@@ -20,12 +21,17 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
             detail="Invalid credentials"
         )
     
-    if not verify_password(login_data.password, user.hashed_password):
+    if not await verify_password_async(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
     
+    # Upgrade legacy SHA-256 (or outdated-cost) hashes while we have the password
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(login_data.password)
+        await db.commit()
+    
     if user.role != login_data.role:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -49,15 +55,23 @@ async def get_me(current_user: User = Depends(get_current_user)):
 @router.patch("/profile", response_model=UserResponse)
 async def update_profile(
     profile_data: ProfileUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Update the current user's profile (name, phone, password)"""
+    # current_user is the shared cached copy; modify this session's own row
+    user = await db.scalar(select(User).where(User.id == current_user.id))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
     if profile_data.full_name is not None:
-        current_user.full_name = profile_data.full_name
+        user.full_name = profile_data.full_name
 
     if profile_data.phone_number is not None:
-        current_user.phone_number = profile_data.phone_number
+        user.phone_number = profile_data.phone_number
 
     if profile_data.new_password:
         if not profile_data.current_password:
@@ -65,13 +79,14 @@ async def update_profile(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is required to set a new password"
             )
-        if not verify_password(profile_data.current_password, current_user.hashed_password):
+        if not await verify_password_async(profile_data.current_password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
-        current_user.hashed_password = hash_password(profile_data.new_password)
+        user.hashed_password = await hash_password_async(profile_data.new_password)
 
-    db.commit()
-    db.refresh(current_user)
-    return UserResponse.from_orm(current_user)
+    await db.commit()
+    await db.refresh(user)
+    invalidate_principal(user.id)
+    return UserResponse.from_orm(user)
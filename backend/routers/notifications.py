@@ -1,149 +1,201 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session, joinedload
-from database import get_db
-from auth.dependencies import get_current_user
-from models.user import User, UserRole
-from models.payment import Payment, PaymentStatus
-from models.attendance import Attendance
-from models.enrollment import Enrollment
-from models.course import Course
-from datetime import datetime, timedelta, date
+import asyncio
+import json
+from collections import deque
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from database import get_async_db, AsyncSessionLocal, IS_SQLITE
+from auth.dependencies import authenticate, get_current_user
+from config import settings
+import metrics
+import notification_hub
+from etags import not_modified
+from models.user import User
+from models.notification import NotificationEvent, NotificationCursor
+from datetime import datetime
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
+_NEVER = datetime(1970, 1, 1)
+
+# EventSource cannot send headers, so the stream also takes ?access_token=
+_optional_bearer = HTTPBearer(auto_error=False)
+
+
+def _feed_query(user_id: str):
+    """Newest events of one user, each row carrying the read cursor and the unread count"""
+    last_read = func.coalesce(
+        select(NotificationCursor.last_read_at).where(NotificationCursor.user_id == user_id).scalar_subquery(),
+        _NEVER
+    )
+    unread = aliased(NotificationEvent)
+    # Counting stops at the cap, so a long unread backlog costs no more than the cap
+    unread_count = select(func.count()).select_from(
+        select(unread.id).where(
+            unread.recipient_id == user_id,
+            unread.created_at > last_read
+        ).limit(settings.NOTIFICATION_UNREAD_CAP).subquery()
+    ).scalar_subquery()
+    return select(
+        NotificationEvent.id, NotificationEvent.type, NotificationEvent.title,
+        NotificationEvent.message, NotificationEvent.created_at,
+        last_read.label("last_read_at"), unread_count.label("unread_count"),
+    ).where(
+        NotificationEvent.recipient_id == user_id
+    ).order_by(
+        NotificationEvent.created_at.desc(), NotificationEvent.id.desc()
+    ).limit(settings.NOTIFICATION_FEED_LIMIT)
+
+
+def _feed_version_query(user_id: str):
+    """What the feed of one user depends on: its newest event id and the read cursor"""
+    return select(
+        func.max(NotificationEvent.id),
+        select(NotificationCursor.last_read_at).where(NotificationCursor.user_id == user_id).scalar_subquery(),
+    ).where(NotificationEvent.recipient_id == user_id)
+
 
 @router.get("")
 async def get_notifications(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Return the newest notifications for the current user.
+
+    The number of unread ones (capped at NOTIFICATION_UNREAD_CAP) is sent in
+    the X-Unread-Count header.
+    """
+    newest_id, last_read_at = (await db.execute(_feed_version_query(current_user.id))).one()
+    unchanged = not_modified(request, response, current_user.id, newest_id, last_read_at)
+    if unchanged is not None:
+        return unchanged
+    rows = (await db.execute(_feed_query(current_user.id))).all()
+    response.headers["X-Unread-Count"] = str(rows[0].unread_count if rows else 0)
+    return [_item(row, row.created_at <= row.last_read_at) for row in rows]
+
+
+def _item(row, read: bool) -> dict:
+    return {
+        "id": row.id,
+        "type": row.type,
+        "title": row.title,
+        "message": row.message,
+        "time": row.created_at.isoformat(),
+        "read": read,
+    }
+
+
+def _events_after(user_id: str, last_id: int, last_created_at: datetime):
+    """Events of one user newer than the last one a stream sent, oldest first"""
+    return select(
+        NotificationEvent.id, NotificationEvent.type, NotificationEvent.title,
+        NotificationEvent.message, NotificationEvent.created_at,
+    ).where(
+        NotificationEvent.recipient_id == user_id,
+        NotificationEvent.created_at >= last_created_at,
+        NotificationEvent.id > last_id
+    ).order_by(
+        NotificationEvent.created_at, NotificationEvent.id
+    ).limit(settings.NOTIFICATION_FEED_LIMIT)
+
+
+async def _resume_point(db, user_id: str, last_event_id):
+    """(id, created_at) of the client's Last-Event-ID, or None if it has none or it is not theirs"""
+    if not (last_event_id and last_event_id.isdigit()):
+        return None
+    row = (await db.execute(select(NotificationEvent.id, NotificationEvent.created_at).where(
+        NotificationEvent.recipient_id == user_id,
+        NotificationEvent.id == int(last_event_id)
+    ))).one_or_none()
+    return tuple(row) if row else None
+
+
+async def _event_stream(token: str, user_id: str, resume):
+    subscription = notification_hub.subscribe(user_id)
+    metrics.NOTIFICATION_STREAMS.inc()
+    sent = None  # ids already written; the poller can deliver an event a second time
+    try:
+        yield "retry: 5000\n\n"
+        notifications = []
+        if resume is not None:
+            async with AsyncSessionLocal() as db:
+                notifications = (await db.execute(_events_after(user_id, *resume))).all()
+        while True:
+            for notification in notifications:
+                if sent is None:
+                    sent = deque(maxlen=2 * settings.NOTIFICATION_FEED_LIMIT)
+                elif notification.id in sent:
+                    continue
+                sent.append(notification.id)
+                yield f"id: {notification.id}\nevent: notification\ndata: {json.dumps(_item(notification, False))}\n\n"
+            if subscription.overflowed:
+                return  # fell behind; the client reconnects and catches up from Last-Event-ID
+            try:
+                await asyncio.wait_for(subscription.wake.wait(), settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                try:
+                    async with AsyncSessionLocal() as db:  # only queried on a principal cache miss
+                        await authenticate(token, db)
+                except HTTPException:
+                    return  # expired, revoked or deactivated; the client reconnects with a fresh token
+                yield ": heartbeat\n\n"
+            notifications = subscription.take()
+    finally:
+        metrics.NOTIFICATION_STREAMS.dec()
+        notification_hub.unsubscribe(user_id, subscription)
+
+
+@router.get("/stream")
+async def stream_notifications(
+    access_token: str = None,
+    last_event_id: str = Header(None),
+    credentials: HTTPAuthorizationCredentials = Depends(_optional_bearer)
+):
+    """Push new notifications of the current user as Server-Sent Events.
+
+    Each event carries its id; a reconnecting EventSource sends the last
+    one back as Last-Event-ID and first gets what it missed (up to
+    NOTIFICATION_FEED_LIMIT events). Idle streams get a heartbeat comment
+    every NOTIFICATION_STREAM_HEARTBEAT_SECONDS.
+    """
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    # The session is closed before streaming starts
+    async with AsyncSessionLocal() as db:
+        user = await authenticate(token, db)
+        resume = await _resume_point(db, user.id, last_event_id)
+    return StreamingResponse(
+        _event_stream(token, user.id, resume),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/read")
+async def mark_notifications_read(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Return derived notifications for the current user based on recent activity."""
-    notifications = []
-    since_date = date.today() - timedelta(days=30)
-    since_datetime = datetime.utcnow() - timedelta(days=30)
-
-    if current_user.role == UserRole.STUDENT:
-        # 1. Recent payments recorded for this student
-        enrollments = db.query(Enrollment).filter(
-            Enrollment.student_id == current_user.id
-        ).all()
-        enrollment_ids = [e.id for e in enrollments]
-
-        if enrollment_ids:
-            recent_payments = db.query(Payment).options(
-                joinedload(Payment.enrollment).joinedload(Enrollment.course)
-            ).filter(
-                Payment.enrollment_id.in_(enrollment_ids),
-                Payment.created_at >= since_datetime
-            ).order_by(Payment.created_at.desc()).limit(10).all()
-
-            for p in recent_payments:
-                course_name = (
-                    p.enrollment.course.name
-                    if p.enrollment and p.enrollment.course
-                    else "a course"
-                )
-                label = "confirmed" if p.payment_status == PaymentStatus.PAID else "pending"
-                notifications.append({
-                    "id": f"pay-{p.id}",
-                    "type": "payment",
-                    "title": "Payment Update",
-                    "message": f"Payment of ${float(p.amount):.2f} for {course_name} is {label}.",
-                    "time": p.created_at.isoformat(),
-                })
-
-        # 2. Recent attendance records for this student
-        recent_attendance = db.query(Attendance).options(
-            joinedload(Attendance.course)
-        ).filter(
-            Attendance.student_id == current_user.id,
-            Attendance.date >= since_date
-        ).order_by(Attendance.date.desc()).limit(10).all()
-
-        for a in recent_attendance:
-            course_name = a.course.name if a.course else "a course"
-            raw = a.status.value if hasattr(a.status, "value") else str(a.status)
-            emoji = {"PRESENT": "✅", "ABSENT": "❌", "LATE": "⚠️", "EXCUSED": "📋"}.get(raw, "")
-            notifications.append({
-                "id": f"att-{a.id}",
-                "type": "attendance",
-                "title": "Attendance Recorded",
-                "message": f"{course_name} on {a.date.strftime('%b %d')}: {raw.capitalize()} {emoji}",
-                "time": a.date.isoformat(),
-            })
-
-        # 3. Recent enrollment confirmations
-        recent_enrollments = db.query(Enrollment).options(
-            joinedload(Enrollment.course)
-        ).filter(
-            Enrollment.student_id == current_user.id,
-            Enrollment.enrollment_date >= since_datetime
-        ).order_by(Enrollment.enrollment_date.desc()).limit(5).all()
-
-        for e in recent_enrollments:
-            course_name = e.course.name if e.course else "a course"
-            notifications.append({
-                "id": f"enr-{e.id}",
-                "type": "enrollment",
-                "title": "Enrollment Confirmed",
-                "message": f"You have been enrolled in {course_name}.",
-                "time": e.enrollment_date.isoformat(),
-            })
-
-        # 4. Recently published quizzes in the student's enrolled courses
-        from models.quiz import Quiz, QuizStatus
-        all_enrollments = db.query(Enrollment).filter(
-            Enrollment.student_id == current_user.id
-        ).all()
-        all_course_ids = [e.course_id for e in all_enrollments]
-
-        if all_course_ids:
-            recent_quizzes = db.query(Quiz).options(
-                joinedload(Quiz.course)
-            ).filter(
-                Quiz.course_id.in_(all_course_ids),
-                Quiz.status == QuizStatus.PUBLISHED,
-                Quiz.updated_at >= since_datetime
-            ).order_by(Quiz.updated_at.desc()).limit(10).all()
-
-            for q in recent_quizzes:
-                course_name = q.course.name if q.course else "your course"
-                quiz_type = q.quiz_type.value if hasattr(q.quiz_type, "value") else str(q.quiz_type)
-                notifications.append({
-                    "id": f"quiz-{q.id}",
-                    "type": "quiz",
-                    "title": "New Quiz Available 🎯",
-                    "message": f"\"{q.title}\" ({quiz_type.capitalize()}) is now available in {course_name}.",
-                    "time": q.updated_at.isoformat(),
-                })
-
-    elif current_user.role == UserRole.TEACHER:
-        # New students enrolled in the teacher's courses in the last 30 days
-        teacher_courses = db.query(Course).filter(
-            Course.teacher_id == current_user.id
-        ).all()
-        course_ids = [c.id for c in teacher_courses]
-
-        if course_ids:
-            recent_enrollments = db.query(Enrollment).options(
-                joinedload(Enrollment.student),
-                joinedload(Enrollment.course)
-            ).filter(
-                Enrollment.course_id.in_(course_ids),
-                Enrollment.enrollment_date >= since_datetime
-            ).order_by(Enrollment.enrollment_date.desc()).limit(20).all()
-
-            for e in recent_enrollments:
-                student_name = e.student.full_name if e.student else "A student"
-                course_name = e.course.name if e.course else "your course"
-                notifications.append({
-                    "id": f"enr-{e.id}",
-                    "type": "enrollment",
-                    "title": "New Student Enrolled",
-                    "message": f"{student_name} enrolled in {course_name}.",
-                    "time": e.enrollment_date.isoformat(),
-                })
-
-    # Sort by time descending and return top 20
-    notifications.sort(key=lambda n: n["time"], reverse=True)
-    return notifications[:20]
+    """Mark every notification the current user has received so far as read."""
+    newest = await db.scalar(select(func.max(NotificationEvent.created_at)).where(
+        NotificationEvent.recipient_id == current_user.id
+    ))
+    if newest is not None:
+        insert_ = sqlite_insert if IS_SQLITE else pg_insert
+        stmt = insert_(NotificationCursor).values(user_id=current_user.id, last_read_at=newest)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[NotificationCursor.user_id],
+            set_={"last_read_at": stmt.excluded.last_read_at},
+            # The cursor only moves forward
+            where=NotificationCursor.last_read_at < stmt.excluded.last_read_at,
+        ))
+        await db.commit()
+    return {"last_read_at": newest.isoformat() if newest else None}
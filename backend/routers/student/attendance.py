@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database import get_db
+from database import get_async_db
 from models.attendance import Attendance
 from models.enrollment import Enrollment, EnrollmentStatus
 from models.user import User
@@ -13,18 +14,18 @@ router = APIRouter(tags=["Student - Attendance"])
 @router.get("/courses/{course_id}/attendance", response_model=List[AttendanceResponse])
 async def get_my_course_attendance(
     course_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_student)
 ):
     """
     Get attendance records for a course the student is enrolled in
     """
     # Verify enrollment
-    enrollment = db.query(Enrollment).filter(
+    enrollment = await db.scalar(select(Enrollment).where(
         Enrollment.student_id == current_user.id,
         Enrollment.course_id == course_id,
         Enrollment.status == EnrollmentStatus.ACTIVE
-    ).first()
+    ))
     
     if not enrollment:
         raise HTTPException(
@@ -32,9 +33,9 @@ async def get_my_course_attendance(
             detail="You are not enrolled in this course"
         )
     
-    records = db.query(Attendance).filter(
+    records = (await db.scalars(select(Attendance).where(
         Attendance.course_id == course_id,
         Attendance.student_id == current_user.id
-    ).all()
+    ))).all()
     
     return [AttendanceResponse.from_orm(record) for record in records]
@@ -1,30 +1,38 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database import get_db
+from database import get_async_db
 from models.enrollment import Enrollment
 from models.user import User
 from schemas.models import EnrollmentResponse
 from auth.dependencies import require_student
+from etags import COURSES, ENROLLMENTS, check_versions
 
 router = APIRouter(tags=["Student - Courses"])
 
 @router.get("/courses")
 async def get_my_courses(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_student)
 ):
     """
     Get all courses the current student is enrolled in
     """
+    unchanged = await check_versions(db, request, response, current_user.id, COURSES, ENROLLMENTS)
+    if unchanged is not None:
+        return unchanged
+    
     from sqlalchemy.orm import joinedload
     from models.course import Course
     
-    enrollments = db.query(Enrollment).options(
+    enrollments = (await db.scalars(select(Enrollment).options(
         joinedload(Enrollment.course)
-    ).filter(
+    ).where(
         Enrollment.student_id == current_user.id
-    ).all()
+    ))).all()
     
     results = []
     for enrollment in enrollments:
@@ -54,7 +62,7 @@ from schemas.models import CourseResponse
 @router.get("/courses/{course_id}", response_model=CourseResponse)
 async def get_course_details(
     course_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_student)
 ):
     """
@@ -63,11 +71,11 @@ async def get_course_details(
     from models.course import Course
     
     # Verify enrollment
-    enrollment = db.query(Enrollment).filter(
+    enrollment = await db.scalar(select(Enrollment).where(
         Enrollment.student_id == current_user.id,
         Enrollment.course_id == course_id,
         Enrollment.status.in_(["ACTIVE", "COMPLETED"])
-    ).first()
+    ))
     
     if not enrollment:
         from fastapi import HTTPException, status
@@ -76,7 +84,7 @@ async def get_course_details(
             detail="You are not enrolled in this course"
         )
         
-    course = db.query(Course).filter(Course.id == course_id).first()
+    course = await db.scalar(select(Course).where(Course.id == course_id))
     if not course:
         from fastapi import HTTPException, status
         raise HTTPException(
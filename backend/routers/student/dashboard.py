@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from database import get_async_db
 from models.enrollment import Enrollment
 from models.course import Course
 from models.user import User
@@ -10,16 +12,16 @@ router = APIRouter(tags=["Student - Dashboard"])
 
 @router.get("/dashboard")
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_student)
 ):
     """
     Get dashboard statistics for the current student
     """
     # Get all enrollments
-    enrollments = db.query(Enrollment).filter(
+    enrollments = (await db.scalars(select(Enrollment).where(
         Enrollment.student_id == current_user.id
-    ).all()
+    ))).all()
     
     total_courses = len(enrollments)
     active_courses = sum(1 for e in enrollments if e.status == "ACTIVE")
@@ -32,16 +34,18 @@ async def get_dashboard_stats(
         avg_progress = sum(e.current_progress for e in active_enrollments) / len(active_enrollments)
         
     # Get recent quizzes
-    from models.quiz import Quiz
+    from models.quiz import Quiz, QuizQuestion
     from schemas.models import QuizResponse
     
     course_ids = [e.course_id for e in active_enrollments]
     recent_quizzes = []
     
     if course_ids:
-        quizzes = db.query(Quiz).filter(
+        quizzes = (await db.scalars(select(Quiz).options(
+            selectinload(Quiz.questions).selectinload(QuizQuestion.options)
+        ).where(
             Quiz.course_id.in_(course_ids)
-        ).order_by(Quiz.created_at.desc()).limit(5).all()
+        ).order_by(Quiz.created_at.desc()).limit(5))).all()
         
         recent_quizzes = [QuizResponse.from_orm(q) for q in quizzes]
         
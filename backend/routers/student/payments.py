@@ -1,39 +1,47 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database import get_db
+from database import get_async_db
 from models.payment import Payment
 from models.enrollment import Enrollment
 from models.user import User
 from schemas.models import PaymentResponse
 from auth.dependencies import require_student
+from etags import COURSES, ENROLLMENTS, PAYMENTS, check_versions
 
 router = APIRouter(tags=["Student - Payments"])
 
 @router.get("/payments", response_model=List[PaymentResponse])
 async def get_my_payments(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_student)
 ):
     """
     Get all payments made by the current student
     """
+    unchanged = await check_versions(db, request, response, current_user.id, COURSES, ENROLLMENTS, PAYMENTS)
+    if unchanged is not None:
+        return unchanged
+    
     # Join Payment with Enrollment and Course to filter by student_id and get course name
     from models.course import Course
     from sqlalchemy.orm import joinedload
     
-    payments = db.query(Payment).options(
+    payments = (await db.scalars(select(Payment).options(
         joinedload(Payment.enrollment).joinedload(Enrollment.course)
-    ).join(Enrollment).join(Course).filter(
+    ).join(Enrollment).join(Course).where(
         Enrollment.student_id == current_user.id
-    ).order_by(Payment.payment_date.desc()).all()
+    ).order_by(Payment.payment_date.desc()))).all()
     
     # Manually populate course_name since it's not a direct field on Payment model
     results = []
     for payment in payments:
-        response = PaymentResponse.from_orm(payment)
+        item = PaymentResponse.from_orm(payment)
         if payment.enrollment and payment.enrollment.course:
-            response.course_name = payment.enrollment.course.name
-        results.append(response)
+            item.course_name = payment.enrollment.course.name
+        results.append(item)
             
     return results
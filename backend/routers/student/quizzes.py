@@ -1,20 +1,29 @@
 """
 Student Quiz API — view available quizzes, start attempts, submit answers, get results.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import delete, insert, select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, joinedload
 from typing import List
 from datetime import datetime
 
-from database import get_db
-from models.quiz import Quiz, QuizQuestion, QuizOption, QuizSubmission, QuizAnswer, QuizStatus, SubmissionStatus
+from database import get_async_db
+from models.quiz import Quiz, QuizQuestion, QuizSubmission, QuizAnswer, QuizSnapshot, QuizStatus, SubmissionStatus
 from models.enrollment import Enrollment, EnrollmentStatus
+from models.course import Course
 from models.user import User
 from schemas.models import (
-    QuizResponse, QuestionResponse, OptionResponse,
-    SubmissionCreate, QuizResultResponse, AnswerResult
+    QuizResponse, QuizSummary,
+    SubmissionCreate, AnswerAutosave, AnswerSubmit, QuizResultResponse, AnswerResult
 )
 from auth.dependencies import require_student
+from quiz_snapshots import load_header, snapshot_payload
+from answer_keys import get_answer_key, grade, answer_rows
+from autosave import buffer_answers, pending_answers, take_pending
+from etags import COURSES, ENROLLMENTS, QUIZZES, bump, check_versions, submissions
+from quiz_expiry import Attempt, attempt_deadline, claim_attempts, finalize_attempts, is_expired, schedule, seconds_remaining
 
 router = APIRouter(tags=["Student - Quizzes"])
 
@@ -23,23 +32,12 @@ router = APIRouter(tags=["Student - Quizzes"])
 # Helpers
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _strip_correct(quiz: Quiz) -> QuizResponse:
-    """Build a QuizResponse but hide is_correct from options."""
-    resp = QuizResponse.from_orm(quiz)
-    for q in resp.questions:
-        for o in q.options:
-            o.is_correct = None   # don't expose the answer
-    resp.total_points = sum(q.points for q in quiz.questions)
-    resp.course_name = quiz.course.name if quiz.course else None
-    return resp
-
-
-def _check_enrollment(student_id: str, course_id: str, db: Session):
-    enrollment = db.query(Enrollment).filter(
+async def _check_enrollment(student_id: str, course_id: str, db: AsyncSession):
+    enrollment = await db.scalar(select(Enrollment).where(
         Enrollment.student_id == student_id,
         Enrollment.course_id == course_id,
         Enrollment.status == EnrollmentStatus.ACTIVE
-    ).first()
+    ))
     if not enrollment:
         raise HTTPException(status_code=403, detail="You are not enrolled in this course")
 
@@ -62,33 +60,62 @@ def _check_quiz_availability(quiz: Quiz):
 # Quiz list & detail
 # ─────────────────────────────────────────────────────────────────────────────
 
-@router.get("/quizzes", response_model=List[QuizResponse])
+@router.get("/quizzes", response_model=List[QuizSummary])
 async def list_my_quizzes(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_student)
 ):
     """List all published quizzes for the student's enrolled courses."""
-    enrollments = db.query(Enrollment).filter(
+    unchanged = await check_versions(db, request, response, current_user.id,
+                                     COURSES, ENROLLMENTS, QUIZZES, submissions(current_user.id))
+    if unchanged is not None:
+        return unchanged
+
+    enrolled_courses = select(Enrollment.course_id).where(
         Enrollment.student_id == current_user.id,
         Enrollment.status == EnrollmentStatus.ACTIVE
-    ).all()
-    course_ids = [e.course_id for e in enrollments]
-
-    quizzes = db.query(Quiz).filter(
-        Quiz.course_id.in_(course_ids),
+    )
+    # Question count and points per quiz, without loading the questions
+    question_count = select(func.count(QuizQuestion.id)).where(
+        QuizQuestion.quiz_id == Quiz.id
+    ).scalar_subquery()
+    total_points = select(func.coalesce(func.sum(QuizQuestion.points), 0)).where(
+        QuizQuestion.quiz_id == Quiz.id
+    ).scalar_subquery()
+
+    rows = (await db.execute(select(
+        Quiz,
+        Course.name,
+        question_count,
+        total_points
+    ).join(
+        Course, Course.id == Quiz.course_id
+    ).where(
+        Quiz.course_id.in_(enrolled_courses),
         Quiz.status == QuizStatus.PUBLISHED
-    ).all()
-
-    results = []
-    for quiz in quizzes:
-        resp = _strip_correct(quiz)
-        # Count only SUBMITTED (completed) attempts — not abandoned IN_PROGRESS ones
-        attempts_done = db.query(QuizSubmission).filter(
-            QuizSubmission.quiz_id == quiz.id,
+    ))).all()
+
+    # Count only SUBMITTED (completed) attempts — not abandoned IN_PROGRESS ones
+    attempts_used = {}
+    if rows:
+        attempts_used = dict((await db.execute(select(
+            QuizSubmission.quiz_id,
+            func.count(QuizSubmission.id)
+        ).where(
+            QuizSubmission.quiz_id.in_([quiz.id for quiz, *_ in rows]),
             QuizSubmission.student_id == current_user.id,
             QuizSubmission.status == SubmissionStatus.SUBMITTED
-        ).count()
-        resp.description = (resp.description or "") + f"__attempts_used:{attempts_done}"
+        ).group_by(QuizSubmission.quiz_id))).all())
+
+    results = []
+    for quiz, course_name, questions, points in rows:
+        resp = QuizSummary.from_orm(quiz)
+        resp.question_count = questions
+        resp.total_points = points
+        resp.course_name = course_name
+        resp.attempts_used = attempts_used.get(quiz.id, 0)
         results.append(resp)
     return results
 
@@ -96,18 +123,19 @@ async def list_my_quizzes(
 @router.get("/quizzes/{quiz_id}", response_model=QuizResponse)
 async def get_quiz_detail(
     quiz_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_student)
 ):
     """Get a single quiz for taking (options without correct answer flag)."""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+    quiz = await load_header(db, quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
-    _check_enrollment(current_user.id, quiz.course_id, db)
+    await _check_enrollment(current_user.id, quiz.course_id, db)
     _check_quiz_availability(quiz)
 
-    return _strip_correct(quiz)
+    # Pre-serialized QuizResponse, see quiz_snapshots.py
+    return Response(content=await snapshot_payload(db, quiz), media_type="application/json")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -117,57 +145,142 @@ async def get_quiz_detail(
 @router.post("/quizzes/{quiz_id}/start")
 async def start_quiz(
     quiz_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_student)
 ):
     """Begin a new attempt. Returns submission_id and quiz data."""
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+    quiz = await load_header(db, quiz_id)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
 
-    _check_enrollment(current_user.id, quiz.course_id, db)
+    await _check_enrollment(current_user.id, quiz.course_id, db)
     _check_quiz_availability(quiz)
 
     # Count only fully SUBMITTED (completed) attempts — use the enum, not a raw string
-    finished_attempts = db.query(QuizSubmission).filter(
+    finished_attempts = await db.scalar(select(func.count(QuizSubmission.id)).where(
         QuizSubmission.quiz_id == quiz_id,
         QuizSubmission.student_id == current_user.id,
         QuizSubmission.status == SubmissionStatus.SUBMITTED
-    ).count()
-
-    if finished_attempts >= quiz.max_attempts:
-        raise HTTPException(
-            status_code=403,
-            detail=f"You have used all {quiz.max_attempts} attempt(s) for this quiz"
-        )
+    ))
 
     # Reuse an existing IN_PROGRESS submission rather than creating a duplicate.
     # This prevents abandoned starts from counting as wasted attempts.
-    existing_in_progress = db.query(QuizSubmission).filter(
+    existing_in_progress = await db.scalar(select(QuizSubmission).where(
         QuizSubmission.quiz_id == quiz_id,
         QuizSubmission.student_id == current_user.id,
         QuizSubmission.status == SubmissionStatus.IN_PROGRESS
-    ).first()
+    ))
+
+    if existing_in_progress and is_expired(existing_in_progress.deadline_at):
+        # Ran out of time without a submit: grade what was saved, as the sweeper would
+        await finalize_attempts(db, [Attempt(existing_in_progress.id, quiz_id, quiz.snapshot_version, current_user.id)])
+        await db.commit()
+        take_pending(existing_in_progress.id)
+        finished_attempts += 1
+        existing_in_progress = None
+
+    if finished_attempts >= quiz.max_attempts:
+        raise HTTPException(
+            status_code=403,
+            detail=f"You have used all {quiz.max_attempts} attempt(s) for this quiz"
+        )
 
     if existing_in_progress:
         submission = existing_in_progress
     else:
+        started_at = datetime.utcnow()
         submission = QuizSubmission(
             quiz_id=quiz_id,
             student_id=current_user.id,
             attempt_number=finished_attempts + 1,
-            started_at=datetime.utcnow()
+            started_at=started_at,
+            deadline_at=attempt_deadline(started_at, quiz.time_limit_minutes)
         )
         db.add(submission)
-        db.commit()
-        db.refresh(submission)
+        await db.commit()
+        await db.refresh(submission)
+        schedule(submission.deadline_at)
+
+    # Splice the pre-serialized quiz into the envelope rather than re-encoding it
+    quiz_data = await snapshot_payload(db, quiz)
+    return Response(
+        content=b'{"submission_id":%s,"quiz":%s,"attempt_number":%d,"seconds_remaining":%s}' % (
+            json.dumps(submission.id).encode(), quiz_data, submission.attempt_number,
+            json.dumps(seconds_remaining(submission.deadline_at)).encode()
+        ),
+        media_type="application/json"
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Autosave
+# ─────────────────────────────────────────────────────────────────────────────
 
-    quiz_data = _strip_correct(quiz)
-    return {
-        "submission_id": submission.id,
-        "quiz": quiz_data,
-        "attempt_number": submission.attempt_number
-    }
+async def _saved_answers(submission_id: str, db: AsyncSession) -> dict:
+    """question id -> (selected_option_id, short_answer_text), stored and buffered"""
+    # Read the buffer first: a flush committing during the query below leaves it
+    buffered = pending_answers(submission_id)
+    saved = {question_id: (option_id, text) for question_id, option_id, text in (await db.execute(select(
+        QuizAnswer.question_id, QuizAnswer.selected_option_id, QuizAnswer.short_answer_text
+    ).where(QuizAnswer.submission_id == submission_id))).all()}
+    saved.update(buffered)
+    return saved
+
+
+@router.patch("/submissions/{submission_id}/answers", status_code=status.HTTP_202_ACCEPTED)
+async def autosave_answers(
+    submission_id: str,
+    draft: AnswerAutosave,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_student)
+):
+    """Save some answers of an attempt in progress (written to the database in batches)."""
+    row = (await db.execute(select(
+        QuizSubmission.quiz_id, QuizSubmission.status, QuizSubmission.deadline_at, QuizSnapshot.version
+    ).outerjoin(
+        QuizSnapshot, QuizSnapshot.quiz_id == QuizSubmission.quiz_id
+    ).where(
+        QuizSubmission.id == submission_id,
+        QuizSubmission.student_id == current_user.id
+    ))).one_or_none()
+    if not row:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    if row.status != SubmissionStatus.IN_PROGRESS:
+        raise HTTPException(status_code=400, detail="This submission has already been submitted")
+    if is_expired(row.deadline_at):
+        raise HTTPException(status_code=403, detail="The time limit for this attempt has passed")
+
+    # Keep only answers to this quiz's questions, with one of the question's own options
+    questions = (await get_answer_key(db, row.quiz_id, row.version)).questions
+    answers = [
+        answer for answer in draft.answers
+        if answer.question_id in questions and (
+            answer.selected_option_id is None
+            or answer.selected_option_id in questions[answer.question_id].option_ids
+        )
+    ]
+    buffer_answers(submission_id, answers)
+    return {"saved": len(answers)}
+
+
+@router.get("/submissions/{submission_id}/answers", response_model=List[AnswerSubmit])
+async def get_saved_answers(
+    submission_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(require_student)
+):
+    """Answers autosaved so far, to resume an attempt after a reload."""
+    owned = await db.scalar(select(QuizSubmission.id).where(
+        QuizSubmission.id == submission_id,
+        QuizSubmission.student_id == current_user.id
+    ))
+    if not owned:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    return [
+        AnswerSubmit(question_id=question_id, selected_option_id=option_id, short_answer_text=text)
+        for question_id, (option_id, text) in (await _saved_answers(submission_id, db)).items()
+    ]
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -178,85 +291,78 @@ async def start_quiz(
 async def submit_quiz(
     submission_id: str,
     submission_data: SubmissionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_student)
 ):
     """Submit answers and receive auto-graded score."""
-    submission = db.query(QuizSubmission).filter(
+    row = (await db.execute(select(
+        QuizSubmission, Quiz.title, QuizSnapshot.version
+    ).join(
+        Quiz, Quiz.id == QuizSubmission.quiz_id
+    ).outerjoin(
+        QuizSnapshot, QuizSnapshot.quiz_id == QuizSubmission.quiz_id
+    ).where(
         QuizSubmission.id == submission_id,
         QuizSubmission.student_id == current_user.id
-    ).first()
-    if not submission:
+    ))).one_or_none()
+    if not row:
         raise HTTPException(status_code=404, detail="Submission not found")
+    submission, quiz_title, version = row
     if submission.status == "SUBMITTED":
         raise HTTPException(status_code=400, detail="This submission has already been submitted")
-
-    quiz = submission.quiz
-    questions = {q.id: q for q in quiz.questions}
-    option_map = {}
-    for q in quiz.questions:
-        for o in q.options:
-            option_map[o.id] = o
-
-    total_score = 0.0
-    max_score = sum(q.points for q in quiz.questions)
-    answer_results = []
-
-    for answer_data in submission_data.answers:
-        q = questions.get(answer_data.question_id)
-        if not q:
-            continue  # skip unknown questions
-
-        is_correct = None
-        points_awarded = 0.0
-
-        if q.question_type in ("MCQ", "LISTENING") and answer_data.selected_option_id:
-            opt = option_map.get(answer_data.selected_option_id)
-            if opt and opt.question_id == q.id:
-                is_correct = opt.is_correct
-                points_awarded = q.points if is_correct else 0.0
-
-        if is_correct:
-            total_score += points_awarded
-
-        db_answer = QuizAnswer(
-            submission_id=submission.id,
-            question_id=q.id,
-            selected_option_id=answer_data.selected_option_id,
-            short_answer_text=answer_data.short_answer_text,
-            is_correct=is_correct,
-            points_awarded=points_awarded
-        )
-        db.add(db_answer)
-
-        answer_results.append(AnswerResult(
-            question_id=q.id,
-            question_text=q.question_text,
-            selected_option_id=answer_data.selected_option_id,
-            is_correct=is_correct,
-            points_awarded=points_awarded,
-            max_points=q.points
-        ))
-
-    submission.status = "SUBMITTED"
-    submission.submitted_at = datetime.utcnow()
-    submission.score = total_score
-    submission.max_score = max_score
-    db.commit()
-    db.refresh(submission)
+    if is_expired(submission.deadline_at):
+        raise HTTPException(status_code=403, detail="The time limit for this attempt has passed")
+
+    # Claim the attempt before touching its answers; a double submit or the expiry sweeper may race us
+    submitted_at = datetime.utcnow()
+    if not await claim_attempts(db, [submission.id], submitted_at):
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="This submission has already been submitted")
+
+    # Submitted answers win; autosaved ones fill in questions the payload left out
+    answers = {answer.question_id: answer for answer in submission_data.answers}
+    saved = await _saved_answers(submission.id, db)
+    take_pending(submission.id)
+    for question_id, (option_id, text) in saved.items():
+        if question_id not in answers:
+            answers[question_id] = AnswerSubmit(
+                question_id=question_id, selected_option_id=option_id, short_answer_text=text
+            )
+
+    key = await get_answer_key(db, submission.quiz_id, version)
+    total_score, graded = grade(key, answers.values())
+    max_score = key.max_score
+
+    if saved:
+        await db.execute(delete(QuizAnswer).where(QuizAnswer.submission_id == submission.id))
+    if graded:
+        await db.execute(insert(QuizAnswer.__table__), answer_rows(submission.id, graded))
+
+    await db.execute(update(QuizSubmission).where(QuizSubmission.id == submission.id).values(
+        score=total_score, max_score=max_score
+    ))
+    await db.execute(bump(submissions(current_user.id)))
+    await db.commit()
 
     percentage = round((total_score / max_score * 100), 1) if max_score > 0 else 0.0
 
     return QuizResultResponse(
         submission_id=submission.id,
-        quiz_id=quiz.id,
-        quiz_title=quiz.title,
+        quiz_id=submission.quiz_id,
+        quiz_title=quiz_title,
         score=total_score,
         max_score=max_score,
         percentage=percentage,
         attempt_number=submission.attempt_number,
-        submitted_at=submission.submitted_at,
-        answers=answer_results
+        submitted_at=submitted_at,
+        answers=[AnswerResult(
+            question_id=answer.question_id,
+            question_text=question.question_text,
+            selected_option_id=answer.selected_option_id,
+            is_correct=is_correct,
+            points_awarded=points_awarded,
+            max_points=question.points
+        ) for answer, question, is_correct, points_awarded in graded]
     )
 
 
@@ -267,14 +373,17 @@ async def submit_quiz(
 @router.get("/submissions/{submission_id}/result", response_model=QuizResultResponse)
 async def get_submission_result(
     submission_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_student)
 ):
     """Retrieve a previously submitted quiz result."""
-    submission = db.query(QuizSubmission).filter(
+    submission = await db.scalar(select(QuizSubmission).options(
+        joinedload(QuizSubmission.quiz),
+        selectinload(QuizSubmission.answers).joinedload(QuizAnswer.question)
+    ).where(
         QuizSubmission.id == submission_id,
         QuizSubmission.student_id == current_user.id
-    ).first()
+    ))
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
     if submission.status != "SUBMITTED":
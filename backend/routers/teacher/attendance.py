@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List, Optional
-from database import get_db
+from database import get_async_db
 from models.course import Course
 from models.attendance import Attendance, AttendanceStatus
 from models.enrollment import Enrollment
 from models.user import User
 from schemas.models import AttendanceCreate, AttendanceResponse, AttendanceUpdate
 from auth.dependencies import require_teacher
+from notification_events import notify, attendance_event
+from notification_hub import publish
 from datetime import date
 
 router = APIRouter(tags=["Teacher - Attendance"])
@@ -15,17 +19,17 @@ router = APIRouter(tags=["Teacher - Attendance"])
 @router.post("/attendance", response_model=AttendanceResponse)
 async def take_attendance(
     attendance_data: AttendanceCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """
     Record attendance for a student
     """
     # Verify course belongs to teacher
-    course = db.query(Course).filter(
+    course = await db.scalar(select(Course).where(
         Course.id == attendance_data.course_id,
         Course.teacher_id == current_user.id
-    ).first()
+    ))
     
     if not course:
         raise HTTPException(
@@ -34,10 +38,10 @@ async def take_attendance(
         )
     
     # Check if student is enrolled
-    enrollment = db.query(Enrollment).filter(
+    enrollment = await db.scalar(select(Enrollment).where(
         Enrollment.course_id == attendance_data.course_id,
         Enrollment.student_id == attendance_data.student_id
-    ).first()
+    ))
     
     if not enrollment:
         raise HTTPException(
@@ -55,11 +59,11 @@ async def take_attendance(
     else:
         attendance_date = date.today()
 
-    existing_record = db.query(Attendance).filter(
+    existing_record = await db.scalar(select(Attendance).where(
         Attendance.course_id == attendance_data.course_id,
         Attendance.student_id == attendance_data.student_id,
         Attendance.date == attendance_date
-    ).first()
+    ))
     
     # Convert string status to enum member
     try:
@@ -72,10 +76,14 @@ async def take_attendance(
 
     if existing_record:
         # Update existing record
+        notifications = []
+        if existing_record.status != attendance_status:
+            notifications = await notify(db, [attendance_event(existing_record.student_id, course.name, attendance_date, attendance_status)])
         existing_record.status = attendance_status
         existing_record.notes = attendance_data.notes
-        db.commit()
-        db.refresh(existing_record)
+        await db.commit()
+        publish(notifications)
+        await db.refresh(existing_record)
         return AttendanceResponse.from_orm(existing_record)
     
     new_attendance = Attendance(
@@ -87,8 +95,10 @@ async def take_attendance(
     )
     
     db.add(new_attendance)
-    db.commit()
-    db.refresh(new_attendance)
+    notifications = await notify(db, [attendance_event(attendance_data.student_id, course.name, attendance_date, attendance_status)])
+    await db.commit()
+    publish(notifications)
+    await db.refresh(new_attendance)
     
     return AttendanceResponse.from_orm(new_attendance)
 
@@ -96,17 +106,17 @@ async def take_attendance(
 async def get_course_attendance(
     course_id: str,
     date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """
     Get attendance records for a course, optionally filtered by date
     """
     # Verify course belongs to teacher
-    course = db.query(Course).filter(
+    course = await db.scalar(select(Course).where(
         Course.id == course_id,
         Course.teacher_id == current_user.id
-    ).first()
+    ))
     
     if not course:
         raise HTTPException(
@@ -114,12 +124,14 @@ async def get_course_attendance(
             detail="Course not found or not assigned to you"
         )
     
-    query = db.query(Attendance).filter(Attendance.course_id == course_id)
+    query = select(Attendance).options(
+        joinedload(Attendance.student)
+    ).where(Attendance.course_id == course_id)
     
     if date:
-        query = query.filter(Attendance.date == date)
+        query = query.where(Attendance.date == date)
         
-    records = query.all()
+    records = (await db.scalars(query)).all()
     
     # Manually populate student names since we need to join or fetch
     # Alternatively, we could do a join query, but for simplicity let's stick to this or assume relationships work
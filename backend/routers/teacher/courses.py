@@ -1,42 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from database import get_db
+from database import get_async_db
 from models.course import Course
 from models.user import User
 from schemas.models import CourseResponse
 from auth.dependencies import require_teacher, get_current_user
+from etags import COURSES, check_versions
 
 router = APIRouter(tags=["Teacher - Courses"])
 
 @router.get("/courses", response_model=List[CourseResponse])
 async def get_my_courses(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """
     Get all courses assigned to the current teacher
     """
-    courses = db.query(Course).filter(
+    unchanged = await check_versions(db, request, response, current_user.id, COURSES)
+    if unchanged is not None:
+        return unchanged
+    
+    courses = (await db.scalars(select(Course).where(
         Course.teacher_id == current_user.id,
         Course.is_active == True
-    ).all()
+    ))).all()
     
     return [CourseResponse.from_orm(course) for course in courses]
 
 @router.get("/courses/{course_id}", response_model=CourseResponse)
 async def get_my_course_details(
     course_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """
     Get details of a specific course assigned to the current teacher
     """
-    course = db.query(Course).filter(
+    course = await db.scalar(select(Course).where(
         Course.id == course_id,
         Course.teacher_id == current_user.id
-    ).first()
+    ))
     
     if not course:
         raise HTTPException(
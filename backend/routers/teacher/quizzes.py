@@ -2,11 +2,13 @@
 Teacher Quiz API — full CRUD for quizzes, questions, and viewing student results.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, joinedload
 from typing import List
 from datetime import datetime
 
-from database import get_db
+from database import get_async_db
 from models.course import Course
 from models.quiz import Quiz, QuizQuestion, QuizOption, QuizSubmission, QuizStatus
 from models.user import User
@@ -16,6 +18,10 @@ from schemas.models import (
     SubmissionSummary
 )
 from auth.dependencies import require_teacher
+from quiz_snapshots import store_snapshot, invalidate_snapshot, delete_snapshot
+from etags import QUIZZES, bump
+from notification_events import notify_quiz_published
+from notification_hub import publish
 
 router = APIRouter(tags=["Teacher - Quizzes"])
 
@@ -24,6 +30,13 @@ router = APIRouter(tags=["Teacher - Quizzes"])
 # Helpers
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Eager-load everything _quiz_to_response touches (no lazy IO on an AsyncSession)
+_QUIZ_GRAPH = (
+    selectinload(Quiz.questions).selectinload(QuizQuestion.options),
+    joinedload(Quiz.course),
+)
+
+
 def _quiz_to_response(quiz: Quiz) -> QuizResponse:
     total = sum(q.points for q in quiz.questions)
     resp = QuizResponse.from_orm(quiz)
@@ -32,13 +45,30 @@ def _quiz_to_response(quiz: Quiz) -> QuizResponse:
     return resp
 
 
-def _get_teacher_quiz(quiz_id: str, teacher: User, db: Session) -> Quiz:
-    quiz = db.query(Quiz).filter(Quiz.id == quiz_id).first()
+async def _load_quiz(quiz_id: str, db: AsyncSession) -> Quiz:
+    """(Re)load a quiz with its full question graph, overwriting stale state."""
+    return await db.scalar(
+        select(Quiz).options(*_QUIZ_GRAPH).where(Quiz.id == quiz_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+async def _load_question(question_id: str, db: AsyncSession) -> QuizQuestion:
+    """(Re)load a question with its options, overwriting stale state."""
+    return await db.scalar(
+        select(QuizQuestion).options(selectinload(QuizQuestion.options))
+        .where(QuizQuestion.id == question_id)
+        .execution_options(populate_existing=True)
+    )
+
+
+async def _get_teacher_quiz(quiz_id: str, teacher: User, db: AsyncSession) -> Quiz:
+    quiz = await _load_quiz(quiz_id, db)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
-    course = db.query(Course).filter(
+    course = await db.scalar(select(Course).where(
         Course.id == quiz.course_id, Course.teacher_id == teacher.id
-    ).first()
+    ))
     if not course:
         raise HTTPException(status_code=403, detail="You do not have permission for this quiz")
     return quiz
@@ -50,25 +80,27 @@ def _get_teacher_quiz(quiz_id: str, teacher: User, db: Session) -> Quiz:
 
 @router.get("/quizzes", response_model=List[QuizResponse])
 async def list_teacher_quizzes(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """List all quizzes created by this teacher."""
-    quizzes = db.query(Quiz).filter(Quiz.created_by == current_user.id).all()
+    quizzes = (await db.scalars(
+        select(Quiz).options(*_QUIZ_GRAPH).where(Quiz.created_by == current_user.id)
+    )).all()
     return [_quiz_to_response(q) for q in quizzes]
 
 
 @router.post("/quizzes", response_model=QuizResponse, status_code=status.HTTP_201_CREATED)
 async def create_quiz(
     quiz_data: QuizCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """Create a new draft quiz."""
-    course = db.query(Course).filter(
+    course = await db.scalar(select(Course).where(
         Course.id == quiz_data.course_id,
         Course.teacher_id == current_user.id
-    ).first()
+    ))
     if not course:
         raise HTTPException(status_code=404, detail="Course not found or not assigned to you")
 
@@ -85,19 +117,19 @@ async def create_quiz(
         status=QuizStatus.DRAFT
     )
     db.add(quiz)
-    db.commit()
-    db.refresh(quiz)
+    await db.commit()
+    quiz = await _load_quiz(quiz.id, db)
     return _quiz_to_response(quiz)
 
 
 @router.get("/quizzes/{quiz_id}", response_model=QuizResponse)
 async def get_quiz(
     quiz_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """Get a quiz with all questions and options."""
-    quiz = _get_teacher_quiz(quiz_id, current_user, db)
+    quiz = await _get_teacher_quiz(quiz_id, current_user, db)
     return _quiz_to_response(quiz)
 
 
@@ -105,29 +137,33 @@ async def get_quiz(
 async def update_quiz(
     quiz_id: str,
     quiz_data: QuizUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """Update quiz header settings."""
-    quiz = _get_teacher_quiz(quiz_id, current_user, db)
+    quiz = await _get_teacher_quiz(quiz_id, current_user, db)
 
     for field, value in quiz_data.dict(exclude_unset=True).items():
         setattr(quiz, field, value)
-    db.commit()
-    db.refresh(quiz)
+    await invalidate_snapshot(db, quiz_id)
+    await db.execute(bump(QUIZZES))
+    await db.commit()
+    quiz = await _load_quiz(quiz_id, db)
     return _quiz_to_response(quiz)
 
 
 @router.delete("/quizzes/{quiz_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_quiz(
     quiz_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """Delete a quiz and all its questions / submissions."""
-    quiz = _get_teacher_quiz(quiz_id, current_user, db)
-    db.delete(quiz)
-    db.commit()
+    quiz = await _get_teacher_quiz(quiz_id, current_user, db)
+    await delete_snapshot(db, quiz_id)
+    await db.delete(quiz)
+    await db.execute(bump(QUIZZES))
+    await db.commit()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -137,11 +173,11 @@ async def delete_quiz(
 @router.post("/quizzes/{quiz_id}/publish", response_model=QuizResponse)
 async def publish_quiz(
     quiz_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """Publish the quiz so students can see it."""
-    quiz = _get_teacher_quiz(quiz_id, current_user, db)
+    quiz = await _get_teacher_quiz(quiz_id, current_user, db)
 
     if not quiz.questions:
         raise HTTPException(status_code=400, detail="Quiz must have at least one question before publishing")
@@ -156,24 +192,35 @@ async def publish_quiz(
                     detail=f"Question '{q.question_text[:50]}' has no correct answer marked"
                 )
 
+    newly_published = quiz.status != QuizStatus.PUBLISHED
     quiz.status = QuizStatus.PUBLISHED
     quiz.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(quiz)
+    # Compile the student view now rather than on the first student request
+    await store_snapshot(db, quiz)
+    notifications = []
+    if newly_published:
+        notifications = await notify_quiz_published(db, quiz.course_id, quiz.title, quiz.quiz_type,
+                                                    quiz.course.name if quiz.course else None, quiz.updated_at)
+    await db.execute(bump(QUIZZES))
+    await db.commit()
+    publish(notifications)
+    quiz = await _load_quiz(quiz_id, db)
     return _quiz_to_response(quiz)
 
 
 @router.post("/quizzes/{quiz_id}/unpublish", response_model=QuizResponse)
 async def unpublish_quiz(
     quiz_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """Set a published quiz back to draft."""
-    quiz = _get_teacher_quiz(quiz_id, current_user, db)
+    quiz = await _get_teacher_quiz(quiz_id, current_user, db)
     quiz.status = QuizStatus.DRAFT
-    db.commit()
-    db.refresh(quiz)
+    await invalidate_snapshot(db, quiz_id)
+    await db.execute(bump(QUIZZES))
+    await db.commit()
+    quiz = await _load_quiz(quiz_id, db)
     return _quiz_to_response(quiz)
 
 
@@ -185,11 +232,11 @@ async def unpublish_quiz(
 async def add_question(
     quiz_id: str,
     question_data: QuestionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """Add a question (with options) to a quiz."""
-    quiz = _get_teacher_quiz(quiz_id, current_user, db)
+    quiz = await _get_teacher_quiz(quiz_id, current_user, db)
 
     # Determine next order index
     max_order = max((q.order_index for q in quiz.questions), default=-1)
@@ -203,7 +250,7 @@ async def add_question(
         order_index=question_data.order_index if question_data.order_index else max_order + 1,
     )
     db.add(question)
-    db.flush()  # get the question id
+    await db.flush()  # get the question id
 
     # Add options
     if question_data.options:
@@ -217,8 +264,10 @@ async def add_question(
             )
             db.add(option)
 
-    db.commit()
-    db.refresh(question)
+    await invalidate_snapshot(db, quiz_id)
+    await db.execute(bump(QUIZZES))
+    await db.commit()
+    question = await _load_question(question.id, db)
     return QuestionResponse.from_orm(question)
 
 
@@ -227,16 +276,18 @@ async def update_question(
     quiz_id: str,
     question_id: str,
     question_data: QuestionUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """Update a question and replace its options."""
-    _get_teacher_quiz(quiz_id, current_user, db)
+    await _get_teacher_quiz(quiz_id, current_user, db)
 
-    question = db.query(QuizQuestion).filter(
+    question = await db.scalar(select(QuizQuestion).options(
+        selectinload(QuizQuestion.options)
+    ).where(
         QuizQuestion.id == question_id,
         QuizQuestion.quiz_id == quiz_id
-    ).first()
+    ))
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
@@ -247,8 +298,8 @@ async def update_question(
     if question_data.options is not None:
         # Delete existing
         for opt in question.options:
-            db.delete(opt)
-        db.flush()
+            await db.delete(opt)
+        await db.flush()
         for opt in question_data.options:
             option = QuizOption(
                 question_id=question.id,
@@ -259,8 +310,10 @@ async def update_question(
             )
             db.add(option)
 
-    db.commit()
-    db.refresh(question)
+    await invalidate_snapshot(db, quiz_id)
+    await db.execute(bump(QUIZZES))
+    await db.commit()
+    question = await _load_question(question_id, db)
     return QuestionResponse.from_orm(question)
 
 
@@ -268,21 +321,23 @@ async def update_question(
 async def delete_question(
     quiz_id: str,
     question_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """Delete a question and its options."""
-    _get_teacher_quiz(quiz_id, current_user, db)
+    await _get_teacher_quiz(quiz_id, current_user, db)
 
-    question = db.query(QuizQuestion).filter(
+    question = await db.scalar(select(QuizQuestion).where(
         QuizQuestion.id == question_id,
         QuizQuestion.quiz_id == quiz_id
-    ).first()
+    ))
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
-    db.delete(question)
-    db.commit()
+    await db.delete(question)
+    await invalidate_snapshot(db, quiz_id)
+    await db.execute(bump(QUIZZES))
+    await db.commit()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -292,15 +347,17 @@ async def delete_question(
 @router.get("/quizzes/{quiz_id}/results", response_model=List[SubmissionSummary])
 async def get_quiz_results(
     quiz_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_teacher)
 ):
     """Get all student submissions for this quiz."""
-    _get_teacher_quiz(quiz_id, current_user, db)
+    await _get_teacher_quiz(quiz_id, current_user, db)
 
-    submissions = db.query(QuizSubmission).filter(
+    submissions = (await db.scalars(select(QuizSubmission).options(
+        joinedload(QuizSubmission.student)
+    ).where(
         QuizSubmission.quiz_id == quiz_id
-    ).all()
+    ))).all()
 
     results = []
     for sub in submissions:
@@ -1,67 +1,41 @@
 """
 File upload endpoints.
-Files are saved to backend/uploads/ and served via StaticFiles at /uploads.
+Files are saved to backend/uploads/ and served by media.MediaFiles at /uploads.
+Bodies are streamed to disk and stored under their content hash (see media.py).
 """
-import os
-import uuid
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, Depends, Request
 from auth.dependencies import require_teacher
+from media import MediaKind, save_upload
 
-UPLOAD_BASE = os.path.join(os.path.dirname(__file__), "..", "uploads")
-AUDIO_DIR   = os.path.join(UPLOAD_BASE, "audio")
-IMAGE_DIR   = os.path.join(UPLOAD_BASE, "images")
+AUDIO = MediaKind("audio", "audio", {
+    "audio/mpeg": ".mp3", "audio/mp3": ".mp3",
+    "audio/wav": ".wav", "audio/x-wav": ".wav", "audio/wave": ".wav",
+}, max_mb=20)
+IMAGE = MediaKind("image", "images", {
+    "image/jpeg": ".jpg", "image/jpg": ".jpg", "image/png": ".png", "image/gif": ".gif", "image/webp": ".webp",
+}, max_mb=5)
 
-ALLOWED_AUDIO = {"audio/mpeg", "audio/wav", "audio/mp3", "audio/x-wav", "audio/wave"}
-ALLOWED_IMAGE = {"image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"}
-MAX_AUDIO_MB  = 20
-MAX_IMAGE_MB  = 5
+# The multipart body is read by save_upload, so the OpenAPI schema is spelled out here
+_FILE_BODY = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}},
+}}}}}
 
 router = APIRouter(prefix="/api/uploads", tags=["Uploads"])
 
 
-@router.post("/audio")
+@router.post("/audio", openapi_extra=_FILE_BODY)
 async def upload_audio(
-    file: UploadFile = File(...),
+    request: Request,
     _current_user=Depends(require_teacher)
 ):
     """Upload an audio file (mp3 / wav). Returns the URL path."""
-    if file.content_type not in ALLOWED_AUDIO:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type: {file.content_type}. Allowed: mp3, wav"
-        )
-    content = await file.read()
-    if len(content) / (1024 * 1024) > MAX_AUDIO_MB:
-        raise HTTPException(status_code=400, detail=f"File too large (max {MAX_AUDIO_MB} MB)")
+    return await save_upload(request, AUDIO)
 
-    os.makedirs(AUDIO_DIR, exist_ok=True)
-    ext      = os.path.splitext(file.filename or "audio.mp3")[1] or ".mp3"
-    filename = f"{uuid.uuid4()}{ext}"
-    with open(os.path.join(AUDIO_DIR, filename), "wb") as f:
-        f.write(content)
 
-    return {"url": f"/uploads/audio/{filename}", "filename": filename}
-
-
-@router.post("/image")
+@router.post("/image", openapi_extra=_FILE_BODY)
 async def upload_image(
-    file: UploadFile = File(...),
+    request: Request,
     _current_user=Depends(require_teacher)
 ):
     """Upload an image for an MCQ option (jpg / png / gif / webp). Returns the URL path."""
-    if file.content_type not in ALLOWED_IMAGE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type: {file.content_type}. Allowed: jpg, png, gif, webp"
-        )
-    content = await file.read()
-    if len(content) / (1024 * 1024) > MAX_IMAGE_MB:
-        raise HTTPException(status_code=400, detail=f"File too large (max {MAX_IMAGE_MB} MB)")
-
-    os.makedirs(IMAGE_DIR, exist_ok=True)
-    ext      = os.path.splitext(file.filename or "image.jpg")[1] or ".jpg"
-    filename = f"{uuid.uuid4()}{ext}"
-    with open(os.path.join(IMAGE_DIR, filename), "wb") as f:
-        f.write(content)
-
-    return {"url": f"/uploads/images/{filename}", "filename": filename}
+    return await save_upload(request, IMAGE)
@@ -222,6 +222,29 @@ class QuizResponse(BaseModel):
         from_attributes = True
 
 
+class QuizSummary(BaseModel):
+    """Quiz header for list views: counts instead of the question tree"""
+    id: str
+    course_id: str
+    created_by: str
+    title: str
+    description: Optional[str] = None
+    quiz_type: str
+    status: str
+    time_limit_minutes: Optional[int] = None
+    max_attempts: int
+    open_date: Optional[datetime] = None
+    close_date: Optional[datetime] = None
+    created_at: datetime
+    question_count: int = 0
+    total_points: float = 0
+    course_name: Optional[str] = None
+    attempts_used: int = 0  # SUBMITTED attempts by the requesting student
+
+    class Config:
+        from_attributes = True
+
+
 # ---------------------------------------------------------------------------
 # Quiz Submission / Answer schemas
 # ---------------------------------------------------------------------------
@@ -238,6 +261,11 @@ class SubmissionCreate(BaseModel):
     answers: list[AnswerSubmit]
 
 
+class AnswerAutosave(BaseModel):
+    """Answers changed since the last autosave of an attempt in progress"""
+    answers: list[AnswerSubmit]
+
+
 class AnswerResult(BaseModel):
     """Result for a single question after grading"""
     question_id: str
@@ -0,0 +1,77 @@
+"""
+Backfill: seed notification_events from the last 30 days of activity.
+
+Run once after deploying the event store so feeds do not start out empty.
+It writes the events the feed used to derive on every poll (payments,
+attendance, enrollments and published quizzes) and does nothing if the
+table already has events.
+"""
+import sys
+import os
+from datetime import datetime, time, timedelta
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from database import engine
+from models.attendance import Attendance
+from models.course import Course
+from models.enrollment import Enrollment
+from models.notification import NotificationEvent, NotificationCursor
+from models.payment import Payment
+from models.quiz import Quiz, QuizStatus
+from models.user import User
+from notification_events import attendance_event, enrollment_events, event, payment_event, quiz_published_message
+
+
+def backfill(days: int = 30):
+    print("🔹 Backfilling notification_events...", flush=True)
+    NotificationEvent.__table__.create(bind=engine, checkfirst=True)
+    NotificationCursor.__table__.create(bind=engine, checkfirst=True)
+    since = datetime.utcnow() - timedelta(days=days)
+
+    with engine.begin() as conn:
+        if conn.scalar(select(func.count()).select_from(NotificationEvent)):
+            print("🔸 notification_events already has events; nothing to do.", flush=True)
+            return
+
+        events = []
+        for student_id, course_name, amount, status, created_at in conn.execute(select(
+            Enrollment.student_id, Course.name, Payment.amount, Payment.payment_status, Payment.created_at
+        ).join(Enrollment, Enrollment.id == Payment.enrollment_id).join(
+            Course, Course.id == Enrollment.course_id
+        ).where(Payment.created_at >= since)):
+            events.append(payment_event(student_id, course_name, amount, status, created_at))
+
+        for student_id, course_name, day, status in conn.execute(select(
+            Attendance.student_id, Course.name, Attendance.date, Attendance.status
+        ).join(Course, Course.id == Attendance.course_id).where(Attendance.date >= since.date())):
+            events.append(attendance_event(student_id, course_name, day, status, datetime.combine(day, time())))
+
+        for student_id, student_name, teacher_id, course_name, enrolled_at in conn.execute(select(
+            Enrollment.student_id, User.full_name, Course.teacher_id, Course.name, Enrollment.enrollment_date
+        ).join(User, User.id == Enrollment.student_id).join(
+            Course, Course.id == Enrollment.course_id
+        ).where(Enrollment.enrollment_date >= since)):
+            events += enrollment_events(student_id, student_name, teacher_id, course_name, enrolled_at)
+
+        for student_id, title, quiz_type, course_name, published_at in conn.execute(select(
+            Enrollment.student_id, Quiz.title, Quiz.quiz_type, Course.name, Quiz.updated_at
+        ).join(Course, Course.id == Quiz.course_id).join(
+            Enrollment, Enrollment.course_id == Quiz.course_id
+        ).where(Quiz.status == QuizStatus.PUBLISHED, Quiz.updated_at >= since)):
+            events.append(event(student_id, "quiz", "New Quiz Available 🎯",
+                                quiz_published_message(title, quiz_type, course_name), published_at))
+
+        events.sort(key=lambda e: e["created_at"])
+        if events:
+            conn.execute(insert(NotificationEvent.__table__), events)
+
+    print(f"✅ Backfilled {len(events)} notification event(s).", flush=True)
+
+
+if __name__ == "__main__":
+    backfill()
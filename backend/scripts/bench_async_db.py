@@ -0,0 +1,143 @@
+"""
+Load benchmark: sync Session vs AsyncSession inside `async def` handlers.
+
+Seeds a throwaway SQLite database, then fires the admin dashboard count
+queries from 200 concurrent clients on one event loop, once through the
+old blocking path (sync Session called from a coroutine) and once through
+get_async_db's AsyncSession. Prints p50/p99 latency of the dashboard calls
+and of a trivial /health-style request served by the same loop meanwhile.
+
+Usage:  python scripts/bench_async_db.py [--clients 200] [--requests 5] [--rows 20000]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DB = os.path.join(tempfile.gettempdir(), "bench_async_db.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from database import Base, engine, async_engine, SessionLocal, AsyncSessionLocal
+from models.user import User, UserRole
+from models.course import Course
+from models.enrollment import Enrollment
+from models.payment import Payment, PaymentStatus
+
+
+def seed(rows: int):
+    """Create a fresh database with `rows` students, enrollments and payments."""
+    engine.echo = False
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    teacher = User(email="bench-teacher@example.com", hashed_password="x",
+                   role=UserRole.TEACHER, full_name="Bench Teacher")
+    course = Course(name="Bench Course", price=100, teacher=teacher)
+    db.add_all([teacher, course])
+    db.flush()
+
+    for i in range(rows):
+        student = User(email=f"bench-{i}@example.com", hashed_password="x",
+                       role=UserRole.STUDENT, full_name=f"Student {i}")
+        enrollment = Enrollment(student=student, course_id=course.id)
+        payment = Payment(enrollment=enrollment, amount=100,
+                          payment_status=PaymentStatus.PAID if i % 3 else PaymentStatus.PENDING)
+        db.add_all([student, enrollment, payment])
+    db.commit()
+    db.close()
+
+
+def _count_statements():
+    return [
+        select(func.count(User.id)).where(User.role == UserRole.STUDENT, User.is_active == True),
+        select(func.count(User.id)).where(User.role == UserRole.TEACHER, User.is_active == True),
+        select(func.count(Course.id)).where(Course.is_active == True),
+        select(func.sum(Payment.amount)).where(Payment.payment_status == PaymentStatus.PAID),
+        select(func.count(Payment.id)).where(Payment.payment_status == PaymentStatus.PENDING),
+    ]
+
+
+async def sync_handler():
+    """The old pattern: `async def` handler that blocks the loop on a sync Session."""
+    db = SessionLocal()
+    try:
+        return [db.scalar(stmt) for stmt in _count_statements()]
+    finally:
+        db.close()
+
+
+async def async_handler():
+    """The new pattern: same queries awaited through an AsyncSession."""
+    async with AsyncSessionLocal() as db:
+        return [await db.scalar(stmt) for stmt in _count_statements()]
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[max(int(len(samples) * 0.99) - 1, 0)]
+
+
+async def run(handler, clients: int, requests: int):
+    """Run `clients` concurrent clients and a /health-style probe alongside them.
+
+    The probe measures how long a trivial request waits for the event loop,
+    which is what a blocking handler steals from every other request.
+    """
+    latencies, probe = [], []
+    done = asyncio.Event()
+
+    async def client():
+        for _ in range(requests):
+            start = time.perf_counter()
+            await handler()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async def health_probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            probe.append((time.perf_counter() - start - 0.005) * 1000)
+
+    probe_task = asyncio.create_task(health_probe())
+    wall = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    wall = time.perf_counter() - wall
+    done.set()
+    await probe_task
+
+    p50, p99 = _percentiles(latencies)
+    probe_p50, probe_p99 = _percentiles(probe)
+    return {"p50": p50, "p99": p99, "probe_p50": probe_p50, "probe_p99": probe_p99,
+            "rps": len(latencies) / wall}
+
+
+async def main(clients: int, requests: int):
+    async_engine.echo = False
+    for name, handler in (("sync Session", sync_handler), ("AsyncSession", async_handler)):
+        r = await run(handler, clients, requests)
+        print(f"{name:<14} dashboard p50={r['p50']:8.1f} ms  p99={r['p99']:8.1f} ms | "
+              f"/health p50={r['probe_p50']:8.1f} ms  p99={r['probe_p99']:8.1f} ms | "
+              f"{r['rps']:7.1f} req/s", flush=True)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5, help="requests per client")
+    parser.add_argument("--rows", type=int, default=20000, help="students to seed")
+    args = parser.parse_args()
+
+    print(f"🔹 Seeding {args.rows} students into {BENCH_DB}...", flush=True)
+    seed(args.rows)
+    print(f"🔹 {args.clients} concurrent clients x {args.requests} requests", flush=True)
+    asyncio.run(main(args.clients, args.requests))
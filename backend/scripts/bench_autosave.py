@@ -0,0 +1,138 @@
+"""
+Benchmark: a cohort autosaving quiz answers during an exam.
+
+Seeds a throwaway SQLite database with one published quiz and `--students`
+attempts in progress. Each round every student saves the answer they just
+changed, all at once, the way a class autosaving every few seconds would:
+
+- direct:        each save upserts its own row and commits;
+- write-behind:  PATCH /student/submissions/{id}/answers buffers the save
+                 and the round ends with one flush, as the timer would.
+
+Usage:  python scripts/bench_autosave.py [--students 500] [--questions 40] [--rounds 10]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+BENCH_DB = os.path.join(tempfile.gettempdir(), "bench_autosave.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from database import Base, engine, async_engine, AsyncSessionLocal
+from models.user import User, UserRole
+from models.course import Course
+from models.quiz import Quiz, QuizQuestion, QuizOption, QuizSubmission, QuizAnswer, QuizStatus
+from schemas.models import AnswerAutosave, AnswerSubmit
+from autosave import _upsert, flush_pending
+from routers.student.quizzes import autosave_answers
+
+
+def seed(students: int, questions: int):
+    """One published quiz with `questions` 4-option questions, one attempt per student."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    teacher_id, course_id, quiz_id = (str(uuid.uuid4()) for _ in range(3))
+    users = [{"id": str(uuid.uuid4()), "email": f"s{i}@bench", "hashed_password": "x",
+              "role": UserRole.STUDENT, "full_name": f"Student {i}"} for i in range(students)]
+    question_rows = [{"id": str(uuid.uuid4()), "quiz_id": quiz_id, "order_index": n,
+                      "question_text": f"Question {n}", "points": 1.0} for n in range(questions)]
+    option_rows = [{"id": str(uuid.uuid4()), "question_id": q["id"], "order_index": n,
+                    "option_text": f"Option {n}", "is_correct": n == 0}
+                   for q in question_rows for n in range(4)]
+    submission_rows = [{"id": str(uuid.uuid4()), "quiz_id": quiz_id, "student_id": u["id"]} for u in users]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": teacher_id, "email": "teacher@bench", "hashed_password": "x",
+                                     "role": UserRole.TEACHER, "full_name": "Teacher"}] + users)
+        conn.execute(insert(Course), [{"id": course_id, "name": "Bench Course", "price": 100, "teacher_id": teacher_id}])
+        conn.execute(insert(Quiz), [{"id": quiz_id, "course_id": course_id, "created_by": teacher_id,
+                                     "title": "Bench Quiz", "status": QuizStatus.PUBLISHED, "max_attempts": 1}])
+        conn.execute(insert(QuizQuestion), question_rows)
+        conn.execute(insert(QuizOption), option_rows)
+        conn.execute(insert(QuizSubmission), submission_rows)
+    options = [[o["id"] for o in option_rows[n * 4:(n + 1) * 4]] for n in range(questions)]
+    return [(s["id"], User(**u)) for s, u in zip(submission_rows, users)], question_rows, options
+
+
+def answer(round_: int, student: int, questions, options) -> AnswerSubmit:
+    """The answer a student changes in a round: walks the questions, varies the option"""
+    n = (round_ + student) % len(questions)
+    return AnswerSubmit(question_id=questions[n]["id"], selected_option_id=options[n][(round_ + student) % 4])
+
+
+async def save_direct(submission_id: str, draft: AnswerSubmit):
+    async with AsyncSessionLocal() as db:
+        await db.execute(_upsert(), [{"submission_id": submission_id, "question_id": draft.question_id,
+                                      "selected_option_id": draft.selected_option_id, "short_answer_text": None}])
+        await db.commit()
+
+
+async def save_buffered(submission_id: str, student: User, draft: AnswerSubmit):
+    async with AsyncSessionLocal() as db:
+        await autosave_answers(submission_id, AnswerAutosave(answers=[draft]), db=db, current_user=student)
+
+
+async def guarded(call) -> bool:
+    try:
+        await call
+        return True
+    except OperationalError:
+        return False
+
+
+async def run(mode: str, attempts, questions, options, rounds: int):
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(QuizAnswer))
+        await db.commit()
+
+    durations, failed, flushes = [], 0, []
+    for round_ in range(rounds):
+        start = time.perf_counter()
+        if mode == "direct":
+            calls = [save_direct(sid, answer(round_, i, questions, options)) for i, (sid, _) in enumerate(attempts)]
+        else:
+            calls = [save_buffered(sid, student, answer(round_, i, questions, options))
+                     for i, (sid, student) in enumerate(attempts)]
+        results = await asyncio.gather(*(guarded(call) for call in calls))
+        if mode != "direct":
+            flush_start = time.perf_counter()
+            await flush_pending()
+            flushes.append((time.perf_counter() - flush_start) * 1000)
+        durations.append((time.perf_counter() - start) * 1000)
+        failed += results.count(False)
+
+    async with AsyncSessionLocal() as db:
+        rows = await db.scalar(select(func.count()).select_from(QuizAnswer))
+    commits = len(attempts) * rounds - failed if mode == "direct" else rounds
+    line = (f"{mode:<13} {statistics.mean(durations):9.1f} ms/round, {commits} write transactions, "
+            f"{rows} answer rows, {failed} saves failed")
+    if flushes:
+        line += f", flush {statistics.mean(flushes):.1f} ms"
+    print(line, flush=True)
+
+
+async def main(attempts, questions, options, rounds: int):
+    await run("direct", attempts, questions, options, rounds)
+    await run("write-behind", attempts, questions, options, rounds)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"🔹 Seeding {args.students} attempts at a {args.questions}-question quiz into {BENCH_DB}...", flush=True)
+    asyncio.run(main(*seed(args.students, args.questions), args.rounds))
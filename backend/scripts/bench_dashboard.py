@@ -0,0 +1,107 @@
+"""
+Benchmark: /admin/statistics/dashboard on a synthetic 100k-student dataset.
+
+Compares the previous six-query implementation, the single aggregate query
+(cache cold) and the cached snapshot (cache warm).
+
+Usage:  python scripts/bench_dashboard.py [--students 100000] [--iterations 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BENCH_DB = os.path.join(tempfile.gettempdir(), "bench_dashboard.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import joinedload
+
+from database import Base, engine, async_engine, AsyncSessionLocal
+from models.user import User, UserRole
+from models.course import Course
+from models.enrollment import Enrollment
+from models.payment import Payment, PaymentStatus
+from routers.admin import statistics
+
+
+def seed(students: int):
+    """Bulk-insert `students` students, each with one enrollment and two payments."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+
+    teachers = [{"id": str(uuid.uuid4()), "email": f"t{i}@bench", "hashed_password": "x",
+                 "role": UserRole.TEACHER, "full_name": f"Teacher {i}", "is_active": True,
+                 "created_at": now, "updated_at": now} for i in range(50)]
+    courses = [{"id": str(uuid.uuid4()), "name": f"Course {i}", "teacher_id": teachers[i % 50]["id"],
+                "capacity": 20, "price": 100, "is_active": i % 10 != 0} for i in range(200)]
+    users, enrollments, payments = [], [], []
+    for i in range(students):
+        user_id, enrollment_id = str(uuid.uuid4()), str(uuid.uuid4())
+        users.append({"id": user_id, "email": f"s{i}@bench", "hashed_password": "x", "role": UserRole.STUDENT,
+                      "full_name": f"Student {i}", "is_active": i % 20 != 0, "created_at": now, "updated_at": now})
+        enrollments.append({"id": enrollment_id, "student_id": user_id, "course_id": courses[i % 200]["id"],
+                            "enrollment_date": now - timedelta(minutes=i), "status": "ACTIVE",
+                            "current_progress": 0})
+        for status in (PaymentStatus.PAID, PaymentStatus.PENDING if i % 4 == 0 else PaymentStatus.PAID):
+            payments.append({"id": str(uuid.uuid4()), "enrollment_id": enrollment_id, "amount": 100,
+                             "payment_status": status, "created_at": now})
+
+    with engine.begin() as conn:
+        for model, rows in ((User, teachers + users), (Course, courses),
+                            (Enrollment, enrollments), (Payment, payments)):
+            conn.execute(insert(model), rows)
+
+
+async def six_query_dashboard(db):
+    """The previous implementation: one statement per counter"""
+    await db.scalar(select(func.count(User.id)).where(User.role == UserRole.STUDENT, User.is_active == True))
+    await db.scalar(select(func.count(User.id)).where(User.role == UserRole.TEACHER, User.is_active == True))
+    await db.scalar(select(func.count(Course.id)).where(Course.is_active == True))
+    await db.scalar(select(func.sum(Payment.amount)).where(Payment.payment_status == PaymentStatus.PAID))
+    await db.scalar(select(func.count(Payment.id)).where(Payment.payment_status == PaymentStatus.PENDING))
+    (await db.scalars(select(Enrollment).options(
+        joinedload(Enrollment.student), joinedload(Enrollment.course)
+    ).order_by(Enrollment.enrollment_date.desc()).limit(5))).all()
+
+
+async def aggregate_cold(db):
+    statistics.invalidate_dashboard()
+    await statistics.get_dashboard_statistics(db=db)
+
+
+async def aggregate_cached(db):
+    await statistics.get_dashboard_statistics(db=db)
+
+
+async def main(iterations: int):
+    for name, fn in (("six queries", six_query_dashboard),
+                     ("aggregate, cache cold", aggregate_cold),
+                     ("aggregate, cache warm", aggregate_cached)):
+        async with AsyncSessionLocal() as db:
+            await fn(db)  # warm up connection and page cache
+            start = time.perf_counter()
+            for _ in range(iterations):
+                await fn(db)
+            elapsed = (time.perf_counter() - start) / iterations * 1000
+        print(f"{name:<22} {elapsed:9.3f} ms/request", flush=True)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"🔹 Seeding {args.students} students into {BENCH_DB}...", flush=True)
+    seed(args.students)
+    asyncio.run(main(args.iterations))
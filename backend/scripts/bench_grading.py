@@ -0,0 +1,113 @@
+"""
+Benchmark: auto-grading and saving quiz submissions.
+
+Seeds a throwaway SQLite database with one published `--questions`-question
+quiz and `--submissions` in-progress attempts, then submits every attempt
+with a full set of answers through submit_quiz, one after another, and
+times grading alone (answer_keys.grade) and the whole call (key lookup,
+grading, bulk insert of the answers, commit).
+
+Usage:  python scripts/bench_grading.py [--questions 100] [--options 4] [--submissions 200]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+BENCH_DB = os.path.join(tempfile.gettempdir(), "bench_grading.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert, select
+
+from database import Base, engine, async_engine, AsyncSessionLocal
+from models.user import User, UserRole
+from models.course import Course
+from models.quiz import Quiz, QuizQuestion, QuizOption, QuizSubmission, QuizAnswer, QuizStatus
+from schemas.models import AnswerSubmit, SubmissionCreate
+from answer_keys import get_answer_key, grade
+from quiz_snapshots import QUIZ_GRAPH, store_snapshot
+from routers.student.quizzes import submit_quiz
+
+
+def seed(questions: int, options: int, submissions: int):
+    """One published quiz and `submissions` in-progress attempts, one student each."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    teacher_id, course_id, quiz_id = (str(uuid.uuid4()) for _ in range(3))
+    users = [{"id": str(uuid.uuid4()), "email": f"s{i}@bench", "hashed_password": "x",
+              "role": UserRole.STUDENT, "full_name": f"Student {i}"} for i in range(submissions)]
+    question_rows = [{"id": str(uuid.uuid4()), "quiz_id": quiz_id, "order_index": n,
+                      "question_text": f"Question {n}", "points": 1.0} for n in range(questions)]
+    option_rows = [{"id": str(uuid.uuid4()), "question_id": q["id"], "order_index": n,
+                    "option_text": f"Option {n}", "is_correct": n == 0}
+                   for q in question_rows for n in range(options)]
+    submission_rows = [{"id": str(uuid.uuid4()), "quiz_id": quiz_id, "student_id": u["id"]} for u in users]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": teacher_id, "email": "teacher@bench", "hashed_password": "x",
+                                     "role": UserRole.TEACHER, "full_name": "Teacher"}] + users)
+        conn.execute(insert(Course), [{"id": course_id, "name": "Bench Course", "price": 100, "teacher_id": teacher_id}])
+        conn.execute(insert(Quiz), [{"id": quiz_id, "course_id": course_id, "created_by": teacher_id,
+                                     "title": "Bench Quiz", "status": QuizStatus.PUBLISHED, "max_attempts": 1}])
+        conn.execute(insert(QuizQuestion), question_rows)
+        conn.execute(insert(QuizOption), option_rows)
+        conn.execute(insert(QuizSubmission), submission_rows)
+
+    # Every student picks option 0 or 1 in turn: half the answers are correct
+    answers = SubmissionCreate(answers=[
+        AnswerSubmit(question_id=q["id"], selected_option_id=option_rows[i * options + i % 2]["id"])
+        for i, q in enumerate(question_rows)
+    ])
+    return quiz_id, [(s["id"], User(**u)) for s, u in zip(submission_rows, users)], answers
+
+
+def summary(samples) -> str:
+    samples = sorted(samples)
+    p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+    return f"mean {statistics.mean(samples):7.3f} ms, p50 {statistics.median(samples):7.3f} ms, p95 {p95:7.3f} ms"
+
+
+async def main(quiz_id: str, attempts, answers: SubmissionCreate):
+    async with AsyncSessionLocal() as db:
+        quiz = await db.scalar(select(Quiz).options(*QUIZ_GRAPH).where(Quiz.id == quiz_id))
+        version, _ = await store_snapshot(db, quiz)
+        await db.commit()
+        key = await get_answer_key(db, quiz_id, version)
+
+    grading = []
+    for _ in attempts:
+        start = time.perf_counter()
+        grade(key, answers.answers)
+        grading.append((time.perf_counter() - start) * 1000)
+
+    submitting = []
+    for submission_id, student in attempts:
+        async with AsyncSessionLocal() as db:
+            await db.connection()  # connect outside the timing; a pooled server reuses connections
+            start = time.perf_counter()
+            result = await submit_quiz(submission_id, answers, db=db, current_user=student)
+            submitting.append((time.perf_counter() - start) * 1000)
+
+    async with AsyncSessionLocal() as db:
+        saved = await db.scalar(select(func.count()).select_from(QuizAnswer))
+    print(f"🔹 Last score {result.score}/{result.max_score}; {saved} answers saved", flush=True)
+    print(f"grade only     {summary(grading)}", flush=True)
+    print(f"submit_quiz    {summary(submitting)}", flush=True)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--options", type=int, default=4)
+    parser.add_argument("--submissions", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"🔹 Seeding a {args.questions}-question quiz and {args.submissions} attempts into {BENCH_DB}...", flush=True)
+    asyncio.run(main(*seed(args.questions, args.options, args.submissions)))
@@ -0,0 +1,150 @@
+"""
+Benchmark: a class seeking through one listening clip at the same time.
+
+Stores one `--size-mb` audio file, then sends `--requests` concurrent Range
+requests for it (`bytes=<random offset>-`+256 KiB, the way an audio
+element seeks) to two single-worker servers:
+
+- static:  a bare Starlette app mounting the same directory with StaticFiles,
+           which ignores Range and answers every request with the whole file;
+- media:   the API worker (main:app), serving /uploads with media.MediaFiles.
+
+For each it reports wall time, latency percentiles, status codes, bytes
+sent and peak worker RSS, and checks every 206 body against the file.
+
+Usage:  python scripts/bench_media.py [--requests 300] [--size-mb 8] [--port 8767]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+BENCH_DB = os.path.join(tempfile.gettempdir(), "bench_media.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Add backend directory to path
+sys.path.append(BACKEND_DIR)
+
+from media import UPLOAD_BASE
+
+SEEK_SPAN = 256 * 1024
+
+STATIC_APP = """
+import sys, uvicorn
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+app = Starlette(routes=[Mount("/uploads", StaticFiles(directory=sys.argv[1]))])
+uvicorn.run(app, port=int(sys.argv[2]), log_level="warning")
+"""
+
+
+def rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def fetch(port: int, path: str, start: int):
+    """GET one range on its own connection; returns (status, body, seconds)"""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nRange: bytes={start}-{start + SEEK_SPAN - 1}\r\n"
+                  f"Connection: close\r\n\r\n").encode())
+    data = await reader.read()
+    writer.close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body, time.perf_counter() - started
+
+
+async def sample_rss(pid: int, done: asyncio.Event) -> int:
+    peak = 0
+    while not done.is_set():
+        peak = max(peak, rss_kib(pid))
+        await asyncio.sleep(0.01)
+    return peak
+
+
+async def run(label: str, port: int, pid: int, path: str, clip: bytes, offsets: list):
+    idle = rss_kib(pid)
+    done = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, done))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(fetch(port, path, offset) for offset in offsets))
+    elapsed = time.perf_counter() - started
+    done.set()
+    peak = await sampler
+
+    statuses = Counter(status for status, _, _ in results)
+    wrong = sum(1 for (status, body, _), offset in zip(results, offsets)
+                if status == 206 and body != clip[offset:offset + SEEK_SPAN])
+    latencies = sorted(seconds * 1000 for _, _, seconds in results)
+    sent = sum(len(body) for _, body, _ in results)
+    print(("✅" if statuses.get(206) == len(offsets) and not wrong else "🔸") +
+          f" {label:<6}: {len(offsets)} range requests in {elapsed * 1000:.0f} ms; "
+          f"p50 {statistics.median(latencies):.0f} ms, p99 {latencies[int(len(latencies) * 0.99) - 1]:.0f} ms; "
+          f"status {dict(statuses)}; {sent / 1024 / 1024:.0f} MiB sent; "
+          f"RSS peak +{(peak - idle) / 1024:.0f} MiB" + (f"; {wrong} wrong bodies" if wrong else ""), flush=True)
+
+
+def wait_for_port(port: int):
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+
+
+def serve(label: str, command: list, port: int, path: str, clip: bytes, offsets: list):
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=dict(os.environ, QUERY_STATS_HEADERS="false"))
+    try:
+        wait_for_port(port)
+        asyncio.run(fetch(port, path, 0))  # first read: both servers start from a warm page cache
+        asyncio.run(run(label, port, server.pid, path, clip, offsets))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--size-mb", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    clip = os.urandom(args.size_mb * 1024 * 1024)
+    filename = hashlib.sha256(clip).hexdigest() + ".mp3"
+    stored = os.path.join(UPLOAD_BASE, "audio", filename)
+    with open(stored, "wb") as f:
+        f.write(clip)
+    rng = random.Random(42)
+    offsets = [rng.randrange(0, len(clip) - SEEK_SPAN) for _ in range(args.requests)]
+    path = f"/uploads/audio/{filename}"
+    print(f"🔹 {args.requests} concurrent Range requests for one {args.size_mb} MB clip", flush=True)
+    try:
+        serve("static", [sys.executable, "-c", STATIC_APP, UPLOAD_BASE, str(args.port)],
+              args.port, path, clip, offsets)
+        serve("media", [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+              args.port, path, clip, offsets)
+    finally:
+        os.remove(stored)
+        for leftover in (BENCH_DB, BENCH_DB + "-wal", BENCH_DB + "-shm"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+
+if __name__ == "__main__":
+    main()
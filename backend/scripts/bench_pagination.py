@@ -0,0 +1,94 @@
+"""
+Benchmark: OFFSET vs keyset (cursor) pagination on GET /admin/payments.
+
+Seeds a throwaway SQLite database with enough payments for 5,000 pages,
+then times page 1 and page 5,000 in both modes through list_payments.
+OFFSET gets slower with depth; the cursor page should cost the same
+at any depth.
+
+Usage:  python scripts/bench_pagination.py [--pages 5000] [--limit 100] [--iterations 20]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+BENCH_DB = os.path.join(tempfile.gettempdir(), "bench_pagination.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Response
+from sqlalchemy import insert, select
+
+from database import Base, engine, async_engine, AsyncSessionLocal
+from models.user import User, UserRole
+from models.course import Course
+from models.enrollment import Enrollment
+from models.payment import Payment, PaymentStatus
+from routers.admin.payments import list_payments, _LIST_ORDER
+
+
+def seed(rows: int):
+    """One enrollment with `rows` payments, one second apart."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    start = datetime.utcnow() - timedelta(seconds=rows)
+
+    with engine.begin() as conn:
+        student_id, course_id, enrollment_id = (str(uuid.uuid4()) for _ in range(3))
+        conn.execute(insert(User), [{"id": student_id, "email": "bench@example.com", "hashed_password": "x",
+                                     "role": UserRole.STUDENT, "full_name": "Bench Student"}])
+        conn.execute(insert(Course), [{"id": course_id, "name": "Bench Course", "price": 100}])
+        conn.execute(insert(Enrollment), [{"id": enrollment_id, "student_id": student_id, "course_id": course_id}])
+        for offset in range(0, rows, 50000):
+            conn.execute(insert(Payment), [
+                {"id": str(uuid.uuid4()), "enrollment_id": enrollment_id, "amount": 100,
+                 "payment_status": PaymentStatus.PAID, "created_at": start + timedelta(seconds=i)}
+                for i in range(offset, min(offset + 50000, rows))
+            ])
+
+
+async def time_page(iterations: int, **params) -> float:
+    async with AsyncSessionLocal() as db:
+        await list_payments(Response(), db=db, **params)  # warm up
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await list_payments(Response(), db=db, **params)
+        return (time.perf_counter() - start) / iterations * 1000
+
+
+async def main(pages: int, limit: int, iterations: int):
+    # Cursor pointing at the last row of page `pages - 1`, as a client would hold it
+    async with AsyncSessionLocal() as db:
+        last_row = await db.scalar(select(Payment).order_by(*_LIST_ORDER.columns).offset((pages - 1) * limit - 1).limit(1))
+    deep_cursor = _LIST_ORDER.encode(last_row)
+
+    common = {"enrollment_id": None, "payment_status": None, "limit": limit, "with_total": False}
+    results = (
+        ("offset, page 1", await time_page(iterations, skip=0, cursor=None, **common)),
+        (f"offset, page {pages}", await time_page(iterations, skip=(pages - 1) * limit, cursor=None, **common)),
+        ("cursor, page 1", await time_page(iterations, skip=0, cursor=None, **common)),
+        (f"cursor, page {pages}", await time_page(iterations, skip=0, cursor=deep_cursor, **common)),
+    )
+    for name, elapsed in results:
+        print(f"{name:<20} {elapsed:9.3f} ms/page", flush=True)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = args.pages * args.limit
+    print(f"🔹 Seeding {rows} payments into {BENCH_DB}...", flush=True)
+    seed(rows)
+    asyncio.run(main(args.pages, args.limit, args.iterations))
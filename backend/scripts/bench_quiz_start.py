@@ -0,0 +1,118 @@
+"""
+Benchmark: a class opening the same quiz at once.
+
+Seeds a throwaway SQLite database with one published quiz and `--students`
+enrolled students, then fires one request per student concurrently:
+
+- graph:    what GET /student/quizzes/{id} used to do — load the quiz,
+            questions and options and serialize them on every call;
+- detail:   GET /student/quizzes/{id} serving the compiled snapshot;
+- start:    POST /student/quizzes/{id}/start (creates the submissions).
+
+SQLite has a single writer, so some concurrent starts can fail with
+"database is locked"; they are counted and reported, not retried.
+
+Usage:  python scripts/bench_quiz_start.py [--students 500] [--questions 40] [--options 4]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+BENCH_DB = os.path.join(tempfile.gettempdir(), "bench_quiz_start.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+
+from database import Base, engine, async_engine, AsyncSessionLocal
+from models.user import User, UserRole
+from models.course import Course
+from models.enrollment import Enrollment
+from models.quiz import Quiz, QuizQuestion, QuizOption, QuizStatus
+from quiz_snapshots import QUIZ_GRAPH, student_view, store_snapshot
+from routers.student.quizzes import get_quiz_detail, start_quiz, _check_enrollment, _check_quiz_availability
+
+
+def seed(students: int, questions: int, options: int):
+    """One course, one published quiz, `students` active enrollments."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    teacher_id, course_id, quiz_id = (str(uuid.uuid4()) for _ in range(3))
+    users = [{"id": str(uuid.uuid4()), "email": f"s{i}@bench", "hashed_password": "x",
+              "role": UserRole.STUDENT, "full_name": f"Student {i}"} for i in range(students)]
+    question_rows = [{"id": str(uuid.uuid4()), "quiz_id": quiz_id, "order_index": n,
+                      "question_text": f"Question {n} " + "lorem ipsum " * 10, "points": 1.0}
+                     for n in range(questions)]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": teacher_id, "email": "teacher@bench", "hashed_password": "x",
+                                     "role": UserRole.TEACHER, "full_name": "Teacher"}] + users)
+        conn.execute(insert(Course), [{"id": course_id, "name": "Bench Course", "price": 100, "teacher_id": teacher_id}])
+        conn.execute(insert(Enrollment), [{"id": str(uuid.uuid4()), "student_id": u["id"], "course_id": course_id}
+                                          for u in users])
+        conn.execute(insert(Quiz), [{"id": quiz_id, "course_id": course_id, "created_by": teacher_id,
+                                     "title": "Bench Quiz", "status": QuizStatus.PUBLISHED, "max_attempts": 1}])
+        conn.execute(insert(QuizQuestion), question_rows)
+        conn.execute(insert(QuizOption), [{"id": str(uuid.uuid4()), "question_id": q["id"], "order_index": n,
+                                           "option_text": f"Option {n}", "is_correct": n == 0}
+                                          for q in question_rows for n in range(options)])
+    return quiz_id, [User(**u) for u in users]
+
+
+async def graph_detail(quiz_id: str, db, current_user: User):
+    quiz = await db.scalar(select(Quiz).options(*QUIZ_GRAPH).where(Quiz.id == quiz_id))
+    await _check_enrollment(current_user.id, quiz.course_id, db)
+    _check_quiz_availability(quiz)
+    return jsonable_encoder(student_view(quiz))
+
+
+async def burst(call, quiz_id: str, students):
+    async def one(student):
+        start = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as db:
+                await call(quiz_id, db=db, current_user=student)
+        except OperationalError:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(s) for s in students))
+    wall = time.perf_counter() - start
+    latencies = sorted(r for r in results if r is not None)
+    p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    return wall * 1000, statistics.median(latencies) * 1000, p95 * 1000, len(results) - len(latencies)
+
+
+async def main(quiz_id: str, students):
+    async with AsyncSessionLocal() as db:
+        quiz = await db.scalar(select(Quiz).options(*QUIZ_GRAPH).where(Quiz.id == quiz_id))
+        version, payload = await store_snapshot(db, quiz)
+        await db.commit()
+    print(f"🔹 Snapshot v{version}: {len(payload)} bytes", flush=True)
+
+    for name, call in (("graph", graph_detail), ("detail", get_quiz_detail), ("start", start_quiz)):
+        wall, p50, p95, failed = await burst(call, quiz_id, students)
+        print(f"{name:<8} {len(students)} concurrent: {wall:9.1f} ms total, p50 {p50:8.1f} ms, p95 {p95:8.1f} ms"
+              + (f", {failed} failed" if failed else ""), flush=True)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--options", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"🔹 Seeding {args.students} students and a {args.questions}-question quiz into {BENCH_DB}...", flush=True)
+    quiz_id, students = seed(args.students, args.questions, args.options)
+    asyncio.run(main(quiz_id, students))
@@ -0,0 +1,175 @@
+"""
+Benchmark: concurrent quiz media uploads against one worker.
+
+Seeds a throwaway SQLite database with a teacher, starts one uvicorn worker
+and streams `--uploads` audio files of `--size-mb` each at the same time
+through POST /api/uploads/audio. It reports:
+
+- worker memory (RSS) at its peak during the uploads, above the idle worker;
+- GET /health latency while the uploads run (the event loop must stay free);
+- deduplication: uploading one of the clips again stores no second copy;
+- early abort: an upload whose Content-Length is over the cap gets 413
+  before its body is sent.
+
+The files it stores are removed afterwards.
+
+Usage:  python scripts/bench_uploads.py [--uploads 20] [--size-mb 19] [--port 8766]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BENCH_DB = os.path.join(tempfile.gettempdir(), "bench_uploads.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Add backend directory to path
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import insert
+
+from database import Base, engine
+from models.user import User, UserRole
+from auth.security import create_access_token
+from media import UPLOAD_BASE
+
+BOUNDARY = "benchboundary"
+CHUNK = 64 * 1024
+
+
+def seed() -> str:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    teacher_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": teacher_id, "email": "teacher@bench", "hashed_password": "x",
+                                     "role": UserRole.TEACHER, "full_name": "Teacher"}])
+    return create_access_token({"sub": teacher_id, "role": "TEACHER"})
+
+
+def rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def upload(port: int, token: str, seed_byte: int, size: int, content_length: int = None):
+    """Stream one multipart upload of `size` bytes in CHUNK writes; returns (status, body)"""
+    head = (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"clip.mp3\"\r\n"
+            f"Content-Type: audio/mpeg\r\n\r\n").encode()
+    tail = f"\r\n--{BOUNDARY}--\r\n".encode()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write((f"POST /api/uploads/audio HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n"
+                  f"Content-Type: multipart/form-data; boundary={BOUNDARY}\r\n"
+                  f"Content-Length: {content_length or len(head) + size + len(tail)}\r\n"
+                  f"Connection: close\r\n\r\n").encode())
+    if content_length is None:
+        writer.write(head)
+        block = bytes([seed_byte]) * CHUNK
+        for offset in range(0, size, CHUNK):
+            writer.write(block[:min(CHUNK, size - offset)])
+            await writer.drain()
+        writer.write(tail)
+    data = await reader.read()
+    writer.close()
+    status_line, _, rest = data.partition(b"\r\n")
+    return int(status_line.split()[1]), json.loads(rest.partition(b"\r\n\r\n")[2] or b"null")
+
+
+async def health_latencies(port: int, done: asyncio.Event) -> list:
+    latencies = []
+    while not done.is_set():
+        started = time.perf_counter()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /health HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n")
+        await reader.read()
+        writer.close()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+async def sample_rss(pid: int, done: asyncio.Event) -> int:
+    peak = 0
+    while not done.is_set():
+        peak = max(peak, rss_kib(pid))
+        await asyncio.sleep(0.02)
+    return peak
+
+
+async def run(args, token: str, pid: int) -> list:
+    size = args.size_mb * 1024 * 1024
+    idle = rss_kib(pid)
+    done = asyncio.Event()
+    watchers = [asyncio.create_task(sample_rss(pid, done)), asyncio.create_task(health_latencies(args.port, done))]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(upload(args.port, token, i, size) for i in range(args.uploads)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    peak, latencies = await asyncio.gather(*watchers)
+    stored = [body["filename"] for status, body in results if status == 200]
+
+    ok = len(stored) == args.uploads
+    print(("✅" if ok else "❌") + f" {len(stored)}/{args.uploads} uploads of {args.size_mb} MB in {elapsed:.1f}s "
+          f"({args.uploads * args.size_mb / elapsed:.0f} MB/s)", flush=True)
+    print(f"🔹 Worker RSS idle {idle / 1024:.0f} MiB, peak {peak / 1024:.0f} MiB: "
+          f"{(peak - idle) / 1024 / args.uploads:.2f} MiB per concurrent upload "
+          f"(buffering each body would take {args.size_mb} MiB)", flush=True)
+    print(f"🔹 GET /health during the uploads: p50 {statistics.median(latencies):.1f} ms, "
+          f"max {max(latencies):.1f} ms over {len(latencies)} requests", flush=True)
+
+    status, body = await upload(args.port, token, 0, size)
+    print(("✅" if status == 200 and body["deduplicated"] else "❌") +
+          " Re-uploading a stored clip returns the existing file", flush=True)
+
+    started = time.perf_counter()
+    status, body = await upload(args.port, token, 0, 0, content_length=(args.size_mb + 50) * 1024 * 1024)
+    print(("✅" if status == 413 else "❌") +
+          f" Oversized upload rejected with {status} after {(time.perf_counter() - started) * 1000:.0f} ms, "
+          "before its body was sent", flush=True)
+    return stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--size-mb", type=int, default=19)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"🔹 Seeding {BENCH_DB}...", flush=True)
+    token = seed()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=dict(os.environ),
+    )
+    stored = []
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", args.port)).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        stored = asyncio.run(run(args, token, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+        for filename in stored:
+            path = os.path.join(UPLOAD_BASE, "audio", filename)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
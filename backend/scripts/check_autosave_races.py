@@ -0,0 +1,241 @@
+"""
+Check: an autosave flush racing a quiz submit or expiry loses no answers.
+
+Seeds a throwaway SQLite database with one published quiz and one attempt
+per scenario, buffers a correct answer to every question of the attempt,
+then grades it while a flush of that buffer is under way:
+
+- sweep:   the expiry sweeper finalizes the attempt, just expired, while the
+           flush holds its batch, before writing it;
+- submit:  the student submits an empty payload at the same point, so
+           only autosaved answers count;
+- gather:  the flush and the sweep simply run concurrently, in both orders.
+
+and, with the answers already flushed, two graders racing each other:
+
+- double submit:          the same attempt submitted twice at once;
+- inline expiry + sweep:  the sweeper has picked the expired attempt when
+                          the student reopens it (start_quiz finalizes it).
+
+Every attempt must end SUBMITTED with full marks, one graded row per
+question and no ungraded (is_correct NULL) row written by the late flush;
+of two racing graders exactly one grades (bumps the student's submissions
+version) and the other backs off.
+
+Usage:  python scripts/check_autosave_races.py [--questions 5]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+CHECK_DB = os.path.join(tempfile.gettempdir(), "check_autosave_races.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{CHECK_DB}"
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select, update
+
+import autosave
+import quiz_expiry
+from database import Base, engine, async_engine, AsyncSessionLocal
+from models.user import User, UserRole
+from models.course import Course
+from models.enrollment import Enrollment
+from models.quiz import Quiz, QuizQuestion, QuizOption, QuizSubmission, QuizAnswer, QuizStatus, SubmissionStatus
+from schemas.models import AnswerSubmit, SubmissionCreate
+from etags import scope_versions, submissions
+from quiz_expiry import expire_attempts
+from routers.student.quizzes import start_quiz, submit_quiz
+
+SCENARIOS = ("sweep", "submit", "gather flush first", "gather sweep first", "double submit", "inline expiry + sweep")
+
+
+def seed(questions: int):
+    """One published quiz with `questions` 2-option questions and one attempt per scenario"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    teacher_id, student_id, course_id, quiz_id = (str(uuid.uuid4()) for _ in range(4))
+    question_rows = [{"id": str(uuid.uuid4()), "quiz_id": quiz_id, "order_index": n,
+                      "question_text": f"Question {n}", "points": 1.0} for n in range(questions)]
+    option_rows = [{"id": str(uuid.uuid4()), "question_id": q["id"], "order_index": n,
+                    "option_text": f"Option {n}", "is_correct": n == 0}
+                   for q in question_rows for n in range(2)]
+    attempts = {scenario: str(uuid.uuid4()) for scenario in SCENARIOS}
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": teacher_id, "email": "teacher@check", "hashed_password": "x",
+             "role": UserRole.TEACHER, "full_name": "Teacher"},
+            {"id": student_id, "email": "student@check", "hashed_password": "x",
+             "role": UserRole.STUDENT, "full_name": "Student"},
+        ])
+        conn.execute(insert(Course), [{"id": course_id, "name": "Check Course", "price": 100, "teacher_id": teacher_id}])
+        conn.execute(insert(Quiz), [{"id": quiz_id, "course_id": course_id, "created_by": teacher_id,
+                                     "title": "Check Quiz", "status": QuizStatus.PUBLISHED,
+                                     "max_attempts": len(SCENARIOS) + 1, "time_limit_minutes": 10}])
+        conn.execute(insert(QuizQuestion), question_rows)
+        conn.execute(insert(QuizOption), option_rows)
+        conn.execute(insert(Enrollment), [{"student_id": student_id, "course_id": course_id}])
+        conn.execute(insert(QuizSubmission), [
+            {"id": submission_id, "quiz_id": quiz_id, "student_id": student_id, "attempt_number": n + 1,
+             "deadline_at": datetime.utcnow() + timedelta(minutes=10)}
+            for n, submission_id in enumerate(attempts.values())
+        ])
+    student = User(id=student_id, email="student@check", hashed_password="x",
+                   role=UserRole.STUDENT, full_name="Student")
+    correct = [AnswerSubmit(question_id=q["id"], selected_option_id=option_rows[n * 2]["id"])
+               for n, q in enumerate(question_rows)]
+    return attempts, student, correct, quiz_id
+
+
+@contextlib.contextmanager
+def held_flush():
+    """Make flush_pending wait, batch already taken, until the event is set"""
+    release = asyncio.Event()
+    session_factory = autosave.AsyncSessionLocal
+
+    @contextlib.asynccontextmanager
+    async def held_session():
+        await release.wait()
+        async with session_factory() as db:
+            yield db
+
+    autosave.AsyncSessionLocal = held_session
+    try:
+        yield release
+    finally:
+        autosave.AsyncSessionLocal = session_factory
+
+
+async def grade_during_flush(grade):
+    with held_flush() as release:
+        flush = asyncio.create_task(autosave.flush_pending())
+        await asyncio.sleep(0)  # the flush has swapped its batch out and waits
+        await grade()
+        release.set()
+        await flush
+
+
+@contextlib.contextmanager
+def held_sweep():
+    """Make the sweeper wait, attempts already selected, until the event is set"""
+    release = asyncio.Event()
+    finalize = quiz_expiry.finalize_attempts
+
+    async def held_finalize(db, attempts, now=None):
+        await release.wait()
+        return await finalize(db, attempts, now)
+
+    quiz_expiry.finalize_attempts = held_finalize
+    try:
+        yield release
+    finally:
+        quiz_expiry.finalize_attempts = finalize
+
+
+async def expire(submission_id: str):
+    """Move one attempt's deadline an hour back, so the next sweep picks up only it"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(QuizSubmission).where(QuizSubmission.id == submission_id).values(
+            deadline_at=datetime.utcnow() - timedelta(hours=1)
+        ))
+        await db.commit()
+
+
+async def sweep():
+    await expire_attempts()
+
+
+async def run(args):
+    attempts, student, correct, quiz_id = seed(args.questions)
+
+    async def submit(submission_id: str):
+        """Submit an empty payload; a 409 means another grader got there first"""
+        async with AsyncSessionLocal() as db:
+            try:
+                await submit_quiz(submission_id, SubmissionCreate(answers=[]), db=db, current_user=student)
+            except HTTPException as exc:
+                if exc.status_code != 409:
+                    raise
+
+    async def reopen():
+        async with AsyncSessionLocal() as db:
+            await start_quiz(quiz_id, db=db, current_user=student)
+
+    async def graded_times(race) -> int:
+        """Run `race`; returns how many graders wrote the attempt"""
+        async with AsyncSessionLocal() as db:
+            before, = await scope_versions(db, submissions(student.id))
+        await race
+        async with AsyncSessionLocal() as db:
+            after, = await scope_versions(db, submissions(student.id))
+        return after - before
+
+    async def reopen_during_sweep():
+        with held_sweep() as release:
+            sweeper = asyncio.create_task(sweep())
+            await asyncio.sleep(0.1)  # the sweeper has selected the attempt and waits
+            await reopen()
+            release.set()
+            await sweeper
+
+    graders = {}
+    for scenario, submission_id in attempts.items():
+        if scenario not in ("submit", "double submit"):
+            await expire(submission_id)
+        autosave.buffer_answers(submission_id, correct)
+        if scenario == "sweep":
+            await grade_during_flush(sweep)
+        elif scenario == "submit":
+            await grade_during_flush(lambda: submit(submission_id))
+        elif scenario == "gather flush first":
+            await asyncio.gather(autosave.flush_pending(), sweep())
+        elif scenario == "gather sweep first":
+            await asyncio.gather(sweep(), autosave.flush_pending())
+        elif scenario == "double submit":
+            await autosave.flush_pending()
+            graders[scenario] = await graded_times(asyncio.gather(submit(submission_id), submit(submission_id)))
+        else:
+            await autosave.flush_pending()
+            graders[scenario] = await graded_times(reopen_during_sweep())
+
+    failed = 0
+    async with AsyncSessionLocal() as db:
+        for scenario, submission_id in attempts.items():
+            status, score = (await db.execute(select(QuizSubmission.status, QuizSubmission.score).where(
+                QuizSubmission.id == submission_id
+            ))).one()
+            graded, ungraded = (await db.execute(select(
+                func.count(QuizAnswer.is_correct), func.count() - func.count(QuizAnswer.is_correct)
+            ).where(QuizAnswer.submission_id == submission_id))).one()
+            ok = (status == SubmissionStatus.SUBMITTED and score == args.questions
+                  and graded == args.questions and ungraded == 0 and graders.get(scenario, 1) == 1)
+            failed += not ok
+            print(("✅" if ok else "❌") + f" {scenario:<21}: {status.value}, score {score}/{args.questions}, "
+                  f"{graded} graded and {ungraded} ungraded answer rows"
+                  + (f", graded {graders[scenario]} time(s)" if scenario in graders else ""), flush=True)
+    await async_engine.dispose()
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"🔹 Seeding {CHECK_DB}...", flush=True)
+    failed = asyncio.run(run(args))
+    for leftover in (CHECK_DB, CHECK_DB + "-wal", CHECK_DB + "-shm"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
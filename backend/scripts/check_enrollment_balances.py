@@ -0,0 +1,67 @@
+"""
+Consistency check: compare enrollment_balances with the payments table.
+
+Recomputes every enrollment's PAID total in one set-based query and
+reports balance rows that have drifted from it. Enrollments without a
+balance row are fine: the row is materialized on the next payment.
+
+Usage:  python scripts/check_enrollment_balances.py [--fix]
+
+With --fix, drifted rows are rewritten from the payments table (bumping
+their version, so an in-flight payment retries instead of overwriting).
+Exits non-zero if drift was found and not fixed.
+"""
+import argparse
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, update
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from database import engine
+from models.balance import EnrollmentBalance
+from models.payment import Payment, PaymentStatus
+
+
+def _recomputed_paid():
+    """Correlated PAID total for the balance row's enrollment"""
+    return select(func.coalesce(func.sum(Payment.amount), 0)).where(
+        Payment.enrollment_id == EnrollmentBalance.enrollment_id,
+        Payment.payment_status == PaymentStatus.PAID
+    ).scalar_subquery()
+
+
+def check(fix: bool) -> bool:
+    print("🔹 Checking enrollment balances against payments...", flush=True)
+    EnrollmentBalance.__table__.create(bind=engine, checkfirst=True)
+    recomputed = _recomputed_paid()
+    # Numeric is stored as REAL on SQLite; compare with a cent of tolerance
+    drifted = func.abs(EnrollmentBalance.total_paid - recomputed) >= 0.005
+
+    with engine.begin() as conn:
+        checked = conn.scalar(select(func.count()).select_from(EnrollmentBalance))
+        rows = conn.execute(select(
+            EnrollmentBalance.enrollment_id, EnrollmentBalance.total_paid, recomputed.label("expected")
+        ).where(drifted)).all()
+
+        for enrollment_id, total_paid, expected in rows:
+            print(f"❌ {enrollment_id}: balance says {float(total_paid):.2f}, payments say {float(expected):.2f}", flush=True)
+
+        if rows and fix:
+            conn.execute(update(EnrollmentBalance).where(drifted).values(
+                total_paid=recomputed, version=EnrollmentBalance.version + 1
+            ))
+            print(f"✅ Rewrote {len(rows)} balance row(s).", flush=True)
+
+    print(f"🔸 {checked} balance row(s) checked, {len(rows)} drifted.", flush=True)
+    return not rows or fix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fix", action="store_true", help="rewrite drifted rows from payments")
+    args = parser.parse_args()
+    sys.exit(0 if check(args.fix) else 1)
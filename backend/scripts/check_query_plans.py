@@ -0,0 +1,113 @@
+"""
+Query-plan check: assert that the hot router lookups are served by an index.
+
+Builds a throwaway SQLite database from the models, runs EXPLAIN QUERY PLAN
+for the filters the routers issue on every request and fails (exit code 1)
+if any of them falls back to a full table scan.
+
+Usage:  python scripts/check_query_plans.py
+"""
+import os
+import re
+import sys
+import tempfile
+from datetime import date, datetime
+
+PLAN_DB = os.path.join(tempfile.gettempdir(), "check_query_plans.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{PLAN_DB}"
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from database import Base, engine
+from models.user import User
+from models.course import Course
+from models.enrollment import Enrollment, EnrollmentStatus
+from models.payment import Payment, PaymentStatus
+from models.attendance import Attendance
+from models.quiz import Quiz, QuizQuestion, QuizOption, QuizSubmission, QuizAnswer, QuizStatus, SubmissionStatus
+from quiz_expiry import _expired_query
+from routers.notifications import _feed_query, _feed_version_query
+from etags import COURSES, ENROLLMENTS, QUIZZES
+from models.resource_version import ResourceVersion
+
+ID = "00000000-0000-0000-0000-000000000000"
+
+# (description, statement) — one per lookup the routers run on their hot paths
+ROUTER_QUERIES = [
+    ("auth: user by email",
+     select(User).where(User.email == "a@b.c")),
+    ("student: active enrollment check",
+     select(Enrollment).where(Enrollment.student_id == ID, Enrollment.course_id == ID,
+                              Enrollment.status == EnrollmentStatus.ACTIVE)),
+    ("student: my enrollments",
+     select(Enrollment).where(Enrollment.student_id == ID)),
+    ("teacher: enrollments of a course",
+     select(Enrollment).where(Enrollment.course_id == ID, Enrollment.status == EnrollmentStatus.ACTIVE)),
+    ("admin: paid total for an enrollment",
+     select(func.sum(Payment.amount)).where(Payment.enrollment_id == ID,
+                                            Payment.payment_status == PaymentStatus.PAID)),
+    ("admin: pending payment count",
+     select(func.count(Payment.id)).where(Payment.payment_status == PaymentStatus.PENDING)),
+    ("teacher: attendance upsert lookup",
+     select(Attendance).where(Attendance.course_id == ID, Attendance.student_id == ID,
+                              Attendance.date == date.today())),
+    ("student: recent attendance",
+     select(Attendance).where(Attendance.student_id == ID, Attendance.date >= date.today())),
+    ("teacher: my active courses",
+     select(Course).where(Course.teacher_id == ID, Course.is_active == True)),
+    ("student: published quizzes of my courses",
+     select(Quiz).where(Quiz.course_id.in_([ID, ID]), Quiz.status == QuizStatus.PUBLISHED)),
+    ("teacher: my quizzes",
+     select(Quiz).where(Quiz.created_by == ID)),
+    ("student: submitted attempts",
+     select(func.count(QuizSubmission.id)).where(QuizSubmission.quiz_id == ID,
+                                                 QuizSubmission.student_id == ID,
+                                                 QuizSubmission.status == SubmissionStatus.SUBMITTED)),
+    ("teacher: quiz results",
+     select(QuizSubmission).where(QuizSubmission.quiz_id == ID)),
+    ("quiz graph: questions",
+     select(QuizQuestion).where(QuizQuestion.quiz_id.in_([ID]))),
+    ("quiz graph: options",
+     select(QuizOption).where(QuizOption.question_id.in_([ID]))),
+    ("quiz graph: answers of a submission",
+     select(QuizAnswer).where(QuizAnswer.submission_id == ID)),
+    ("expiry sweep: expired attempts",
+     _expired_query(datetime(2000, 1, 1), 200)),
+    ("notifications: feed with unread count",
+     _feed_query(ID)),
+    ("notifications: feed version (ETag)",
+     _feed_version_query(ID)),
+    ("etags: scope versions",
+     select(ResourceVersion.scope, ResourceVersion.version).where(
+         ResourceVersion.scope.in_([COURSES, ENROLLMENTS, QUIZZES, ID]))),
+]
+
+# "SCAN payments" is a full scan; "SCAN payments USING INDEX ..." is an index walk.
+# "SCAN anon_1" reads the rows of a subquery the plan already bounded.
+FULL_SCAN = re.compile(r"^SCAN (?!anon_)(\w+)$")
+
+
+def check() -> bool:
+    engine.echo = False
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    ok = True
+    with engine.connect() as conn:
+        for description, stmt in ROUTER_QUERIES:
+            compiled = stmt.compile(engine, compile_kwargs={"literal_binds": True})
+            plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")]
+            scans = [step for step in plan if FULL_SCAN.match(step.strip())]
+            if scans:
+                ok = False
+                print(f"❌ {description}: {'; '.join(scans)}", flush=True)
+            else:
+                print(f"✅ {description}: {'; '.join(plan)}", flush=True)
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check() else 1)
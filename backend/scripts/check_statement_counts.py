@@ -0,0 +1,153 @@
+"""
+Check: listing endpoints issue a fixed number of SQL statements.
+
+Seeds a throwaway SQLite database, then calls each listing endpoint with
+1 and with 200 rows (enrollments of one course; published quizzes across
+a student's 10 courses; a student's notification history) and counts the statements it executes. Any growth
+with the row count means an N+1 lookup crept back in. It then repeats the
+conditional endpoints with the ETag they returned, which must answer 304
+after a single statement (the version lookup).
+
+Usage:  python scripts/check_statement_counts.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+
+CHECK_DB = os.path.join(tempfile.gettempdir(), "check_statement_counts.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{CHECK_DB}"
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import Request, Response
+from sqlalchemy import insert
+
+from database import Base, engine, async_engine, AsyncSessionLocal
+from query_stats import capture_queries
+from models.user import User, UserRole
+from models.course import Course
+from models.enrollment import Enrollment
+from models.quiz import Quiz, QuizQuestion, QuizSubmission, QuizStatus, SubmissionStatus
+from models.notification import NotificationEvent
+from routers.admin.enrollments import list_enrollments
+from routers.teacher.students import get_my_students
+from routers.student.quizzes import list_my_quizzes
+from routers.notifications import get_notifications
+from routers.admin.courses import list_courses
+from routers.student.courses import get_my_courses
+
+COURSES_PER_STUDENT = 10
+
+
+def seed(rows: int) -> dict:
+    """A teacher with one course and `rows` enrolled students; the first
+    student also takes COURSES_PER_STUDENT courses with `rows` published
+    quizzes between them, each with two questions and one submission, and
+    `rows` notification events."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    teacher = {"id": str(uuid.uuid4()), "email": "teacher@check", "hashed_password": "x",
+               "role": UserRole.TEACHER, "full_name": "Teacher"}
+    course_id = str(uuid.uuid4())
+    students = [{"id": str(uuid.uuid4()), "email": f"s{i}@check", "hashed_password": "x",
+                 "role": UserRole.STUDENT, "full_name": f"Student {i}"} for i in range(rows)]
+    extra_courses = [str(uuid.uuid4()) for _ in range(COURSES_PER_STUDENT - 1)]
+    quizzes = [{"id": str(uuid.uuid4()), "course_id": ([course_id] + extra_courses)[i % COURSES_PER_STUDENT],
+                "created_by": teacher["id"], "title": f"Quiz {i}", "status": QuizStatus.PUBLISHED,
+                "max_attempts": 2} for i in range(rows)]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [teacher] + students)
+        conn.execute(insert(Course), [{"id": cid, "name": "Course", "price": 100, "teacher_id": teacher["id"]}
+                                      for cid in [course_id] + extra_courses])
+        conn.execute(insert(Enrollment), [{"id": str(uuid.uuid4()), "student_id": s["id"], "course_id": course_id}
+                                          for s in students])
+        conn.execute(insert(Enrollment), [{"id": str(uuid.uuid4()), "student_id": students[0]["id"], "course_id": cid}
+                                          for cid in extra_courses])
+        conn.execute(insert(Quiz), quizzes)
+        conn.execute(insert(QuizQuestion), [{"id": str(uuid.uuid4()), "quiz_id": q["id"], "order_index": n,
+                                             "question_text": "?", "points": 1.0}
+                                            for q in quizzes for n in range(2)])
+        conn.execute(insert(QuizSubmission), [{"id": str(uuid.uuid4()), "quiz_id": q["id"],
+                                               "student_id": students[0]["id"], "status": SubmissionStatus.SUBMITTED}
+                                              for q in quizzes])
+        conn.execute(insert(NotificationEvent), [{"recipient_id": students[0]["id"], "type": "payment",
+                                                  "title": "Payment Update", "message": f"Payment {i}"}
+                                                 for i in range(rows)])
+    return {"teacher": User(**teacher), "student": User(**students[0])}
+
+
+def request(path: str, etag: str = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": headers})
+
+
+async def count_statements(call, users: dict):
+    async with AsyncSessionLocal() as db:
+        with capture_queries() as stats:
+            rows = await call(db, users)
+    return stats.count, len(rows)
+
+
+async def count_revalidation(call, users: dict):
+    """Statements of a repeat request carrying the ETag of the first; returns (count, status)"""
+    async with AsyncSessionLocal() as db:
+        response = Response()
+        await call(db, users, response, None)
+        with capture_queries() as stats:
+            result = await call(db, users, Response(), response.headers["etag"])
+    return stats.count, result.status_code
+
+
+CHECKS = {
+    "GET /admin/enrollments": lambda db, users: list_enrollments(
+        Response(), student_id=None, course_id=None, status=None, skip=0, limit=1000,
+        cursor=None, with_total=False, db=db),
+    "GET /teacher/students": lambda db, users: get_my_students(course_id=None, db=db, current_user=users["teacher"]),
+    "GET /student/quizzes": lambda db, users: list_my_quizzes(
+        request("/student/quizzes"), Response(), db=db, current_user=users["student"]),
+    "GET /notifications": lambda db, users: get_notifications(
+        request("/notifications"), Response(), db=db, current_user=users["student"]),
+}
+
+# Conditional endpoints, called with (db, users, response, If-None-Match)
+CONDITIONAL = {
+    "GET /admin/courses": lambda db, users, response, etag: list_courses(
+        request("/admin/courses", etag), response, is_active=None, skip=0, limit=100,
+        cursor=None, with_total=False, db=db),
+    "GET /student/courses": lambda db, users, response, etag: get_my_courses(
+        request("/student/courses", etag), response, db=db, current_user=users["student"]),
+    "GET /student/quizzes": lambda db, users, response, etag: list_my_quizzes(
+        request("/student/quizzes", etag), response, db=db, current_user=users["student"]),
+    "GET /notifications": lambda db, users, response, etag: get_notifications(
+        request("/notifications", etag), response, db=db, current_user=users["student"]),
+}
+
+
+async def main() -> bool:
+    baseline, ok = {}, True
+    for rows in (1, 200):
+        users = seed(rows)
+        for name, call in CHECKS.items():
+            count, returned = await count_statements(call, users)
+            print(f"🔹 {name:<24} {returned:4d} row(s): {count} statement(s)", flush=True)
+            expected = baseline.setdefault(name, count)
+            if count != expected:
+                print(f"❌ {name}: statement count grows with rows ({expected} → {count})", flush=True)
+                ok = False
+        for name, call in CONDITIONAL.items():
+            count, status_code = await count_revalidation(call, users)
+            print(f"🔹 {name:<24} revalidated: {status_code} after {count} statement(s)", flush=True)
+            if status_code != 304 or count != 1:
+                print(f"❌ {name}: a matching If-None-Match should cost one statement and return 304", flush=True)
+                ok = False
+    await async_engine.dispose()
+    return ok
+
+
+if __name__ == "__main__":
+    ok = asyncio.run(main())
+    print("✅ Statement counts are constant." if ok else "❌ N+1 detected.", flush=True)
+    sys.exit(0 if ok else 1)
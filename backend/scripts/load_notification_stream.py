@@ -0,0 +1,250 @@
+"""
+Load test: thousands of idle GET /notifications/stream connections on one worker.
+
+Seeds a throwaway SQLite database with a teacher, one course and
+`--clients` enrolled students, starts one uvicorn worker on it and opens
+one SSE connection per student from local asyncio clients. It then reports:
+
+- worker memory (RSS) before and after the connections are open;
+- heartbeats: every idle stream gets one within the heartbeat interval;
+- fan-out: the teacher publishes a quiz, and every stream must receive
+  the event (latency until the last one arrives);
+- resume: one client drops, misses an attendance event and reconnects
+  with Last-Event-ID;
+- other writers: an event inserted straight into the table (as the monthly
+  billing run does) reaches its stream through the worker's poller.
+
+Usage:  python scripts/load_notification_stream.py [--clients 5000] [--heartbeat 5] [--port 8765]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BENCH_DB = os.path.join(tempfile.gettempdir(), "load_notification_stream.sqlite")
+os.environ["DATABASE_URL"] = f"sqlite:///{BENCH_DB}"
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Add backend directory to path
+sys.path.append(BACKEND_DIR)
+
+from sqlalchemy import insert
+
+from database import Base, engine
+from models.user import User, UserRole
+from models.course import Course
+from models.enrollment import Enrollment
+from models.notification import NotificationEvent
+from models.quiz import Quiz, QuizQuestion, QuizOption
+from auth.security import create_access_token
+
+
+def seed(clients: int) -> dict:
+    """A teacher, one course with `clients` enrolled students and one draft quiz ready to publish."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    teacher_id, course_id, quiz_id, question_id = (str(uuid.uuid4()) for _ in range(4))
+    students = [{"id": str(uuid.uuid4()), "email": f"s{i}@load", "hashed_password": "x",
+                 "role": UserRole.STUDENT, "full_name": f"Student {i}"} for i in range(clients)]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": teacher_id, "email": "teacher@load", "hashed_password": "x",
+                                     "role": UserRole.TEACHER, "full_name": "Teacher"}] + students)
+        conn.execute(insert(Course), [{"id": course_id, "name": "Load Course", "price": 100, "teacher_id": teacher_id}])
+        conn.execute(insert(Enrollment), [{"id": str(uuid.uuid4()), "student_id": s["id"], "course_id": course_id}
+                                          for s in students])
+        conn.execute(insert(Quiz), [{"id": quiz_id, "course_id": course_id, "created_by": teacher_id,
+                                     "title": "Load Quiz"}])
+        conn.execute(insert(QuizQuestion), [{"id": question_id, "quiz_id": quiz_id, "order_index": 0,
+                                             "question_text": "?", "points": 1.0}])
+        conn.execute(insert(QuizOption), [{"id": str(uuid.uuid4()), "question_id": question_id, "order_index": 0,
+                                           "option_text": "yes", "is_correct": True}])
+    return {
+        "course_id": course_id,
+        "quiz_id": quiz_id,
+        "teacher": create_access_token({"sub": teacher_id, "role": "TEACHER"}),
+        "students": [(s["id"], create_access_token({"sub": s["id"], "role": "STUDENT"})) for s in students],
+    }
+
+
+def rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def request(port: int, method: str, path: str, token: str, body: dict = None):
+    """One plain HTTP/1.1 request on its own connection; returns (status, body)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                  f"Connection: close\r\n\r\n").encode() + payload)
+    data = await reader.read()
+    writer.close()
+    head, _, content = data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), content
+
+
+class StreamClient:
+    """A minimal EventSource: one connection, chunked SSE parsing, Last-Event-ID on reconnect"""
+
+    def __init__(self, port: int, token: str):
+        self.port = port
+        self.token = token
+        self.last_event_id = None
+        self.events = []       # (arrival time, event id, data)
+        self.heartbeats = 0
+        self.arrived = asyncio.Event()
+        self._task = None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.open_connection("127.0.0.1", self.port)
+        resume = f"Last-Event-ID: {self.last_event_id}\r\n" if self.last_event_id else ""
+        self._writer.write((f"GET /notifications/stream HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+                            f"Authorization: Bearer {self.token}\r\nAccept: text/event-stream\r\n"
+                            f"{resume}\r\n").encode())
+        head = await self._reader.readuntil(b"\r\n\r\n")
+        if b" 200 " not in head.split(b"\r\n", 1)[0]:
+            raise RuntimeError(head.decode(errors="replace"))
+        self._task = asyncio.create_task(self._read())
+
+    async def _read(self):
+        buffer = b""
+        try:
+            while True:
+                size = int((await self._reader.readline()).strip(), 16)
+                if size == 0:
+                    return
+                buffer += (await self._reader.readexactly(size + 2))[:-2]  # chunk data + CRLF
+                while b"\n\n" in buffer:
+                    message, buffer = buffer.split(b"\n\n", 1)
+                    self._handle(message.decode())
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            return
+
+    def _handle(self, message: str):
+        fields = {}
+        for line in message.split("\n"):
+            if line.startswith(":"):
+                self.heartbeats += 1
+            elif ": " in line:
+                name, value = line.split(": ", 1)
+                fields[name] = value
+        if fields.get("event") == "notification":
+            self.last_event_id = fields["id"]
+            self.events.append((time.perf_counter(), fields["id"], json.loads(fields["data"])))
+            self.arrived.set()
+
+    async def close(self):
+        self._writer.close()
+        if self._task:
+            self._task.cancel()
+
+
+async def wait_for_events(clients, count: int, timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if all(len(c.events) >= count for c in clients):
+            return True
+        await asyncio.sleep(0.05)
+    return False
+
+
+async def run(args, data: dict, server_pid: int):
+    port = args.port
+    rss_before = rss_kib(server_pid)
+
+    print(f"🔹 Opening {args.clients} streams...", flush=True)
+    clients = [StreamClient(port, token) for _, token in data["students"]]
+    started = time.perf_counter()
+    for batch in range(0, len(clients), 200):
+        await asyncio.gather(*(c.connect() for c in clients[batch:batch + 200]))
+    connect_seconds = time.perf_counter() - started
+    await asyncio.sleep(1)
+    rss_after = rss_kib(server_pid)
+    per_connection = (rss_after - rss_before) / len(clients)
+    print(f"✅ {len(clients)} streams open in {connect_seconds:.1f}s; worker RSS {rss_before / 1024:.0f} MiB → "
+          f"{rss_after / 1024:.0f} MiB ({per_connection:.1f} KiB per idle stream)", flush=True)
+
+    await asyncio.sleep(args.heartbeat + 1)
+    silent = sum(1 for c in clients if c.heartbeats == 0)
+    print(("✅" if silent == 0 else "❌") + f" Heartbeats: {len(clients) - silent}/{len(clients)} idle streams got one "
+          f"within {args.heartbeat + 1:.0f}s", flush=True)
+
+    published = time.perf_counter()
+    status, _ = await request(port, "POST", f"/teacher/quizzes/{data['quiz_id']}/publish", data["teacher"])
+    delivered = await wait_for_events(clients, 1, timeout=30)
+    latencies = sorted((c.events[0][0] - published) * 1000 for c in clients if c.events)
+    print(("✅" if status == 200 and delivered else "❌") +
+          f" Fan-out of one quiz publish to {len(latencies)}/{len(clients)} streams: "
+          f"p50 {statistics.median(latencies):.0f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.0f} ms, last {latencies[-1]:.0f} ms", flush=True)
+
+    # Resume: drop one client, record attendance while it is away, reconnect with Last-Event-ID
+    client = clients[0]
+    await client.close()
+    status, _ = await request(port, "POST", "/teacher/attendance", data["teacher"], {
+        "course_id": data["course_id"], "student_id": data["students"][0][0], "status": "PRESENT"})
+    await client.connect()
+    resumed = await wait_for_events([client], 2, timeout=5)
+    print(("✅" if status == 200 and resumed else "❌") +
+          f" Resume from Last-Event-ID: missed event {'delivered' if resumed else 'lost'} after reconnect", flush=True)
+
+    # Another process writes an event: the worker's poller picks it up
+    student_id = data["students"][1][0]
+    written = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert(NotificationEvent), [{"recipient_id": student_id, "type": "payment",
+                                                  "title": "Payment Update", "message": "Written elsewhere"}])
+    polled = await wait_for_events([clients[1]], 2, timeout=10)
+    print(("✅" if polled else "❌") + " Event from another process delivered" +
+          (f" after {(clients[1].events[1][0] - written) * 1000:.0f} ms" if polled else ""), flush=True)
+
+    for c in clients:
+        await c.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--heartbeat", type=float, default=5.0, help="heartbeat interval for this run, seconds")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    # One descriptor per client here and per connection in the worker
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.clients * 2 + 1024)), hard))
+
+    print(f"🔹 Seeding {args.clients} students into {BENCH_DB}...", flush=True)
+    data = seed(args.clients)
+    env = dict(os.environ, NOTIFICATION_STREAM_HEARTBEAT_SECONDS=str(args.heartbeat),
+               QUERY_STATS_HEADERS="false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--log-level", "warning", "--backlog", "4096"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        for _ in range(100):
+            try:
+                asyncio.run(request(args.port, "GET", "/health", ""))
+                break
+            except OSError:
+                time.sleep(0.1)
+        asyncio.run(run(args, data, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
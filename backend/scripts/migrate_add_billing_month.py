@@ -0,0 +1,40 @@
+"""
+Migration: add payments.billing_month for the monthly billing run.
+
+Adds the nullable column (existing payments keep NULL) and the unique
+(enrollment_id, billing_month) index that makes the run idempotent.
+Safe to re-run.
+"""
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from database import engine
+from models.payment import Payment
+
+
+def migrate():
+    print("🔹 Starting migration: adding payments.billing_month...", flush=True)
+    columns = [column["name"] for column in inspect(engine).get_columns("payments")]
+
+    with engine.begin() as conn:
+        if "billing_month" not in columns:
+            print("🔹 Adding billing_month column...", flush=True)
+            conn.exec_driver_sql("ALTER TABLE payments ADD COLUMN billing_month INTEGER")
+        else:
+            print("🔸 billing_month column already exists.", flush=True)
+
+        for index in Payment.__table__.indexes:
+            if index.name == "uq_payments_enrollment_billing_month":
+                index.create(bind=conn, checkfirst=True)
+
+    print("✅ Migration completed successfully.", flush=True)
+
+
+if __name__ == "__main__":
+    migrate()
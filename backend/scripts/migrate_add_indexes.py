@@ -0,0 +1,54 @@
+"""
+Migration: create the lookup indexes and unique constraints declared on the models.
+
+Safe to run against a live database and to re-run:
+- every statement uses IF NOT EXISTS, so existing indexes are skipped;
+- on PostgreSQL indexes are built with CREATE INDEX CONCURRENTLY, which does
+  not block writes (each one runs in autocommit mode, as Postgres requires);
+- on SQLite each index is its own short transaction.
+
+A unique index that fails because of existing duplicate rows is reported and
+skipped; remove the duplicates and re-run.
+"""
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from database import Base, engine
+
+
+def _create_index_sql(index, concurrently: bool) -> str:
+    unique = "UNIQUE " if index.unique else ""
+    online = "CONCURRENTLY " if concurrently else ""
+    columns = ", ".join(column.name for column in index.columns)
+    return f"CREATE {unique}INDEX {online}IF NOT EXISTS {index.name} ON {index.table.name} ({columns})"
+
+
+def migrate():
+    print("🔹 Starting migration: adding lookup indexes...", flush=True)
+    concurrently = engine.dialect.name == "postgresql"
+    created, failed = 0, 0
+
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            sql = _create_index_sql(index, concurrently)
+            try:
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    conn.exec_driver_sql(sql)
+                print(f"✅ {index.name}", flush=True)
+                created += 1
+            except (IntegrityError, OperationalError, ProgrammingError) as e:
+                print(f"❌ {index.name}: {e.orig}", flush=True)
+                failed += 1
+
+    print(f"🔸 {created} index(es) present, {failed} failed.", flush=True)
+    return failed == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if migrate() else 1)
@@ -0,0 +1,59 @@
+"""
+Migration: add quiz_submissions.deadline_at for server-side quiz time limits.
+
+Adds the nullable column and the (status, deadline_at) index the expiry
+sweeper reads, and stamps attempts already in progress on timed quizzes
+with started_at plus the quiz's time limit. Submitted and untimed attempts
+keep NULL. Safe to re-run.
+"""
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, select, update, bindparam
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from database import engine
+from models.quiz import Quiz, QuizSubmission, SubmissionStatus
+from quiz_expiry import attempt_deadline
+
+
+def migrate():
+    print("🔹 Starting migration: adding quiz_submissions.deadline_at...", flush=True)
+    columns = [column["name"] for column in inspect(engine).get_columns("quiz_submissions")]
+
+    with engine.begin() as conn:
+        if "deadline_at" not in columns:
+            print("🔹 Adding deadline_at column...", flush=True)
+            conn.exec_driver_sql("ALTER TABLE quiz_submissions ADD COLUMN deadline_at DATETIME")
+        else:
+            print("🔸 deadline_at column already exists.", flush=True)
+
+        table = QuizSubmission.__table__
+        rows = conn.execute(select(
+            table.c.id, table.c.started_at, Quiz.time_limit_minutes
+        ).join(Quiz, Quiz.id == table.c.quiz_id).where(
+            table.c.status == SubmissionStatus.IN_PROGRESS,
+            table.c.deadline_at.is_(None),
+            Quiz.time_limit_minutes > 0
+        )).all()
+        if rows:
+            print(f"🔹 Setting deadlines on {len(rows)} attempt(s) in progress...", flush=True)
+            conn.execute(update(table).where(table.c.id == bindparam("b_id")).values(
+                deadline_at=bindparam("b_deadline")
+            ), [
+                {"b_id": submission_id, "b_deadline": attempt_deadline(started_at, time_limit)}
+                for submission_id, started_at, time_limit in rows
+            ])
+
+        for index in table.indexes:
+            if index.name == "ix_quiz_submissions_status_deadline":
+                index.create(bind=conn, checkfirst=True)
+
+    print("✅ Migration completed successfully.", flush=True)
+
+
+if __name__ == "__main__":
+    migrate()
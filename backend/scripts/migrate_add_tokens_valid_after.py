@@ -0,0 +1,34 @@
+"""
+Migration: add users.tokens_valid_after for token revocation.
+
+Adds the nullable column; existing users keep NULL, so every token already
+issued stays valid. Safe to re-run.
+"""
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from database import engine
+
+
+def migrate():
+    print("🔹 Starting migration: adding users.tokens_valid_after...", flush=True)
+    columns = [column["name"] for column in inspect(engine).get_columns("users")]
+
+    with engine.begin() as conn:
+        if "tokens_valid_after" not in columns:
+            print("🔹 Adding tokens_valid_after column...", flush=True)
+            conn.exec_driver_sql("ALTER TABLE users ADD COLUMN tokens_valid_after TIMESTAMP")
+        else:
+            print("🔸 tokens_valid_after column already exists.", flush=True)
+
+    print("✅ Migration completed successfully.", flush=True)
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,29 @@
+"""
+Backfill: rebuild the revenue_daily rollup from the payments table.
+
+Run once after deploying the rollup, and any time the rollup is suspected
+to have drifted (e.g. after editing payments by hand). The rebuild runs in
+a single transaction, so the chart never sees a half-built table.
+"""
+import sys
+import os
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from database import engine
+from models.revenue import RevenueDaily
+from revenue import rebuild_revenue_daily
+
+
+def rebuild():
+    print("🔹 Rebuilding revenue_daily from payments...", flush=True)
+    RevenueDaily.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        days = rebuild_revenue_daily(conn)
+    print(f"✅ revenue_daily rebuilt: {days} day(s).", flush=True)
+
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,46 @@
+"""
+Monthly billing run: create a PENDING payment for the current month of
+every active enrollment that has not been charged for it yet.
+
+Meant to be scheduled daily (e.g. cron); each enrollment is charged once
+per enrollment month, on its anniversary day. Re-running is harmless, and
+a crashed run can simply be started again.
+
+Usage:  python scripts/run_monthly_billing.py [--dry-run] [--chunk-size 1000] [--start-after ENROLLMENT_ID]
+"""
+import argparse
+import sys
+import os
+import time
+
+# Add backend directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from database import engine
+from billing import run_monthly_billing
+
+
+def _report(stats):
+    print(f"🔹 {stats['due']} due so far (last enrollment {stats['last_enrollment_id']})", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be charged")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="enrollments per transaction")
+    parser.add_argument("--start-after", help="resume after this enrollment id")
+    args = parser.parse_args()
+
+    mode = "Dry run" if args.dry_run else "Billing run"
+    print(f"🔹 {mode}: charging enrollments due this month...", flush=True)
+    start = time.perf_counter()
+    stats = run_monthly_billing(engine, chunk_size=args.chunk_size, dry_run=args.dry_run,
+                                start_after=args.start_after, progress=_report)
+    elapsed = time.perf_counter() - start
+
+    if args.dry_run:
+        print(f"🔸 {stats['due']} enrollment(s) due, ${stats['amount']:.2f} would be charged ({elapsed:.1f}s).", flush=True)
+    else:
+        print(f"✅ {stats['created']} charge(s) created for {stats['due']} due enrollment(s), "
+              f"${stats['amount']:.2f} total ({elapsed:.1f}s).", flush=True)
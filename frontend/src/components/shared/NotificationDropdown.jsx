@@ -1,5 +1,5 @@
 import React, { useState, useRef, useEffect } from 'react';
-import { useQuery } from '@tanstack/react-query';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
 import { Bell, CreditCard, UserCheck, BookOpen, X, ClipboardList } from 'lucide-react';
 import api from '../../utils/api';
 
@@ -46,21 +46,49 @@ const NotificationDropdown = () => {
         catch { return []; }
     });
     const dropdownRef = useRef(null);
+    const queryClient = useQueryClient();
 
-    const { data: all = [], isLoading } = useQuery({
+    const { data: { items: all, unread } = { items: [], unread: 0 }, isLoading } = useQuery({
         queryKey: ['notifications'],
         queryFn: async () => {
             const res = await api.get('/notifications');
-            return res.data;
+            return { items: res.data, unread: Number(res.headers['x-unread-count'] || 0) };
         },
-        refetchInterval: 60000, // refresh every 60s
+        refetchInterval: 300000, // safety net; new notifications arrive over the stream below
         staleTime: 30000,
     });
 
+    // Refetch the feed whenever the server pushes a notification
+    useEffect(() => {
+        const token = localStorage.getItem('access_token');
+        if (!token) return;
+        const source = new EventSource(
+            `${api.defaults.baseURL}/notifications/stream?access_token=${encodeURIComponent(token)}`
+        );
+        source.addEventListener('notification', () => {
+            queryClient.invalidateQueries({ queryKey: ['notifications'] });
+        });
+        return () => source.close();
+    }, [queryClient]);
+
     // Filter out dismissed
     const notifications = all.filter(n => !dismissed.includes(n.id));
     const count = notifications.length;
 
+    // Opening the panel moves the server-side read cursor past everything shown
+    const toggleOpen = async () => {
+        const next = !open;
+        setOpen(next);
+        if (next && unread > 0) {
+            try {
+                await api.post('/notifications/read');
+                queryClient.invalidateQueries({ queryKey: ['notifications'] });
+            } catch {
+                // the badge stays until the next successful open
+            }
+        }
+    };
+
     const dismiss = (id, e) => {
         e.stopPropagation();
         const next = [...dismissed, id];
@@ -89,14 +117,14 @@ const NotificationDropdown = () => {
         <div className="relative" ref={dropdownRef}>
             {/* Bell Button */}
             <button
-                onClick={() => setOpen(!open)}
+                onClick={toggleOpen}
                 className="p-2 text-gray-500 hover:bg-gray-100 rounded-lg dark:text-gray-400 dark:hover:bg-gray-700 transition-colors relative"
                 title="Notifications"
             >
                 <Bell size={20} />
-                {count > 0 && (
+                {unread > 0 && (
                     <span className="absolute top-1.5 right-1.5 min-w-[16px] h-4 flex items-center justify-center bg-red-500 text-white text-[10px] font-bold rounded-full px-0.5 border border-white dark:border-gray-800">
-                        {count > 9 ? '9+' : count}
+                        {unread > 9 ? '9+' : unread}
                     </span>
                 )}
             </button>
@@ -140,7 +168,7 @@ const NotificationDropdown = () => {
                                 const cfg = typeConfig[n.type] || typeConfig.enrollment;
                                 const Icon = cfg.icon;
                                 return (
-                                    <div key={n.id} className="flex items-start gap-3 px-4 py-3 hover:bg-gray-50 dark:hover:bg-slate-700/50 transition-colors group">
+                                    <div key={n.id} className={`flex items-start gap-3 px-4 py-3 hover:bg-gray-50 dark:hover:bg-slate-700/50 transition-colors group ${n.read ? '' : 'bg-indigo-50/50 dark:bg-indigo-900/10'}`}>
                                         <div className={`mt-0.5 p-2 rounded-lg flex-shrink-0 ${cfg.bg}`}>
                                             <Icon size={15} className={cfg.color} />
                                         </div>
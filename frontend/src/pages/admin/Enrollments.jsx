@@ -22,8 +22,8 @@ const Enrollments = () => {
 
   const queryClient = useQueryClient();
 
-  // Fetch enrollments
-  const { data: rawEnrollments = [], isLoading } = useQuery({
+  // Fetch enrollments (student and course names come back denormalized)
+  const { data: enrollments = [], isLoading } = useQuery({
     queryKey: ['admin-enrollments'],
     queryFn: async () => {
       const response = await api.get('/admin/enrollments');
@@ -49,22 +49,6 @@ const Enrollments = () => {
     }
   });
 
-  // Add computed fields for search (only when students and courses are loaded)
-  const enrollments = React.useMemo(() => {
-    if (!students.length || !courses.length) return rawEnrollments;
-    
-    return rawEnrollments.map(enrollment => {
-      const student = students.find(s => s.id === enrollment.student_id);
-      const course = courses.find(c => c.id === enrollment.course_id);
-      
-      return {
-        ...enrollment,
-        student_name: student?.full_name || 'Unknown',
-        course_name: course?.name || 'Unknown'
-      };
-    });
-  }, [rawEnrollments, students, courses]);
-
   // Create enrollment mutation
   const createMutation = useMutation({
     mutationFn: async (data) => {
@@ -148,18 +132,6 @@ const Enrollments = () => {
 
 
 
-  // Get student name
-  const getStudentName = (studentId) => {
-    const student = students.find(s => s.id === studentId);
-    return student?.full_name || 'Unknown';
-  };
-
-  // Get course name
-  const getCourseName = (courseId) => {
-    const course = courses.find(c => c.id === courseId);
-    return course?.name || 'Unknown';
-  };
-
   // Get status badge color
   const getStatusColor = (status) => {
     switch (status) {
@@ -182,7 +154,7 @@ const Enrollments = () => {
         <div className="flex items-center gap-2">
           <UserCheck className="w-4 h-4 text-blue-500" />
           <span className="font-medium text-gray-900 dark:text-white">
-            {getStudentName(row.student_id)}
+            {row.student_name}
           </span>
         </div>
       )
@@ -194,7 +166,7 @@ const Enrollments = () => {
         <div className="flex items-center gap-2">
           <BookOpen className="w-4 h-4 text-purple-500" />
           <span className="text-gray-700 dark:text-gray-300">
-            {getCourseName(row.course_id)}
+            {row.course_name}
           </span>
         </div>
       )
@@ -37,18 +37,8 @@ const CourseDetails = () => {
     queryFn: async () => (await api.get('/student/quizzes')).data,
   });
 
-  // Filter to this course only and parse attempt info
-  const quizzes = allQuizzes
-    .filter(q => q.course_id === id)
-    .map(q => {
-      const match = (q.description || '').match(/__attempts_used:(\d+)/);
-      const attemptsUsed = match ? parseInt(match[1]) : 0;
-      return {
-        ...q,
-        description: (q.description || '').replace(/__attempts_used:\d+/, '').trim(),
-        attemptsUsed,
-      };
-    });
+  // Filter to this course only
+  const quizzes = allQuizzes.filter(q => q.course_id === id);
 
   // Fetch attendance
   const { data: attendance, isLoading: attendanceLoading } = useQuery({
@@ -161,9 +151,9 @@ const CourseDetails = () => {
               const now = new Date();
               const isOpen = (!quiz.open_date || new Date(quiz.open_date) <= now)
                           && (!quiz.close_date || new Date(quiz.close_date) >= now);
-              const isCompleted = quiz.attemptsUsed >= quiz.max_attempts;
-              const canRetake = quiz.attemptsUsed > 0 && quiz.attemptsUsed < quiz.max_attempts && isOpen;
-              const canStart = quiz.attemptsUsed === 0 && isOpen;
+              const isCompleted = quiz.attempts_used >= quiz.max_attempts;
+              const canRetake = quiz.attempts_used > 0 && quiz.attempts_used < quiz.max_attempts && isOpen;
+              const canStart = quiz.attempts_used === 0 && isOpen;
 
               return (
                 <div key={quiz.id} className="bg-white dark:bg-gray-800 rounded-2xl border border-gray-200 dark:border-gray-700 p-5 shadow-sm hover:shadow-md transition-shadow">
@@ -191,9 +181,9 @@ const CourseDetails = () => {
                         <p className="text-sm text-gray-500 dark:text-gray-400 mt-1">{quiz.description}</p>
                       )}
                       <div className="flex items-center gap-4 text-xs text-gray-400 mt-2">
-                        <span>{quiz.questions?.length || 0} questions · {quiz.total_points || 0} pts</span>
+                        <span>{quiz.question_count || 0} questions · {quiz.total_points || 0} pts</span>
                         {quiz.time_limit_minutes && <span><Clock size={10} className="inline" /> {quiz.time_limit_minutes} min</span>}
-                        <span>Attempts: {quiz.attemptsUsed}/{quiz.max_attempts}</span>
+                        <span>Attempts: {quiz.attempts_used}/{quiz.max_attempts}</span>
                       </div>
                     </div>
                     <div className="shrink-0">
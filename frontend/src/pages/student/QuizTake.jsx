@@ -124,19 +124,27 @@ export default function QuizTake() {
   const [phase, setPhase] = useState('loading'); // loading | taking | result
   const [quiz, setQuiz] = useState(null);
   const [submissionId, setSubmissionId] = useState(null);
+  const [timeLeft, setTimeLeft] = useState(null); // seconds left on the server's clock, null if untimed
   const [currentQ, setCurrentQ] = useState(0);
   const [answers, setAnswers] = useState({});   // questionId → optionId
   const [result, setResult] = useState(null);
   const [submitting, setSubmitting] = useState(false);
   const [lightboxSrc, setLightboxSrc] = useState(null); // enlarged image URL
+  const unsavedRef = useRef({}); // questionId → optionId changed since the last autosave
 
   // Start the quiz
   useEffect(() => {
     const start = async () => {
       try {
         const res = await api.post(`/student/quizzes/${quizId}/start`);
+        // Resume answers autosaved before a reload
+        const saved = await api.get(`/student/submissions/${res.data.submission_id}/answers`);
+        setAnswers(Object.fromEntries(
+          saved.data.filter(a => a.selected_option_id).map(a => [a.question_id, a.selected_option_id])
+        ));
         setQuiz(res.data.quiz);
         setSubmissionId(res.data.submission_id);
+        setTimeLeft(res.data.seconds_remaining);
         setPhase('taking');
       } catch (err) {
         toast.error(err.response?.data?.detail || 'Failed to start quiz');
@@ -146,6 +154,29 @@ export default function QuizTake() {
     start();
   }, [quizId]);
 
+  // Autosave changed answers every few seconds while the attempt is open
+  useEffect(() => {
+    if (phase !== 'taking' || !submissionId) return;
+    const interval = setInterval(async () => {
+      const changes = unsavedRef.current;
+      if (Object.keys(changes).length === 0) return;
+      unsavedRef.current = {};
+      try {
+        await api.patch(`/student/submissions/${submissionId}/answers`, {
+          answers: Object.entries(changes).map(([question_id, selected_option_id]) => ({ question_id, selected_option_id }))
+        });
+      } catch {
+        unsavedRef.current = { ...changes, ...unsavedRef.current }; // retry with the next save
+      }
+    }, 3000);
+    return () => clearInterval(interval);
+  }, [phase, submissionId]);
+
+  const selectAnswer = (questionId, optionId) => {
+    unsavedRef.current[questionId] = optionId;
+    setAnswers(prev => ({ ...prev, [questionId]: optionId }));
+  };
+
   const handleSubmit = useCallback(async () => {
     if (submitting) return;
     setSubmitting(true);
@@ -166,10 +197,7 @@ export default function QuizTake() {
     }
   }, [quiz, answers, submissionId, submitting]);
 
-  const { formatted: timerDisplay, remaining } = useTimer(
-    quiz?.time_limit_minutes ? quiz.time_limit_minutes * 60 : null,
-    handleSubmit
-  );
+  const { formatted: timerDisplay, remaining } = useTimer(timeLeft, handleSubmit);
 
   if (phase === 'loading') {
     return (
@@ -282,7 +310,7 @@ export default function QuizTake() {
                       key={opt.id}
                       whileHover={{ scale: 1.01 }}
                       whileTap={{ scale: 0.99 }}
-                      onClick={() => setAnswers(prev => ({ ...prev, [q.id]: opt.id }))}
+                      onClick={() => selectAnswer(q.id, opt.id)}
                       className={`w-full text-left px-4 py-3 rounded-xl border-2 transition-all font-medium text-sm ${
                         selected
                           ? 'border-green-500 bg-green-50 dark:bg-green-900/20 text-green-800 dark:text-green-300'
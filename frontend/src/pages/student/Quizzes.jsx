@@ -10,9 +10,7 @@ function getQuizStatus(quiz) {
   const open = quiz.open_date ? new Date(quiz.open_date) : null;
   const close = quiz.close_date ? new Date(quiz.close_date) : null;
 
-  // Parse attempts from description hack
-  const match = (quiz.description || '').match(/__attempts_used:(\d+)/);
-  const attemptsUsed = match ? +match[1] : 0;
+  const attemptsUsed = quiz.attempts_used || 0;
 
   if (attemptsUsed >= quiz.max_attempts) return { label: 'Completed', color: 'emerald', icon: CheckCircle, canStart: false };
   if (close && now > close) return { label: 'Closed', color: 'gray', icon: Lock, canStart: false };
@@ -64,9 +62,7 @@ export default function Quizzes() {
           {quizzes.map((quiz, i) => {
             const status = getQuizStatus(quiz);
             const StatusIcon = status.icon;
-            const match = (quiz.description || '').match(/__attempts_used:(\d+)/);
-            const attemptsUsed = match ? +match[1] : 0;
-            const cleanDescription = (quiz.description || '').replace(/__attempts_used:\d+/, '').trim();
+            const attemptsUsed = quiz.attempts_used || 0;
 
             return (
               <motion.div
@@ -89,8 +85,8 @@ export default function Quizzes() {
 
                 {/* Info */}
                 <h3 className="font-semibold text-gray-900 dark:text-white mb-1">{quiz.title}</h3>
-                {cleanDescription && (
-                  <p className="text-sm text-gray-500 dark:text-gray-400 mb-2 line-clamp-2">{cleanDescription}</p>
+                {quiz.description && (
+                  <p className="text-sm text-gray-500 dark:text-gray-400 mb-2 line-clamp-2">{quiz.description}</p>
                 )}
 
                 <div className="flex items-center gap-3 text-xs text-gray-500 dark:text-gray-400 mb-4 flex-wrap">
@@ -100,7 +96,7 @@ export default function Quizzes() {
                   </span>
                   <span className="flex items-center gap-1">
                     <ClipboardList size={12} />
-                    {quiz.questions?.length || 0} questions · {quiz.total_points || 0} pts
+                    {quiz.question_count || 0} questions · {quiz.total_points || 0} pts
                   </span>
                   {quiz.time_limit_minutes && (
                     <span className="flex items-center gap-1">